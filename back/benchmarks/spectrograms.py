@@ -0,0 +1,152 @@
+"""Benchmark the computation of spectrogram tiles.
+
+Compares the xarray pipeline built on soundevent with the numpy pipeline
+used by `whombat.api.compute_spectrogram`, reporting the time per tile and
+the peak memory allocated while computing a tile.
+
+Run from the `back` directory with::
+
+    python benchmarks/spectrograms.py
+"""
+
+import argparse
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import numpy as np
+import xarray as xr
+from soundevent import arrays, audio
+from soundevent.arrays import create_time_range
+
+from whombat.core.spectrograms import (
+    compute_normalized_spectrogram,
+    normalize_spectrogram,
+)
+
+
+def xarray_pipeline(
+    samples: np.ndarray,
+    samplerate: int,
+    window_size: float,
+    overlap: float,
+    pcen: bool,
+) -> np.ndarray:
+    """Compute a tile with the soundevent xarray functions."""
+    wav = xr.DataArray(
+        samples[:, None],
+        dims=("time", "channel"),
+        coords={
+            "time": create_time_range(
+                start_time=0,
+                end_time=len(samples) / samplerate,
+                samplerate=samplerate,
+            ),
+            "channel": [0],
+        },
+    )
+    spectrogram = audio.compute_spectrogram(
+        wav,
+        window_size=window_size,
+        hop_size=(1 - overlap) * window_size,
+        window_type="hann",
+    )
+    if pcen:
+        spectrogram = audio.pcen(spectrogram)
+    spectrogram = arrays.to_db(spectrogram, min_db=-100, max_db=0)
+    spectrogram = normalize_spectrogram(spectrogram, relative=True)
+    return spectrogram.data.squeeze()
+
+
+def numpy_pipeline(
+    samples: np.ndarray,
+    samplerate: int,
+    window_size: float,
+    overlap: float,
+    pcen: bool,
+) -> np.ndarray:
+    """Compute a tile with the in-place numpy pipeline."""
+    return compute_normalized_spectrogram(
+        samples,
+        samplerate,
+        window_size=window_size,
+        overlap=overlap,
+        pcen=pcen,
+        min_db=-100,
+        max_db=0,
+    ).squeeze()
+
+
+def measure(
+    func: Callable[..., np.ndarray],
+    repeats: int,
+    *args,
+) -> tuple[float, int, np.ndarray]:
+    """Return the mean time, peak allocated memory and output of func."""
+    result = func(*args)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(*args)
+    elapsed = (time.perf_counter() - start) / repeats
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samplerate", type=int, default=48_000)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--window-size", type=float, default=0.025)
+    parser.add_argument("--overlap", type=float, default=0.5)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    samples = rng.standard_normal(int(args.samplerate * args.duration))
+
+    print(
+        f"{args.duration}s tile at {args.samplerate} Hz, "
+        f"window {args.window_size}s, overlap {args.overlap}"
+    )
+    print(f"{'pipeline':<10}{'pcen':<7}{'ms/tile':>10}{'peak MiB':>10}")
+
+    for pcen in (False, True):
+        results = {}
+        for name, func in [
+            ("xarray", xarray_pipeline),
+            ("numpy", numpy_pipeline),
+        ]:
+            elapsed, peak, output = measure(
+                func,
+                args.repeats,
+                samples,
+                args.samplerate,
+                args.window_size,
+                args.overlap,
+                pcen,
+            )
+            results[name] = (elapsed, peak, output)
+            print(
+                f"{name:<10}{str(pcen):<7}{elapsed * 1000:>10.1f}"
+                f"{peak / 1024**2:>10.1f}"
+            )
+
+        (old_time, old_peak, old), (new_time, new_peak, new) = (
+            results["xarray"],
+            results["numpy"],
+        )
+        print(
+            f"speedup {old_time / new_time:.2f}x, "
+            f"peak memory {new_peak / old_peak:.0%} of xarray, "
+            f"identical output: {np.array_equal(old, new)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,17 @@
 
 from whombat.api.annotation_projects import annotation_projects
 from whombat.api.annotation_tasks import annotation_tasks
-from whombat.api.audio import load_audio, load_clip_bytes
+from whombat.api.audio import (
+    get_audio_cache,
+    get_audio_flights,
+    get_audio_handle_pool,
+    get_encoded_audio_cache,
+    get_s3_flights,
+    load_audio,
+    load_clip_bytes,
+    load_encoded_clip_bytes,
+    stream_audio,
+)
 from whombat.api.clip_annotations import clip_annotations
 from whombat.api.clip_evaluations import clip_evaluations
 from whombat.api.clip_predictions import clip_predictions
@@ -11,6 +21,7 @@ from whombat.api.datasets import datasets
 from whombat.api.evaluation_sets import evaluation_sets
 from whombat.api.evaluations import evaluations
 from whombat.api.features import features, find_feature, find_feature_value
+from whombat.api.jobs import get_job_runner, jobs, save_job_file
 from whombat.api.model_runs import model_runs
 from whombat.api.notes import notes
 from whombat.api.recordings import recordings
@@ -19,10 +30,21 @@ from whombat.api.sound_event_annotations import sound_event_annotations
 from whombat.api.sound_event_evaluations import sound_event_evaluations
 from whombat.api.sound_event_predictions import sound_event_predictions
 from whombat.api.sound_events import sound_events
-from whombat.api.spectrograms import compute_spectrogram
+from whombat.api.spectrograms import (
+    compute_spectrogram,
+    get_raw_spectrogram,
+    get_spectrogram_cache,
+    get_spectrogram_flights,
+    get_spectrogram_image,
+    get_spectrogram_images,
+    get_spectrogram_tile,
+    render_spectrogram_image,
+    request_spectrogram_pyramid,
+)
 from whombat.api.tags import find_tag, find_tag_value, tags
 from whombat.api.user_runs import user_runs
 from whombat.api.users import users
+from whombat.api.waveforms import get_waveform, request_waveform_pyramid
 
 __all__ = [
     "annotation_projects",
@@ -41,15 +63,35 @@ __all__ = [
     "find_feature_value",
     "find_tag",
     "find_tag_value",
+    "get_audio_cache",
+    "get_audio_flights",
+    "get_audio_handle_pool",
+    "get_encoded_audio_cache",
+    "get_job_runner",
+    "get_raw_spectrogram",
+    "get_s3_flights",
+    "get_spectrogram_cache",
+    "get_spectrogram_flights",
+    "get_spectrogram_image",
+    "get_spectrogram_images",
+    "get_spectrogram_tile",
+    "get_waveform",
+    "jobs",
     "load_audio",
     "load_clip_bytes",
+    "load_encoded_clip_bytes",
     "model_runs",
     "notes",
     "recordings",
+    "render_spectrogram_image",
+    "request_spectrogram_pyramid",
+    "request_waveform_pyramid",
+    "save_job_file",
     "sound_event_annotations",
     "sound_event_evaluations",
     "sound_event_predictions",
     "sound_events",
+    "stream_audio",
     "tags",
     "user_runs",
     "users",
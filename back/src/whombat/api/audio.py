@@ -1,19 +1,72 @@
+import atexit
+import functools
+import hashlib
+import io
+import json
+import shutil
 import struct
+import tempfile
+from collections.abc import Callable, Sequence
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO, Iterator
 
+import numpy as np
 import soundfile as sf
+import xarray as xr
 from soundevent import audio, data
-from soundevent.arrays import extend_dim
+from soundevent.arrays import (
+    ArrayAttrs,
+    Dimensions,
+    create_time_range,
+    extend_dim,
+)
+from soundevent.audio.attributes import AudioAttrs
 from soundevent.audio.io import audio_to_bytes
-import tempfile
 
 from whombat import schemas
+from whombat.core.audio_encoding import (
+    encode_audio_blocks,
+    get_encoding_samplerate,
+)
+from whombat.core.audio_streaming import (
+    design_filter,
+    get_filter_margin,
+    get_output_frames,
+    iter_processed_blocks,
+)
+from whombat.core.file_cache import FileCache
+from whombat.core.handle_pool import AudioHandle, AudioHandlePool
+from whombat.core.single_flight import SingleFlight, ThreadSingleFlight
+from whombat.core.wav import read_wav_frames, read_wav_layout
 from whombat.system import get_settings
+from whombat.system.data import get_app_data_dir
+from whombat.system.executors import get_io_executor
 from whombat.utils.aws_s3_client import S3Client
+from whombat.utils.s3_reader import S3RangeReader
 
 __all__ = [
+    "get_audio_cache",
+    "get_audio_flights",
+    "get_audio_handle_pool",
+    "get_audio_path",
+    "get_encoded_audio_cache",
+    "get_output_samplerate",
+    "get_s3_flights",
+    "iter_audio_blocks",
     "load_audio",
+    "load_audio_windows",
     "load_clip_bytes",
+    "load_encoded_clip_bytes",
+    "load_samples",
+    "open_audio_file",
+    "open_sound_file",
+    "open_s3_file",
+    "process_audio",
+    "read_clip",
+    "read_frames",
+    "stream_audio",
 ]
 
 CHUNK_SIZE = 512 * 1024
@@ -35,6 +88,288 @@ def parse_s3_url(s3_url: str) -> tuple[str, str]:
     parts = s3_url[5:].split("/", 1)
     return parts[0], parts[1]
 
+
+def open_s3_file(s3_url: str) -> S3RangeReader:
+    """Open a file in S3 for seekable reading with HTTP Range requests.
+
+    Only the bytes that are actually read are downloaded, so reading a
+    short window of a long recording fetches the header and the frames of
+    the window, not the whole object.
+    """
+    bucket_name, key = parse_s3_url(s3_url)
+    return s3.open_file(bucket_name, key)
+
+
+@lru_cache
+def get_audio_cache() -> FileCache | None:
+    """Get the local cache for audio files fetched from S3.
+
+    Returns None if the cache is disabled in the settings.
+    """
+    settings = get_settings()
+    if settings.audio_cache_size <= 0:
+        return None
+
+    directory = settings.audio_cache_dir
+    if directory is None:
+        directory = get_app_data_dir() / "audio_cache"
+
+    return FileCache(directory, max_size=settings.audio_cache_size)
+
+
+@lru_cache
+def get_encoded_audio_cache() -> FileCache:
+    """Get the cache of encoded clips used when the audio cache is disabled.
+
+    The clips are stored in a temporary directory that is removed when the
+    process exits.
+    """
+    directory = Path(tempfile.mkdtemp(prefix="whombat-encoded-audio-"))
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return FileCache(
+        directory,
+        max_size=get_settings().encoded_audio_cache_size,
+    )
+
+
+@lru_cache
+def get_audio_handle_pool() -> AudioHandlePool | None:
+    """Get the pool of audio files kept open between stream requests.
+
+    Returns None if the pool is disabled in the settings.
+    """
+    settings = get_settings()
+    if settings.audio_handle_pool_size <= 0:
+        return None
+
+    return AudioHandlePool(
+        max_handles=settings.audio_handle_pool_size,
+        idle_timeout=settings.audio_handle_idle_timeout,
+        submit=get_io_executor().submit if settings.audio_prefetch else None,
+    )
+
+
+@lru_cache
+def get_audio_flights() -> SingleFlight:
+    """Get the group coalescing identical concurrent audio requests."""
+    return SingleFlight("audio")
+
+
+@lru_cache
+def get_s3_flights() -> ThreadSingleFlight:
+    """Get the group coalescing concurrent downloads of an S3 file."""
+    return ThreadSingleFlight("s3")
+
+
+def get_audio_path(
+    recording: schemas.Recording,
+    audio_dir: Path | str | None = None,
+    use_s3: bool = get_settings().use_s3,
+) -> Path | str:
+    """Get the local path or the S3 URL of the audio file of a recording."""
+    if use_s3:
+        audio_path = str(recording.path).replace("\\", "/")
+        if not audio_path.startswith("s3://"):
+            audio_path = audio_path.replace("s3:/", "s3://")
+        return audio_path
+
+    if audio_dir is None:
+        audio_dir = Path().cwd()
+
+    return Path(audio_dir) / recording.path
+
+
+@contextmanager
+def open_audio_file(
+    path: Path | str,
+    use_s3: bool = get_settings().use_s3,
+    recording_hash: str | None = None,
+) -> Iterator[Path | BinaryIO]:
+    """Open an audio file for reading with soundfile.
+
+    Parameters
+    ----------
+    path
+        The local path or the S3 URL of the audio file.
+    use_s3
+        If True, `path` is an S3 URL.
+    recording_hash
+        The hash of the recording stored at `path`. If given, S3 files are
+        served from, and stored in, the local audio cache.
+
+    Yields
+    ------
+    Path | BinaryIO
+        An object that can be passed to `soundfile.SoundFile`.
+
+    Notes
+    -----
+    S3 files that are not cached, either because no hash was given, the
+    cache is disabled, or the file is larger than
+    `settings.audio_cache_max_file_size`, are read with ranged requests.
+    """
+    if not use_s3:
+        yield Path(path)
+        return
+
+    cache = get_audio_cache()
+
+    if cache is None or recording_hash is None:
+        with open_s3_file(str(path)) as fp:
+            yield fp
+        return
+
+    cached = cache.get(recording_hash)
+    if cached is None:
+        # NOTE: Threads opening the same file wait for a single download.
+        cached = get_s3_flights().run(
+            recording_hash,
+            lambda: _fetch_to_cache(cache, str(path), recording_hash),
+        )
+
+    if cached is not None:
+        yield cached
+        return
+
+    with open_s3_file(str(path)) as fp:
+        yield fp
+
+
+def _fetch_to_cache(
+    cache: FileCache,
+    s3_url: str,
+    recording_hash: str,
+) -> Path | None:
+    """Download an S3 file into the audio cache.
+
+    Returns None if the file is too large to be cached.
+    """
+    with open_s3_file(s3_url) as fp:
+        if fp.size > get_settings().audio_cache_max_file_size:
+            return None
+
+    return cache.get_or_fetch(
+        recording_hash,
+        lambda dst: fetch_s3_file(s3_url, dst),
+    )
+
+
+@contextmanager
+def open_sound_file(
+    path: Path | str,
+    use_s3: bool = get_settings().use_s3,
+    recording_hash: str | None = None,
+) -> Iterator[sf.SoundFile]:
+    """Open an audio file with soundfile.
+
+    See `open_audio_file` for a description of the parameters.
+    """
+    with (
+        open_audio_file(
+            path,
+            use_s3=use_s3,
+            recording_hash=recording_hash,
+        ) as source,
+        sf.SoundFile(source) as sound_file,
+    ):
+        yield sound_file
+
+
+def read_frames(
+    source: Path | BinaryIO,
+    offset: int,
+    frames: int,
+    channel: int | None = None,
+) -> np.ndarray:
+    """Read frames from an open audio source.
+
+    Local PCM and float WAV files are read through a memory map, so only
+    the selected frames and channel are converted to float. Other files
+    are decoded with soundfile.
+
+    Parameters
+    ----------
+    source
+        A path or file-like object, as yielded by `open_audio_file`.
+    offset
+        First frame to read.
+    frames
+        Number of frames to read.
+    channel
+        Channel to read. If None all channels are read.
+
+    Returns
+    -------
+    np.ndarray
+        A float64 array of shape `(frames, channels)`, or `(frames,)` if a
+        channel was given. Frames past the end of the file are zero.
+    """
+    if isinstance(source, Path):
+        layout = read_wav_layout(source)
+        if layout is not None:
+            return read_wav_frames(
+                source,
+                offset,
+                frames,
+                channel=channel,
+                layout=layout,
+            )
+
+    with sf.SoundFile(source) as fp:
+        fp.seek(offset)
+        wav = fp.read(frames=frames, always_2d=True, fill_value=0)
+
+    if channel is not None:
+        return wav[:, channel]
+
+    return wav
+
+
+def read_clip(
+    source: Path | BinaryIO,
+    clip: data.Clip,
+) -> xr.DataArray:
+    """Read the audio of a clip from an open audio source.
+
+    This mirrors `soundevent.audio.load_clip` but reads from any source
+    accepted by `soundfile`, such as a file-like S3 reader.
+    """
+    recording = clip.recording
+    samplerate = recording.samplerate
+
+    offset = int(np.floor(clip.start_time * samplerate))
+    duration = clip.end_time - clip.start_time
+    samples = int(np.floor(duration * samplerate))
+
+    wav = read_frames(source, offset, samples)
+
+    # NOTE: Align start and end times to sample boundaries, as done by
+    # soundevent.
+    start_time = offset / samplerate
+    end_time = start_time + samples / samplerate
+
+    return xr.DataArray(
+        data=wav,
+        dims=(Dimensions.time.value, Dimensions.channel.value),
+        coords={
+            Dimensions.time.value: create_time_range(
+                start_time=start_time,
+                end_time=end_time,
+                samplerate=samplerate,
+            ),
+            Dimensions.channel.value: range(wav.shape[1]),
+        },
+        attrs={
+            AudioAttrs.recording_id.value: str(recording.uuid),
+            AudioAttrs.clip_id.value: str(clip.uuid),
+            AudioAttrs.path.value: str(recording.path),
+            ArrayAttrs.units.value: "V",
+            ArrayAttrs.standard_name.value: "amplitude",
+            ArrayAttrs.long_name.value: "Amplitude",
+        },
+    )
+
+
 def load_audio(
     recording: schemas.Recording,
     start_time: float | None = None,
@@ -65,53 +400,150 @@ def load_audio(
     bytes
         Audio data.
     """
-    if audio_dir is None:
-        audio_dir = Path().cwd()
+    [wave] = load_audio_windows(
+        recording,
+        [(start_time, end_time)],
+        audio_dir=audio_dir,
+        audio_parameters=audio_parameters,
+        use_s3=use_s3,
+    )
+    return wave
+
+
+def load_audio_windows(
+    recording: schemas.Recording,
+    windows: Sequence[tuple[float | None, float | None]],
+    audio_dir: Path | str | None = None,
+    audio_parameters: schemas.AudioParameters | None = None,
+    use_s3: bool = get_settings().use_s3,
+) -> list[xr.DataArray]:
+    """Load several windows of audio of a recording.
 
+    The audio file is opened once for all windows.
+
+    Parameters
+    ----------
+    recording
+        The recording to load audio from.
+    windows
+        Start and end times in seconds of each window. None stands for
+        the start or end of the recording.
+    audio_dir
+        The directory where the audio files are stored or the S3 URL.
+    audio_parameters
+        Audio parameters.
+    use_s3
+        If True, fetch the audio file from S3.
+
+    Returns
+    -------
+    list[xr.DataArray]
+        The audio of each window.
+    """
     if audio_parameters is None:
         audio_parameters = schemas.AudioParameters()
 
-    # Set start and end times.
-    if start_time is None:
-        start_time = 0.0
+    audio_path = get_audio_path(recording, audio_dir, use_s3=use_s3)
 
-    if end_time is None:
-        end_time = recording.duration
-        
-    local_audio_path = None
-    
-    if use_s3:
-        s3_path = str(recording.path).replace("\\", "/")
-        if not s3_path.startswith("s3://"):
-            s3_path = s3_path.replace("s3:/", "s3://")
-            
-        local_temp_file = Path(tempfile.gettempdir()) / "temp_audio_file.wav"
-        local_audio_path = fetch_s3_file(s3_path, local_temp_file)
-    else:
-        local_audio_path = audio_dir / recording.path
-        
-    clip = data.Clip(
-        recording=data.Recording(
-            uuid=recording.uuid,
-            path=local_audio_path,
-            duration=recording.duration,
-            samplerate=recording.samplerate,
-            channels=recording.channels,
-            time_expansion=recording.time_expansion,
-        ),
-        start_time=start_time,
-        end_time=end_time,
+    clip_recording = data.Recording(
+        uuid=recording.uuid,
+        path=recording.path,
+        duration=recording.duration,
+        samplerate=recording.samplerate,
+        channels=recording.channels,
+        time_expansion=recording.time_expansion,
     )
-    
-    if clip.start_time < 0:
-        clip.start_time = 0
 
-    # Load audio.
-    wave = audio.load_clip(clip)
+    waves = []
+
+    # Load audio. For S3 files only the bytes of the requested windows
+    # are downloaded.
+    with open_audio_file(
+        audio_path,
+        use_s3=use_s3,
+        recording_hash=recording.hash,
+    ) as source:
+        for start_time, end_time in windows:
+            # Set start and end times.
+            if start_time is None:
+                start_time = 0.0
+
+            if end_time is None:
+                end_time = recording.duration
+
+            clip = data.Clip(
+                recording=clip_recording,
+                start_time=start_time,
+                end_time=end_time,
+            )
 
-    if start_time < 0:
-        wave = extend_dim(wave, "time", start=start_time)
+            if clip.start_time < 0:
+                clip.start_time = 0
 
+            if isinstance(source, io.IOBase):
+                source.seek(0)
+
+            wave = read_clip(source, clip)
+
+            if start_time < 0:
+                wave = extend_dim(wave, "time", start=start_time)
+
+            waves.append(process_audio(wave, audio_parameters))
+
+    return waves
+
+
+def load_samples(
+    recording: schemas.Recording,
+    start_time: float,
+    end_time: float,
+    channel: int = 0,
+    audio_dir: Path | str | None = None,
+    use_s3: bool = get_settings().use_s3,
+) -> np.ndarray:
+    """Load the samples of one channel of a window of a recording.
+
+    This reads the same samples as `load_audio` without resampling or
+    filtering, but returns a plain numpy array instead of a labelled
+    `xarray.DataArray`.
+
+    Parameters
+    ----------
+    recording
+        The recording to load audio from.
+    start_time
+        Start time in seconds. Must not be negative.
+    end_time
+        End time in seconds.
+    channel
+        The channel to load.
+    audio_dir
+        The directory where the audio files are stored or the S3 URL.
+    use_s3
+        If True, fetch the audio file from S3.
+
+    Returns
+    -------
+    np.ndarray
+        1D array of samples. Samples past the end of the file are zero.
+    """
+    samplerate = recording.samplerate
+    offset = int(np.floor(start_time * samplerate))
+    samples = int(np.floor((end_time - start_time) * samplerate))
+
+    with open_audio_file(
+        get_audio_path(recording, audio_dir, use_s3=use_s3),
+        use_s3=use_s3,
+        recording_hash=recording.hash,
+    ) as source:
+        return read_frames(source, offset, samples, channel=channel)
+
+
+def process_audio(
+    wave: xr.DataArray,
+    audio_parameters: schemas.AudioParameters,
+) -> xr.DataArray:
+    """Resample and filter audio according to the audio parameters."""
     # Resample audio.
     if audio_parameters.resample:
         wave = audio.resample(wave, audio_parameters.samplerate)
@@ -130,6 +562,248 @@ def load_audio(
 
     return wave
 
+
+def get_output_samplerate(
+    recording: schemas.Recording,
+    audio_parameters: schemas.AudioParameters,
+) -> int:
+    """Sample rate of the audio of a recording after processing."""
+    if audio_parameters.resample:
+        return audio_parameters.samplerate
+    return recording.samplerate
+
+
+def iter_audio_blocks(
+    recording: schemas.Recording,
+    start_time: float,
+    end_time: float,
+    audio_parameters: schemas.AudioParameters | None = None,
+    samplerate: int | None = None,
+    channel: int | None = None,
+    audio_dir: Path | str | None = None,
+    use_s3: bool = get_settings().use_s3,
+    block_size: int = 65_536,
+) -> Iterator[np.ndarray]:
+    """Load, resample and filter a window of a recording in blocks.
+
+    Unlike `load_audio`, the window is never held in memory as a whole,
+    so memory usage does not depend on the length of the window.
+
+    Parameters
+    ----------
+    recording
+        The recording to load audio from.
+    start_time
+        Start time in seconds. Audio before the start of the recording
+        is silent.
+    end_time
+        End time in seconds.
+    audio_parameters
+        Audio parameters.
+    samplerate
+        Sample rate of the output. Defaults to `get_output_samplerate`.
+    channel
+        Channel to load. If None all channels are loaded.
+    audio_dir
+        The directory where the audio files are stored or the S3 URL.
+    use_s3
+        If True, fetch the audio file from S3.
+    block_size
+        Approximate number of frames in each block.
+
+    Yields
+    ------
+    np.ndarray
+        Consecutive blocks of audio of shape `(frames, channels)`, or
+        `(frames,)` if a channel was given. In total
+        `get_output_frames` frames are yielded.
+
+    Notes
+    -----
+    Audio is resampled with a polyphase filter, instead of the Fourier
+    method used by `load_audio`, as it can be computed in blocks.
+    """
+    if audio_parameters is None:
+        audio_parameters = schemas.AudioParameters()
+
+    if samplerate is None:
+        samplerate = get_output_samplerate(recording, audio_parameters)
+
+    offset = int(np.floor(start_time * recording.samplerate))
+    frames = int(np.floor((end_time - start_time) * recording.samplerate))
+
+    sos = None
+    filter_margin = 0
+    if (
+        audio_parameters.low_freq is not None
+        or audio_parameters.high_freq is not None
+    ):
+        sos = design_filter(
+            samplerate,
+            low_freq=audio_parameters.low_freq,
+            high_freq=audio_parameters.high_freq,
+            order=audio_parameters.filter_order,
+        )
+        filter_margin = get_filter_margin(
+            samplerate,
+            low_freq=audio_parameters.low_freq,
+            high_freq=audio_parameters.high_freq,
+        )
+
+    with ExitStack() as stack:
+        source = stack.enter_context(
+            open_audio_file(
+                get_audio_path(recording, audio_dir, use_s3=use_s3),
+                use_s3=use_s3,
+                recording_hash=recording.hash,
+            )
+        )
+
+        layout = None
+        if isinstance(source, Path):
+            layout = read_wav_layout(source)
+
+        if layout is not None:
+
+            def read(start: int, size: int) -> np.ndarray:
+                return read_wav_frames(
+                    source,
+                    offset + start,
+                    size,
+                    channel=channel,
+                    layout=layout,
+                )
+
+        else:
+            sound_file = stack.enter_context(sf.SoundFile(source))
+
+            def read(start: int, size: int) -> np.ndarray:
+                start += offset
+                padding = min(max(-start, 0), size)
+                sound_file.seek(max(start, 0))
+                # NOTE: A negative count would read to the end of the file.
+                data = sound_file.read(
+                    size - padding,
+                    always_2d=True,
+                    fill_value=0,
+                )
+                data = np.pad(data, ((padding, 0), (0, 0)))
+                if channel is not None:
+                    return data[:, channel]
+                return data
+
+        yield from iter_processed_blocks(
+            read,
+            frames,
+            recording.samplerate,
+            target_samplerate=samplerate,
+            sos=sos,
+            filter_margin=filter_margin,
+            block_size=block_size,
+        )
+
+
+def stream_audio(
+    recording: schemas.Recording,
+    start_time: float | None = None,
+    end_time: float | None = None,
+    audio_dir: Path | str | None = None,
+    audio_parameters: schemas.AudioParameters | None = None,
+    codec: str = "wav",
+    use_s3: bool = get_settings().use_s3,
+    block_size: int = 65_536,
+) -> Iterator[bytes]:
+    """Encode a window of a recording in blocks.
+
+    The audio is loaded and processed with `iter_audio_blocks` and
+    encoded as it is read.
+
+    Parameters
+    ----------
+    recording
+        The recording to load audio from.
+    start_time
+        Start time in seconds. Defaults to the start of the recording.
+    end_time
+        End time in seconds. Defaults to the end of the recording.
+    audio_dir
+        The directory where the audio files are stored or the S3 URL.
+    audio_parameters
+        Audio parameters.
+    codec
+        Name of the codec, see `whombat.core.audio_encoding.CODECS`.
+    use_s3
+        If True, fetch the audio file from S3.
+    block_size
+        Approximate number of frames processed at a time.
+
+    Yields
+    ------
+    bytes
+        Consecutive pieces of the encoded audio file.
+
+    Notes
+    -----
+    WAV audio is encoded on the fly. Compressed codecs are first encoded
+    to a temporary file, as their encoders need to seek in the output.
+    """
+    if audio_parameters is None:
+        audio_parameters = schemas.AudioParameters()
+
+    if start_time is None:
+        start_time = 0
+
+    if end_time is None:
+        end_time = recording.duration
+
+    samplerate = get_encoding_samplerate(
+        codec,
+        get_output_samplerate(recording, audio_parameters),
+    )
+    frames = get_output_frames(
+        int(np.floor((end_time - start_time) * recording.samplerate)),
+        recording.samplerate,
+        samplerate,
+    )
+
+    blocks = iter_audio_blocks(
+        recording,
+        start_time,
+        end_time,
+        audio_parameters=audio_parameters,
+        samplerate=samplerate,
+        audio_dir=audio_dir,
+        use_s3=use_s3,
+        block_size=block_size,
+    )
+
+    if codec == "wav":
+        yield generate_wav_header(
+            samplerate=samplerate,
+            channels=recording.channels,
+            data_size=frames * recording.channels * 2,
+        )
+        for block in blocks:
+            yield audio_to_bytes(
+                np.clip(block, -1, 1),
+                samplerate=samplerate,
+                bit_depth=16,
+            )
+        return
+
+    with tempfile.TemporaryFile() as output:
+        encode_audio_blocks(
+            blocks,
+            output,
+            samplerate=samplerate,
+            channels=recording.channels,
+            codec=codec,
+        )
+        output.seek(0)
+        while content := output.read(CHUNK_SIZE):
+            yield content
+
+
 BIT_DEPTH_MAP: dict[str, int] = {
     "PCM_S8": 8,
     "PCM_16": 16,
@@ -149,7 +823,9 @@ def load_clip_bytes(
     start_time: float | None = None,
     end_time: float | None = None,
     bit_depth: int = 16,
-    use_s3: bool = get_settings().use_s3
+    use_s3: bool = get_settings().use_s3,
+    recording_hash: str | None = None,
+    stream: str | None = None,
 ) -> tuple[bytes, int, int, int]:
     """Load audio.
 
@@ -174,6 +850,14 @@ def load_clip_bytes(
         The bit depth of the resulting audio. By default, it is 16 bits.
     use_s3
         If True, fetch the audio file from S3.
+    recording_hash
+        The hash of the recording, used to serve S3 files from the local
+        audio cache.
+    stream
+        Identifies the client stream the request belongs to. If given,
+        the file is read through the audio handle pool, so consecutive
+        requests of the stream reuse the open file and the next chunk is
+        decoded ahead of time.
 
     Returns
     -------
@@ -186,77 +870,257 @@ def load_clip_bytes(
     filesize
         Total size of clip in bytes.
     """
-    local_audio_path = None
-    if use_s3:
-        # Fetch file from S3
-        local_temp_file = Path(tempfile.gettempdir()) / "temp_audio_file.wav"
-        local_audio_path = fetch_s3_file(path, local_temp_file)
-    else:
-        local_audio_path = Path(path)
-        
-    with sf.SoundFile(local_audio_path) as sf_file:
-        samplerate = int(sf_file.samplerate * time_expansion)
-        channels = sf_file.channels
-
-        # Calculate start and end frames based on start and end times
-        # to ensure that the requested piece of audio is loaded.
-        if start_time is None:
-            start_time = 0
-        start_frame = int(start_time * samplerate)
-
-        end_frame = sf_file.frames
-        if end_time is not None:
-            end_frame = int(end_time * samplerate)
-
-        # Calculate the total number of frames and the size of the audio
-        # data in bytes.
-        total_frames = end_frame - start_frame
-        bytes_per_frame = channels * bit_depth // 8
-        filesize = total_frames * bytes_per_frame
-
-        # Compute the offset, which is the frame at which to start reading
-        # the audio data.
-        offset = start_frame
-        if start != 0:
-            # When the start byte is not 0, calculate the offset in frames
-            # and add it to the start frame. Note that we need to
-            # remove the size of the header from the start byte to correctly
-            # calculate the offset in frames.
-            offset_frames = (start - HEADER_SIZE) // bytes_per_frame
-            offset += offset_frames
-
-        # Make sure that the number of frames to read is not greater than
-        # the number of frames requested.
-        frames = min(frames, end_frame - offset)
-
-        sf_file.seek(offset)
-        audio_data = sf_file.read(frames, fill_value=0, always_2d=True)
-
-        # Convert the audio data to raw bytes
-        audio_bytes = audio_to_bytes(
-            audio_data,
-            samplerate=samplerate,
-            bit_depth=bit_depth,
-        )
+    opener = functools.partial(
+        open_sound_file,
+        path,
+        use_s3=use_s3,
+        recording_hash=recording_hash,
+    )
+    pool = get_audio_handle_pool() if stream is not None else None
 
-        # Generate the WAV header if the start byte is 0 and
-        # append to the start of the audio data.
-        if start == 0:
-            header = generate_wav_header(
-                samplerate=int(samplerate * speed),
-                channels=channels,
-                data_size=filesize,
+    if pool is None:
+        handle = AudioHandle(path, opener)
+        try:
+            return _read_clip_bytes(
+                handle,
+                handle.read,
+                start=start,
+                speed=speed,
+                frames=frames,
+                time_expansion=time_expansion,
+                start_time=start_time,
+                end_time=end_time,
                 bit_depth=bit_depth,
             )
-            audio_bytes = header + audio_bytes
+        finally:
+            handle.close()
 
-        return (
-            audio_bytes,
-            start,
-            start + len(audio_bytes),
-            filesize + HEADER_SIZE,
+    with pool.acquire((str(path), stream), opener) as handle:
+        return _read_clip_bytes(
+            handle,
+            functools.partial(pool.read, handle),
+            start=start,
+            speed=speed,
+            frames=frames,
+            time_expansion=time_expansion,
+            start_time=start_time,
+            end_time=end_time,
+            bit_depth=bit_depth,
         )
 
+
+def _read_clip_bytes(
+    handle: AudioHandle,
+    read: Callable[[int, int], np.ndarray],
+    start: int,
+    speed: float,
+    frames: int,
+    time_expansion: float,
+    start_time: float | None,
+    end_time: float | None,
+    bit_depth: int,
+) -> tuple[bytes, int, int, int]:
+    samplerate, start_frame, end_frame = _get_clip_frames(
+        handle.samplerate,
+        handle.frames,
+        time_expansion=time_expansion,
+        start_time=start_time,
+        end_time=end_time,
+    )
+    channels = handle.channels
+
+    # Calculate the total number of frames and the size of the audio
+    # data in bytes.
+    total_frames = end_frame - start_frame
+    bytes_per_frame = channels * bit_depth // 8
+    filesize = total_frames * bytes_per_frame
+
+    # Compute the offset, which is the frame at which to start reading
+    # the audio data.
+    offset = start_frame
+    if start != 0:
+        # When the start byte is not 0, calculate the offset in frames
+        # and add it to the start frame. Note that we need to
+        # remove the size of the header from the start byte to correctly
+        # calculate the offset in frames.
+        offset_frames = (start - HEADER_SIZE) // bytes_per_frame
+        offset += offset_frames
+
+    # Make sure that the number of frames to read is not greater than
+    # the number of frames requested.
+    frames = min(frames, end_frame - offset)
+
+    audio_data = read(offset, frames)
+
+    # Convert the audio data to raw bytes
+    audio_bytes = audio_to_bytes(
+        audio_data,
+        samplerate=samplerate,
+        bit_depth=bit_depth,
+    )
+
+    # Generate the WAV header if the start byte is 0 and
+    # append to the start of the audio data.
+    if start == 0:
+        header = generate_wav_header(
+            samplerate=int(samplerate * speed),
+            channels=channels,
+            data_size=filesize,
+            bit_depth=bit_depth,
+        )
+        audio_bytes = header + audio_bytes
+
+    return (
+        audio_bytes,
+        start,
+        start + len(audio_bytes),
+        filesize + HEADER_SIZE,
+    )
+
+
+def _get_clip_frames(
+    samplerate: int,
+    frames: int,
+    time_expansion: float,
+    start_time: float | None,
+    end_time: float | None,
+) -> tuple[int, int, int]:
+    """Return the expanded sample rate and the frame range of a clip."""
+    samplerate = int(samplerate * time_expansion)
+
+    # Calculate start and end frames based on start and end times
+    # to ensure that the requested piece of audio is loaded.
+    if start_time is None:
+        start_time = 0
+    start_frame = int(start_time * samplerate)
+
+    end_frame = frames
+    if end_time is not None:
+        end_frame = int(end_time * samplerate)
+
+    return samplerate, start_frame, end_frame
+
+
+def load_encoded_clip_bytes(
+    path: Path | str,
+    start: int,
+    codec: str,
+    speed: float = 1,
+    size: int = CHUNK_SIZE,
+    time_expansion: float = 1,
+    start_time: float | None = None,
+    end_time: float | None = None,
+    use_s3: bool = get_settings().use_s3,
+    recording_hash: str | None = None,
+) -> tuple[bytes, int, int, int]:
+    """Load a range of bytes of a clip encoded with a codec.
+
+    Unlike `load_clip_bytes`, byte offsets of compressed audio can not
+    be mapped to frames. The whole clip is encoded instead, and served in
+    ranges. The clip is read and encoded in blocks, so memory usage does
+    not depend on its length. The encoded clip is stored in the audio
+    cache, or in the temporary cache of encoded clips if the audio cache
+    is disabled, so the clip is only encoded once for all range requests.
+
+    Parameters
+    ----------
+    path
+        The path to the audio file or S3 URL.
+    start
+        Start byte.
+    codec
+        Name of the codec, see `whombat.core.audio_encoding.CODECS`.
+    speed
+        The factor by which to speed up or slow down the audio.
+    size
+        Maximum number of bytes to return.
+    time_expansion
+        Time expansion factor of the audio.
+    start_time
+        The time in seconds at which to start reading the audio.
+    end_time
+        The time in seconds at which to stop reading the audio.
+    use_s3
+        If True, fetch the audio file from S3.
+    recording_hash
+        The hash of the recording, used to serve S3 files from the local
+        audio cache and to cache the encoded clip.
+
+    Returns
+    -------
+    bytes
+        Encoded audio data in bytes
+    start
+        Start byte
+    end
+        End byte
+    filesize
+        Total size of the encoded clip in bytes.
+    """
+
+    def encode(dst: Path) -> None:
+        with open_sound_file(
+            path,
+            use_s3=use_s3,
+            recording_hash=recording_hash,
+        ) as sound_file:
+            samplerate, start_frame, end_frame = _get_clip_frames(
+                sound_file.samplerate,
+                sound_file.frames,
+                time_expansion=time_expansion,
+                start_time=start_time,
+                end_time=end_time,
+            )
+            samplerate = int(samplerate * speed)
+            target = get_encoding_samplerate(codec, samplerate)
+
+            def read(start: int, size: int) -> np.ndarray:
+                sound_file.seek(start_frame + start)
+                return sound_file.read(size, fill_value=0, always_2d=True)
+
+            encode_audio_blocks(
+                iter_processed_blocks(
+                    read,
+                    max(end_frame - start_frame, 0),
+                    samplerate,
+                    target_samplerate=target,
+                ),
+                dst,
+                samplerate=target,
+                channels=sound_file.channels,
+                codec=codec,
+            )
+
+    cache = get_audio_cache()
+    if cache is None:
+        cache = get_encoded_audio_cache()
+
+    key = hashlib.sha256(
+        json.dumps(
+            [
+                recording_hash or str(path),
+                codec,
+                speed,
+                time_expansion,
+                start_time,
+                end_time,
+            ]
+        ).encode()
+    ).hexdigest()
+
+    def write(dst: Path) -> Path:
+        encode(dst)
+        return dst
+
+    encoded = cache.get_or_fetch(key, write)
+    filesize = encoded.stat().st_size
+    with open(encoded, "rb") as fp:
+        fp.seek(start)
+        content = fp.read(size)
+
+    return content, start, start + len(content), filesize
+
+
 def generate_wav_header(
     samplerate: int,
     channels: int,
@@ -12,6 +12,7 @@ from whombat.api.common.utils import (
     get_count,
     get_object,
     get_objects,
+    get_objects_by_keys_batched,
     get_objects_from_query,
     get_or_create_object,
     insert_batched,
@@ -35,6 +36,7 @@ __all__ = [
     "get_count",
     "get_object",
     "get_objects",
+    "get_objects_by_keys_batched",
     "get_objects_from_query",
     "get_or_create_object",
     "insert_batched",
@@ -1,34 +1,44 @@
 """API functions for interacting with datasets."""
 
 import datetime
+import itertools
+import logging
 import uuid
 import warnings
 from pathlib import Path
+from collections.abc import AsyncIterator, Callable
 from typing import Sequence
-import boto3 
-from botocore.exceptions import NoCredentialsError, PartialCredentialsError 
 from whombat.utils.aws_s3_client import S3Client
 
 from fastapi import HTTPException
 import pandas as pd
 from soundevent import data
-from sqlalchemy import select, tuple_
+from sqlalchemy import delete, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from whombat import exceptions, models, schemas
 from whombat.api import common
 from whombat.api.common import BaseAPI
-from whombat.api.recordings import recordings
+from whombat.api.recordings import IngestionProgress, recordings
 from whombat.core import files
+from whombat.core.manifest import (
+    FileStat,
+    ManifestDiff,
+    diff_manifest,
+    diff_manifest_stream,
+)
 from whombat.filters.base import Filter
 from whombat.filters.recordings import DatasetFilter
 from whombat.system import get_settings
+from whombat.system.executors import run_in_thread
 
 __all__ = [
     "DatasetAPI",
     "datasets",
 ]
 
+logger = logging.getLogger(__name__)
+
 s3_client = S3Client()
 
 use_s3 = get_settings().use_s3
@@ -466,6 +476,10 @@ class DatasetAPI(
         - ``unregistered``: A file is not registered in the database but is
             present in the dataset directory.
 
+        - ``modified``: A file is registered in the database and is present,
+            but its size or modification time differs from the dataset
+            manifest, so it has changed since the dataset was last synced.
+
         Parameters
         ----------
         session : AsyncSession
@@ -482,25 +496,15 @@ class DatasetAPI(
             List of DatasetFile objects with their state.
         """
 
-        dataset_dir = str(obj.audio_dir) 
-
-        if use_s3:
-            try:
-                # Fetch files from S3
-                file_keys = s3_client.list_files(bucket_name=bucket_name, prefix=dataset_dir)
-                file_list = [Path(f"s3:/{bucket_name}/{key}") for key in file_keys if key.startswith(dataset_dir)]
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Error accessing S3 bucket : {str(e)}")
-        else:
-            # Use local file system logic
-            if audio_dir is None:
-                audio_dir = get_settings().audio_dir
+        if audio_dir is None:
+            audio_dir = get_settings().audio_dir
 
-            # Get the files in the dataset directory
-            file_list = files.get_audio_files_in_folder(
-                audio_dir / obj.audio_dir,
-                relative=True,
-            )
+        listing = [stat async for stat in self._iter_files(obj, audio_dir)]
+        diff = diff_manifest(
+            await self._get_manifest(session, obj),
+            listing,
+        )
+        changed = {stat.path for stat in diff.changed}
 
         # NOTE: Better to use this query than reusing the get_recordings
         # function because we don't need to retrieve all information about the
@@ -509,60 +513,286 @@ class DatasetAPI(
             models.DatasetRecording.dataset_id == obj.id
         )
         result = await session.execute(query)
-
-        # Fetch the database file paths
-        db_files = result.scalars().all()
-
-        # If use_s3, ensure the prefix is added to paths that don't already have it
-        if use_s3:
-            # Prefix to prepend if missing
-            bucket_prefix = f"s3://{bucket_name}/{dataset_dir}/"
-            
-            formatted_files = []
-            for path in db_files:
-                path = str(path).replace("\\", "/")  
-                path = path.replace("s3:/", "s3://") 
-
-                # If the path already has the correct prefix, use as is; otherwise, prepend bucket_prefix
-                if path.startswith(bucket_prefix):
-                    formatted_files.append(Path(path))
-                else:
-                    formatted_files.append(Path(f"{bucket_prefix}{Path(path).name}"))
-
-            db_files = formatted_files
-        else:
-            # For local paths, just convert them to Path objects
-            db_files = [Path(path) for path in db_files]
-
-        existing_files = set(file_list) & set(db_files)
-        missing_files = set(db_files) - set(file_list)
-        unregistered_files = set(file_list) - set(db_files)
+        registered = {
+            Path(path).as_posix() for path in result.scalars().all()
+        }
 
         ret = []
-        for path in existing_files:
+        for stat in listing:
+            path = self._get_registered_path(stat.path)
+            if path not in registered:
+                state = schemas.FileState.UNREGISTERED
+            elif stat.path in changed:
+                state = schemas.FileState.MODIFIED
+            else:
+                state = schemas.FileState.REGISTERED
+
+            registered.discard(path)
             ret.append(
                 schemas.DatasetFile(
-                    path=path,
-                    state=schemas.FileState.REGISTERED,
+                    path=self._get_state_path(obj, stat.path),
+                    state=state,
                 )
             )
 
-        for path in missing_files:
+        for path in registered:
             ret.append(
                 schemas.DatasetFile(
-                    path=path,
+                    path=self._get_state_path(obj, path),
                     state=schemas.FileState.MISSING,
                 )
             )
+        return ret
 
-        for path in unregistered_files:
-            ret.append(
-                schemas.DatasetFile(
-                    path=path,
-                    state=schemas.FileState.UNREGISTERED,
+    async def sync(
+        self,
+        session: AsyncSession,
+        obj: schemas.Dataset,
+        audio_dir: Path | None = None,
+        progress: Callable[[IngestionProgress], None] | None = None,
+    ) -> schemas.DatasetSync:
+        """Bring a dataset up to date with the files in its directory.
+
+        The dataset directory is listed and compared to the manifest of the
+        files seen in the last scan. Only files that are new or have a
+        different size, modification time or ETag are read:
+
+        - New files are registered as recordings and added to the dataset.
+        - Changed files have the hash and media information of their
+          recordings updated.
+        - Removed files are reported, but their recordings are kept, as
+          they may have annotations.
+
+        The manifest is then updated to the current listing. Files that
+        could not be read are left out of it, so the next sync tries them
+        again.
+
+        Parameters
+        ----------
+        session
+            The database session to use. It is committed as recordings are
+            registered.
+        obj
+            The dataset to synchronise.
+        audio_dir
+            The root audio directory, by default None. If None, the root audio
+            directory from the settings will be used.
+        progress
+            Function called with the progress of the registration of the
+            new files after every batch.
+
+        Returns
+        -------
+        schemas.DatasetSync
+            A summary of the changes found.
+        """
+        if audio_dir is None:
+            audio_dir = get_settings().audio_dir
+
+        diff = await diff_manifest_stream(
+            await self._get_manifest(session, obj),
+            self._iter_files(obj, audio_dir),
+        )
+        logger.info(
+            "Syncing dataset %s: %d new, %d changed, %d removed, "
+            "%d unchanged files",
+            obj.name,
+            len(diff.added),
+            len(diff.changed),
+            len(diff.removed),
+            diff.unchanged,
+        )
+
+        refresh = IngestionProgress()
+
+        def track_refresh(state: IngestionProgress) -> None:
+            nonlocal refresh
+            refresh = state
+
+        updated = await recordings.refresh_many(
+            session,
+            [
+                self._get_file_path(obj, stat.path, audio_dir)
+                for stat in diff.changed
+            ],
+            audio_dir=audio_dir,
+            progress=track_refresh,
+        )
+
+        ingestion = IngestionProgress()
+
+        def track(state: IngestionProgress) -> None:
+            nonlocal ingestion
+            ingestion = state
+            if progress is not None:
+                progress(state)
+
+        added = 0
+        async for recording_list in recordings.create_many_batched(
+            session,
+            [
+                dict(path=self._get_file_path(obj, stat.path, audio_dir))
+                for stat in diff.added
+            ],
+            audio_dir=audio_dir,
+            progress=track,
+        ):
+            dataset_recordings = await self.add_recordings(
+                session, obj, recording_list
+            )
+            added += len(dataset_recordings)
+
+        await self._update_manifest(
+            session,
+            obj,
+            diff,
+            failed={
+                *refresh.failed_paths,
+                *ingestion.failed_paths,
+            },
+            audio_dir=audio_dir,
+        )
+        await session.commit()
+
+        obj = obj.model_copy(
+            update=dict(recording_count=obj.recording_count + added)
+        )
+        self._update_cache(obj)
+
+        return schemas.DatasetSync(
+            new_files=len(diff.added),
+            changed_files=len(diff.changed),
+            unchanged_files=diff.unchanged,
+            removed_files=[
+                self._get_state_path(obj, path) for path in diff.removed
+            ],
+            added_recordings=added,
+            updated_recordings=len(updated),
+            failed_files=ingestion.failed,
+        )
+
+    async def _iter_files(
+        self,
+        obj: schemas.Dataset,
+        audio_dir: str | Path,
+    ) -> AsyncIterator[FileStat]:
+        """List the audio files of a dataset without reading them."""
+        if not use_s3:
+            listing = await run_in_thread(
+                lambda: list(
+                    files.scan_audio_files(Path(audio_dir) / obj.audio_dir)
                 )
             )
-        return ret
+            for stat in listing:
+                yield stat
+            return
+
+        prefix = _get_s3_prefix(obj)
+        async for item in s3_client.iter_objects(
+            bucket_name=bucket_name,
+            prefix=prefix,
+        ):
+            if not item["Key"].endswith(".wav"):
+                continue
+
+            yield FileStat(
+                path=item["Key"][len(prefix) :],
+                size=item["Size"],
+                mtime=item["LastModified"].timestamp(),
+                etag=item["ETag"].strip('"'),
+            )
+
+    def _get_file_path(
+        self,
+        obj: schemas.Dataset,
+        path: str,
+        audio_dir: str | Path,
+    ) -> str | Path:
+        """Get the path of a listed file as given to create recordings."""
+        if use_s3:
+            return f"s3://{bucket_name}/{_get_s3_prefix(obj)}{path}"
+        return Path(audio_dir) / obj.audio_dir / path
+
+    def _get_registered_path(self, path: str) -> str:
+        """Get the path a listed file is added to the dataset under."""
+        if use_s3:
+            # NOTE: Recordings of S3 datasets are added under their file
+            # name.
+            return path.split("/")[-1]
+        return path
+
+    def _get_state_path(self, obj: schemas.Dataset, path: str) -> Path:
+        """Get the path under which a file is reported to the user."""
+        if use_s3:
+            return Path(f"s3://{bucket_name}/{_get_s3_prefix(obj)}{path}")
+        return Path(path)
+
+    async def _get_manifest(
+        self,
+        session: AsyncSession,
+        obj: schemas.Dataset,
+    ) -> dict[str, FileStat]:
+        """Get the files of the dataset as seen in the last scan."""
+        query = select(
+            models.DatasetManifestEntry.path,
+            models.DatasetManifestEntry.size,
+            models.DatasetManifestEntry.mtime,
+            models.DatasetManifestEntry.etag,
+        ).where(models.DatasetManifestEntry.dataset_id == obj.id)
+        result = await session.execute(query)
+        return {
+            path: FileStat(path=path, size=size, mtime=mtime, etag=etag)
+            for path, size, mtime, etag in result.all()
+        }
+
+    async def _update_manifest(
+        self,
+        session: AsyncSession,
+        obj: schemas.Dataset,
+        diff: ManifestDiff,
+        failed: set[str],
+        audio_dir: str | Path,
+    ) -> None:
+        """Store the changes found in a scan in the dataset manifest.
+
+        Files in `failed`, given as the paths passed to create or refresh
+        their recordings, could not be read. New files among them are not
+        stored, and changed files keep their previous entry, so that they
+        are found again by the next scan.
+        """
+
+        def succeeded(stat: FileStat) -> bool:
+            path = self._get_file_path(obj, stat.path, audio_dir)
+            return str(path) not in failed
+
+        added = [stat for stat in diff.added if succeeded(stat)]
+        changed = [stat for stat in diff.changed if succeeded(stat)]
+
+        stale = [*(stat.path for stat in changed), *diff.removed]
+        for batch in itertools.batched(stale, 500):
+            await session.execute(
+                delete(models.DatasetManifestEntry).where(
+                    models.DatasetManifestEntry.dataset_id == obj.id,
+                    models.DatasetManifestEntry.path.in_(batch),
+                )
+            )
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        await common.insert_batched(
+            session,
+            models.DatasetManifestEntry,
+            [
+                dict(
+                    dataset_id=obj.id,
+                    path=stat.path,
+                    size=stat.size,
+                    mtime=stat.mtime,
+                    etag=stat.etag,
+                    created_on=now,
+                )
+                for stat in [*added, *changed]
+            ],
+        )
 
     async def from_soundevent(
         self,
@@ -662,6 +892,7 @@ class DatasetAPI(
         dataset_dir: str | Path,
         description: str | None = None,
         audio_dir: Path | None = None,
+        progress: Callable[[IngestionProgress], None] | None = None,
         **kwargs,
     ) -> schemas.Dataset:
         """Create a dataset.
@@ -683,6 +914,9 @@ class DatasetAPI(
         audio_dir
             The root audio directory, by default None. If None, the root audio
             directory from the settings will be used.
+        progress
+            Function called with the progress of the registration of the
+            recordings after every batch.
         **kwargs
             Additional keyword arguments to pass to the creation function.
 
@@ -710,10 +944,15 @@ class DatasetAPI(
             if not dataset_dir.endswith("/"):
                 dataset_dir = f"{dataset_dir}/"
 
-            # Fetch files from S3
+            # Check that there are files under the S3 prefix
             try:
-                file_keys = s3_client.list_files(bucket_name=bucket_name, prefix=dataset_dir)
-                if not file_keys:
+                objects = s3_client.iter_objects(
+                    bucket_name=bucket_name,
+                    prefix=dataset_dir,
+                )
+                first = await anext(objects, None)
+                await objects.aclose()
+                if first is None:
                     raise HTTPException(
                         status_code=404,
                         detail=f"No files found in S3 bucket with prefix '{dataset_dir}'"
@@ -738,19 +977,6 @@ class DatasetAPI(
                 **kwargs,
             )
 
-            # Filter out non-audio files (e.g., .DS_Store)
-            valid_audio_files = [key for key in file_keys if key.endswith('.wav')]
-            
-            # Create recording entries from S3 file keys
-            try:
-                recording_list = await recordings.create_many(
-                    session,
-                    [dict(path=f"s3://{bucket_name}/{key}") for key in valid_audio_files],
-                    audio_dir=dataset_dir,
-                )
-            except Exception as e: 
-                print(f"Error in creating recording : {e}")    
-    
         else:
             if audio_dir is None:
                 audio_dir = get_settings().audio_dir
@@ -778,30 +1004,24 @@ class DatasetAPI(
                 ),
                 **kwargs,
             )
-            
-            file_list = files.get_audio_files_in_folder(
-                dataset_dir,
-                relative=False,
-            )
 
-            # Create recording entries from local file paths
-            recording_list = await recordings.create_many(
-                session,
-                [dict(path=file) for file in file_list],
-                audio_dir=audio_dir,
-            )
-            
-            if not recording_list:
-                raise RuntimeError("No recordings were created.")
-
-        # Associate recordings with the dataset
-        dataset_recordings = await self.add_recordings(
-            session, obj, recording_list
+        # Register the recordings and record the files in the dataset
+        # manifest, so later syncs only read new or changed files.
+        result = await self.sync(
+            session,
+            obj,
+            audio_dir=audio_dir,
+            progress=progress,
         )
 
+        if not use_s3 and not result.added_recordings:
+            await self.delete(session, obj)
+            await session.commit()
+            raise RuntimeError("No recordings were created.")
+
         # Update dataset metadata
         obj = obj.model_copy(
-            update=dict(recording_count=len(dataset_recordings))
+            update=dict(recording_count=result.added_recordings)
         )
         self._update_cache(obj)
         
@@ -878,4 +1098,12 @@ class DatasetAPI(
         )
 
 
+def _get_s3_prefix(obj: schemas.Dataset) -> str:
+    """Get the S3 prefix of the files of a dataset."""
+    prefix = Path(obj.audio_dir).as_posix().strip("/")
+    if prefix in ("", "."):
+        return ""
+    return f"{prefix}/"
+
+
 datasets = DatasetAPI()
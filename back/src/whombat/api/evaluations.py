@@ -25,6 +25,7 @@ from whombat.api.model_runs import model_runs
 from whombat.filters.base import Filter
 from whombat.filters.clip_evaluations import EvaluationFilter
 from whombat.schemas.evaluation_sets import PredictionTypes
+from whombat.system.executors import run_in_process
 
 
 class EvaluationAPI(
@@ -317,7 +318,10 @@ class EvaluationAPI(
             session,
             evaluation_set,
         )
-        evaluation = evaluate_predictions(
+        # NOTE: Matching predictions to annotations is CPU-bound, so it is
+        # done in the CPU executor to keep the server responsive.
+        evaluation = await run_in_process(
+            evaluate_predictions,
             model_run_se.clip_predictions,
             evaluation_set_se.clip_annotations,
             evaluation_set_se.evaluation_tags,
@@ -0,0 +1,869 @@
+"""API functions to run long operations as background jobs.
+
+Registering a large dataset, importing an AOEF file or evaluating a model
+run can take longer than proxies allow an HTTP request to last. Routes
+enqueue these operations as jobs instead, and return the job so that
+clients can poll its status and progress.
+
+Jobs are stored in the database. The job runner started with the
+application runs them with a fixed number of workers, so long operations
+wait in the queue instead of competing with interactive requests. While a
+job runs, its progress is saved periodically, and the job is stopped if
+it was cancelled, even if the cancellation was requested from another
+process. Saving the progress also records a heartbeat, so that a process
+starting up only fails the running jobs whose runner has stopped.
+
+Each kind of job has a handler, registered with `job_handler`. Handlers
+receive a database session, a `JobContext` to report progress, and the
+parameters the job was enqueued with.
+"""
+
+import asyncio
+import datetime
+import json
+import logging
+import os
+import shutil
+import socket
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from whombat import exceptions, models, schemas
+from whombat.api.common import BaseAPI
+from whombat.api.datasets import datasets
+from whombat.api.evaluation_sets import evaluation_sets
+from whombat.api.evaluations import evaluations
+from whombat.api.io import aoef
+from whombat.api.model_runs import model_runs
+from whombat.api.recordings import IngestionProgress
+from whombat.system import get_settings
+from whombat.system.data import get_app_data_dir
+from whombat.system.database import get_async_db_engine, get_async_session
+from whombat.system.executors import run_in_thread
+from whombat.system.settings import Settings
+
+__all__ = [
+    "JobAPI",
+    "JobContext",
+    "JobResult",
+    "JobRunner",
+    "get_job_runner",
+    "job_handler",
+    "jobs",
+    "save_job_file",
+]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobResult:
+    """Reference to the object created by a job."""
+
+    type: str
+    """The type of the object, e.g. `dataset`."""
+
+    uuid: UUID
+    """The UUID of the object."""
+
+
+class JobContext:
+    """Handle given to a running job to report its progress.
+
+    Reporting progress is cheap: it is only kept in memory, and the runner
+    saves the latest value to the database periodically.
+    """
+
+    def __init__(self, job: schemas.Job):
+        self.job = job
+        self.progress = job.progress
+        self.message = job.message
+
+    def report(self, progress: float, message: str | None = None) -> None:
+        """Report the percentage of the work done, from 0 to 100."""
+        self.progress = min(max(progress, 0), 100)
+        if message is not None:
+            self.message = message
+
+
+JobHandler = Callable[..., Awaitable[JobResult | None]]
+
+_HANDLERS: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register the function that runs a kind of job.
+
+    The function is called with a database session, a `JobContext` and the
+    parameters of the job as keyword arguments. It can return a
+    `JobResult` pointing to the object it created.
+    """
+
+    def decorator(func: JobHandler) -> JobHandler:
+        _HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+class JobAPI(
+    BaseAPI[
+        UUID,
+        models.Job,
+        schemas.Job,
+        schemas.JobCreate,
+        schemas.JobUpdate,
+    ]
+):
+    _model = models.Job
+    _schema = schemas.Job
+
+    async def get(self, session: AsyncSession, pk: UUID) -> schemas.Job:
+        """Get a job by UUID.
+
+        Jobs are updated by the workers in their own sessions, so the job
+        is always reloaded from the database.
+
+        Raises
+        ------
+        NotFoundError
+            If the job could not be found.
+        """
+        obj = await session.scalar(
+            select(models.Job)
+            .where(models.Job.uuid == pk)
+            .execution_options(populate_existing=True)
+        )
+        if obj is None:
+            raise exceptions.NotFoundError(f"Job {pk} was not found")
+
+        return schemas.Job.model_validate(obj)
+
+    async def enqueue(
+        self,
+        session: AsyncSession,
+        kind: str,
+        **parameters: Any,
+    ) -> schemas.Job:
+        """Enqueue a job.
+
+        The session is committed so that the job can be picked up by a
+        worker straight away.
+
+        Parameters
+        ----------
+        session
+            The database session to use.
+        kind
+            The kind of job to run.
+        **parameters
+            The arguments of the job. Must be JSON serializable.
+
+        Returns
+        -------
+        schemas.Job
+            The queued job.
+
+        Raises
+        ------
+        ValueError
+            If there is no handler for this kind of job.
+        """
+        if kind not in _HANDLERS:
+            raise ValueError(f"Unknown kind of job: {kind}")
+
+        job = await self.create_from_data(
+            session,
+            schemas.JobCreate(kind=kind, parameters=parameters),
+        )
+        await session.commit()
+        get_job_runner().notify()
+        return job
+
+    async def cancel(
+        self,
+        session: AsyncSession,
+        obj: schemas.Job,
+    ) -> schemas.Job:
+        """Cancel a job.
+
+        Queued jobs are cancelled straight away. Running jobs are stopped
+        by their worker. Jobs that already finished are left as they are.
+
+        Parameters
+        ----------
+        session
+            The database session to use. It is committed.
+        obj
+            The job to cancel.
+
+        Returns
+        -------
+        schemas.Job
+            The updated job.
+        """
+        result = await session.execute(
+            update(models.Job)
+            .where(
+                models.Job.id == obj.id,
+                models.Job.status == schemas.JobStatus.QUEUED.value,
+            )
+            .values(
+                status=schemas.JobStatus.CANCELLED.value,
+                cancel_requested=True,
+                finished_on=_now(),
+            )
+        )
+        if not result.rowcount:  # type: ignore
+            await session.execute(
+                update(models.Job)
+                .where(
+                    models.Job.id == obj.id,
+                    models.Job.status == schemas.JobStatus.RUNNING.value,
+                )
+                .values(cancel_requested=True)
+            )
+
+        await session.commit()
+        get_job_runner().cancel(obj.uuid)
+        return await self.get(session, obj.uuid)
+
+    async def claim(
+        self,
+        session: AsyncSession,
+        owner: str | None = None,
+    ) -> schemas.Job | None:
+        """Mark the oldest queued job as running and return it.
+
+        A job is only claimed by one worker, even if several processes
+        run workers on the same database.
+
+        Parameters
+        ----------
+        session
+            The database session to use. It is committed.
+        owner
+            Identifier of the job runner claiming the job.
+
+        Returns
+        -------
+        schemas.Job | None
+            The claimed job, or None if there are no queued jobs.
+        """
+        while True:
+            job_id = await session.scalar(
+                select(models.Job.id)
+                .where(models.Job.status == schemas.JobStatus.QUEUED.value)
+                .order_by(models.Job.id)
+                .limit(1)
+            )
+            if job_id is None:
+                return None
+
+            result = await session.execute(
+                update(models.Job)
+                .where(
+                    models.Job.id == job_id,
+                    models.Job.status == schemas.JobStatus.QUEUED.value,
+                )
+                .values(
+                    status=schemas.JobStatus.RUNNING.value,
+                    owner=owner,
+                    started_on=_now(),
+                    heartbeat_on=_now(),
+                )
+            )
+            await session.commit()
+
+            # NOTE: Another worker may have claimed the job in between.
+            if result.rowcount:  # type: ignore
+                job = await session.get_one(models.Job, job_id)
+                await session.refresh(job)
+                return schemas.Job.model_validate(job)
+
+    async def save_progress(
+        self,
+        session: AsyncSession,
+        obj: schemas.Job,
+        progress: float,
+        message: str | None,
+    ) -> bool:
+        """Save the progress of a running job and record a heartbeat.
+
+        Returns
+        -------
+        bool
+            Whether the job should stop, because it was cancelled or it is
+            no longer running for the runner that claimed it.
+        """
+        result = await session.execute(
+            update(models.Job)
+            .where(_claimed_by(obj))
+            .values(progress=progress, message=message, heartbeat_on=_now())
+        )
+        await session.commit()
+        if not result.rowcount:  # type: ignore
+            # NOTE: Another process took the job for interrupted.
+            return True
+
+        cancel_requested = await session.scalar(
+            select(models.Job.cancel_requested).where(
+                models.Job.id == obj.id
+            )
+        )
+        return bool(cancel_requested)
+
+    async def finish(
+        self,
+        session: AsyncSession,
+        obj: schemas.Job,
+        status: schemas.JobStatus,
+        result: JobResult | None = None,
+        error: str | None = None,
+        progress: float | None = None,
+        message: str | None = None,
+    ) -> None:
+        """Record the outcome of a job.
+
+        Nothing is recorded if the job is no longer running for the runner
+        that claimed it.
+        """
+        values: dict[str, Any] = dict(
+            status=status.value,
+            error=error,
+            finished_on=_now(),
+        )
+        if result is not None:
+            values.update(result_type=result.type, result_uuid=result.uuid)
+
+        if progress is not None:
+            values.update(progress=progress)
+
+        if message is not None:
+            values.update(message=message)
+
+        await session.execute(
+            update(models.Job).where(_claimed_by(obj)).values(**values)
+        )
+        await session.commit()
+
+    async def fail_interrupted(
+        self,
+        session: AsyncSession,
+        timeout: float,
+    ) -> int:
+        """Mark jobs left running by a stopped process as failed.
+
+        Jobs whose runner is alive keep saving their progress, so only the
+        running jobs without a heartbeat in the given time are failed.
+
+        Parameters
+        ----------
+        session
+            The database session to use. It is committed.
+        timeout
+            Seconds since the last heartbeat after which a running job is
+            considered interrupted.
+
+        Returns
+        -------
+        int
+            The number of jobs marked as failed.
+        """
+        expired = _now() - datetime.timedelta(seconds=timeout)
+        result = await session.execute(
+            update(models.Job)
+            .where(
+                models.Job.status == schemas.JobStatus.RUNNING.value,
+                or_(
+                    models.Job.heartbeat_on.is_(None),
+                    models.Job.heartbeat_on < expired,
+                ),
+            )
+            .values(
+                status=schemas.JobStatus.FAILED.value,
+                error="The job was interrupted.",
+                finished_on=_now(),
+            )
+        )
+        await session.commit()
+        return result.rowcount  # type: ignore
+
+    def _update_cache(self, obj: schemas.Job) -> None:
+        # NOTE: Jobs are updated by the workers, possibly in other
+        # processes, so they are always read from the database.
+        return
+
+
+class JobRunner:
+    """Run queued jobs with a fixed number of workers.
+
+    Parameters
+    ----------
+    workers
+        Maximum number of jobs that run at the same time.
+    poll_interval
+        Seconds between checks for jobs enqueued by other processes. Jobs
+        enqueued in this process are picked up straight away.
+    progress_interval
+        Seconds between saves of the progress of running jobs.
+    heartbeat_timeout
+        Seconds without a saved progress after which a running job is
+        marked as failed when a runner starts.
+    engine
+        The database engine to use. By default, the engine of the settings
+        given to `start`.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        poll_interval: float = 5,
+        progress_interval: float = 1,
+        heartbeat_timeout: float = 60,
+        engine: AsyncEngine | None = None,
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.progress_interval = progress_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex}"
+        self._engine = engine
+        self._tasks: list[asyncio.Task] = []
+        self._running: dict[UUID, asyncio.Task] = {}
+        self._cancelled: set[UUID] = set()
+        self._wakeup: asyncio.Event | None = None
+
+    @property
+    def started(self) -> bool:
+        """Whether the workers are running."""
+        return bool(self._tasks)
+
+    def running(self) -> list[UUID]:
+        """Return the UUIDs of the jobs running in this process."""
+        return list(self._running)
+
+    async def start(self, settings: Settings) -> None:
+        """Start the workers.
+
+        Jobs that were left running by a process that stopped, i.e. with
+        no heartbeat in `heartbeat_timeout` seconds, are marked as failed
+        first.
+        """
+        if self.started:
+            return
+
+        self._engine = get_async_db_engine(settings)
+        async with get_async_session(self._engine) as session:
+            interrupted = await jobs.fail_interrupted(
+                session,
+                self.heartbeat_timeout,
+            )
+
+        if interrupted:
+            logger.warning("Marked %d interrupted jobs as failed", interrupted)
+
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"job-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the workers.
+
+        Running jobs are stopped and marked as failed.
+        """
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self) -> None:
+        """Wake up an idle worker to check for queued jobs."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def cancel(self, job_uuid: UUID) -> bool:
+        """Stop a job if it is running in this process.
+
+        Returns
+        -------
+        bool
+            Whether the job was running in this process.
+        """
+        task = self._running.get(job_uuid)
+        if task is None:
+            return False
+
+        self._cancelled.add(job_uuid)
+        task.cancel()
+        return True
+
+    async def run_pending(self) -> int:
+        """Run queued jobs until there are none left.
+
+        Returns
+        -------
+        int
+            The number of jobs that were run.
+        """
+        count = 0
+        while True:
+            async with get_async_session(self._get_engine()) as session:
+                job = await jobs.claim(session, owner=self.owner)
+
+            if job is None:
+                return count
+
+            await self._run(job)
+            count += 1
+
+    async def _work(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                await self.run_pending()
+            except Exception:
+                logger.exception("Could not run the queued jobs")
+
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    timeout=self.poll_interval,
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            self._wakeup.clear()
+
+    async def _run(self, job: schemas.Job) -> None:
+        context = JobContext(job)
+        task = asyncio.create_task(self._execute(job, context))
+        self._running[job.uuid] = task
+        try:
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.progress_interval)
+                if task.done():
+                    break
+
+                try:
+                    cancel = await self._save_progress(job, context)
+                except Exception as error:
+                    # NOTE: The database may be busy, e.g. SQLite while the
+                    # job writes a batch. Try again at the next interval.
+                    logger.warning(
+                        "Could not save the progress of job %s: %s",
+                        job.uuid,
+                        error,
+                    )
+                    continue
+
+                if cancel:
+                    self.cancel(job.uuid)
+        except asyncio.CancelledError:
+            # NOTE: The worker was stopped. Wait for the job to record
+            # that it was interrupted.
+            task.cancel()
+            await asyncio.wait({task})
+            raise
+        finally:
+            self._running.pop(job.uuid, None)
+            self._cancelled.discard(job.uuid)
+
+    async def _save_progress(
+        self,
+        job: schemas.Job,
+        context: JobContext,
+    ) -> bool:
+        async with get_async_session(self._get_engine()) as session:
+            return await jobs.save_progress(
+                session,
+                job,
+                context.progress,
+                context.message,
+            )
+
+    async def _execute(self, job: schemas.Job, context: JobContext) -> None:
+        logger.info("Running job %s (%s)", job.uuid, job.kind)
+        engine = self._get_engine()
+        try:
+            handler = _HANDLERS.get(job.kind)
+            if handler is None:
+                raise ValueError(f"Unknown kind of job: {job.kind}")
+
+            async with get_async_session(engine) as session:
+                result = await handler(session, context, **job.parameters)
+        except asyncio.CancelledError:
+            if job.uuid in self._cancelled:
+                status = schemas.JobStatus.CANCELLED
+                error = None
+            else:
+                status = schemas.JobStatus.FAILED
+                error = "The job was interrupted."
+
+            logger.info("Job %s stopped: %s", job.uuid, status.value)
+            async with get_async_session(engine) as session:
+                await jobs.finish(session, job, status, error=error)
+        except Exception as error:
+            logger.exception("Job %s failed", job.uuid)
+            async with get_async_session(engine) as session:
+                await jobs.finish(
+                    session,
+                    job,
+                    schemas.JobStatus.FAILED,
+                    error=str(error) or type(error).__name__,
+                )
+        else:
+            logger.info("Job %s succeeded", job.uuid)
+            async with get_async_session(engine) as session:
+                await jobs.finish(
+                    session,
+                    job,
+                    schemas.JobStatus.SUCCEEDED,
+                    result=result,
+                    progress=100,
+                    message=context.message,
+                )
+
+    def _get_engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = get_async_db_engine(get_settings())
+        return self._engine
+
+
+@lru_cache
+def get_job_runner() -> JobRunner:
+    """Get the runner of the background jobs of this process."""
+    settings = get_settings()
+    return JobRunner(
+        workers=settings.job_workers,
+        poll_interval=settings.job_poll_interval,
+        progress_interval=settings.job_progress_interval,
+        heartbeat_timeout=settings.job_heartbeat_timeout,
+    )
+
+
+def get_job_files_dir() -> Path:
+    """Get the directory where files uploaded for jobs are kept."""
+    directory = get_settings().job_files_dir
+    if directory is None:
+        directory = get_app_data_dir() / "jobs"
+
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+async def save_job_file(src: BinaryIO, suffix: str = ".json") -> Path:
+    """Copy an uploaded file to a place where a job can read it later.
+
+    Job handlers are responsible for removing the file when done.
+    """
+    path = get_job_files_dir() / f"{uuid4()}{suffix}"
+
+    def copy() -> None:
+        with open(path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+
+    await run_in_thread(copy)
+    return path
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _claimed_by(obj: schemas.Job):
+    return and_(
+        models.Job.id == obj.id,
+        models.Job.status == schemas.JobStatus.RUNNING.value,
+        models.Job.owner == obj.owner,
+    )
+
+
+def _report_ingestion(context: JobContext) -> Callable:
+    def report(state: IngestionProgress) -> None:
+        if state.total:
+            context.report(
+                100 * state.processed / state.total,
+                f"Registered {state.processed} of {state.total} files",
+            )
+
+    return report
+
+
+@job_handler("create_dataset")
+async def _create_dataset(
+    session: AsyncSession,
+    context: JobContext,
+    name: str,
+    dataset_dir: str,
+    description: str | None = None,
+    audio_dir: str | None = None,
+) -> JobResult:
+    context.report(0, "Listing files")
+    dataset = await datasets.create(
+        session,
+        name=name,
+        dataset_dir=(
+            dataset_dir if get_settings().use_s3 else Path(dataset_dir)
+        ),
+        description=description,
+        audio_dir=Path(audio_dir) if audio_dir is not None else None,
+        progress=_report_ingestion(context),
+    )
+    await session.commit()
+    return JobResult(type="dataset", uuid=dataset.uuid)
+
+
+@job_handler("sync_dataset")
+async def _sync_dataset(
+    session: AsyncSession,
+    context: JobContext,
+    dataset_uuid: str,
+    audio_dir: str,
+) -> JobResult:
+    dataset = await datasets.get(session, UUID(dataset_uuid))
+    context.report(0, "Listing files")
+    result = await datasets.sync(
+        session,
+        dataset,
+        audio_dir=Path(audio_dir),
+        progress=_report_ingestion(context),
+    )
+    context.report(
+        100,
+        f"Added {result.added_recordings} and updated "
+        f"{result.updated_recordings} recordings. "
+        f"{result.failed_files} files could not be read and "
+        f"{len(result.removed_files)} files are missing.",
+    )
+    return JobResult(type="dataset", uuid=dataset.uuid)
+
+
+@job_handler("import_dataset")
+async def _import_dataset(
+    session: AsyncSession,
+    context: JobContext,
+    path: str,
+    dataset_dir: str,
+    audio_dir: str,
+) -> JobResult:
+    try:
+        db_dataset = await aoef.import_dataset(
+            session,
+            Path(path),
+            dataset_dir=Path(dataset_dir),
+            audio_dir=Path(audio_dir),
+        )
+        await session.commit()
+        return JobResult(type="dataset", uuid=db_dataset.uuid)
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+@job_handler("import_annotation_project")
+async def _import_annotation_project(
+    session: AsyncSession,
+    context: JobContext,
+    path: str,
+    audio_dir: str,
+) -> JobResult:
+    try:
+        db_project = await aoef.import_annotation_project(
+            session,
+            Path(path),
+            audio_dir=Path(audio_dir),
+            base_audio_dir=Path(audio_dir),
+        )
+        await session.commit()
+        return JobResult(type="annotation_project", uuid=db_project.uuid)
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+@job_handler("import_evaluation_set")
+async def _import_evaluation_set(
+    session: AsyncSession,
+    context: JobContext,
+    path: str,
+    task: str,
+    audio_dir: str,
+) -> JobResult:
+    try:
+        obj = json.loads(await run_in_thread(Path(path).read_bytes))
+        db_evaluation_set = await aoef.import_evaluation_set(
+            session,
+            obj,
+            task=task,
+            audio_dir=Path(audio_dir),
+            base_audio_dir=Path(audio_dir),
+        )
+        await session.commit()
+        return JobResult(type="evaluation_set", uuid=db_evaluation_set.uuid)
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+@job_handler("import_model_run")
+async def _import_model_run(
+    session: AsyncSession,
+    context: JobContext,
+    path: str,
+    evaluation_set_uuid: str,
+    audio_dir: str,
+) -> JobResult:
+    try:
+        evaluation_set = await evaluation_sets.get(
+            session,
+            UUID(evaluation_set_uuid),
+        )
+        db_model_run = await aoef.import_model_run(
+            session,
+            Path(path),
+            audio_dir=Path(audio_dir),
+            base_audio_dir=Path(audio_dir),
+        )
+        await session.commit()
+        await session.refresh(db_model_run)
+        model_run = schemas.ModelRun.model_validate(db_model_run)
+        await evaluation_sets.add_model_run(session, evaluation_set, model_run)
+        await session.commit()
+        return JobResult(type="model_run", uuid=model_run.uuid)
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+@job_handler("evaluate_model_run")
+async def _evaluate_model_run(
+    session: AsyncSession,
+    context: JobContext,
+    model_run_uuid: str,
+    evaluation_set_uuid: str,
+    audio_dir: str,
+) -> JobResult:
+    model_run = await model_runs.get(session, UUID(model_run_uuid))
+    evaluation_set = await evaluation_sets.get(
+        session,
+        UUID(evaluation_set_uuid),
+    )
+    context.report(0, "Evaluating predictions")
+    evaluation = await evaluations.evaluate_model_run(
+        session,
+        model_run,
+        evaluation_set,
+        audio_dir=Path(audio_dir),
+    )
+    await session.commit()
+    return JobResult(type="evaluation", uuid=evaluation.uuid)
+
+
+jobs = JobAPI()
@@ -1,18 +1,20 @@
 """API functions for interacting with recordings."""
 
 import datetime
+import itertools
 import logging
-import boto3
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
 from functools import partial
-from multiprocessing import Pool
 from pathlib import Path
 from typing import Sequence
 from uuid import UUID
 
 import cachetools
 import soundfile as sf
+from botocore.exceptions import BotoCoreError, ClientError
 from soundevent import data
-from soundevent.audio import MediaInfo, compute_md5_checksum, get_media_info
+from soundevent.audio import MediaInfo, get_media_info
 from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -26,12 +28,14 @@ from whombat.api.users import users
 from whombat.core import files
 from whombat.core.common import remove_duplicates
 from whombat.system import get_settings
+from whombat.system.executors import get_cpu_executor, run_in_thread
 from whombat.schemas.recordings import RecordingCreate 
 from whombat.utils.aws_s3_client import S3Client
-from tempfile import TemporaryDirectory
+from whombat.utils.s3_files import get_s3_file_info
 from sqlalchemy.future import select
 
 __all__ = [
+    "IngestionProgress",
     "RecordingAPI",
     "recordings",
 ]
@@ -42,6 +46,30 @@ s3_client = S3Client()
 
 use_s3 = get_settings().use_s3
 
+
+@dataclass
+class IngestionProgress:
+    """Progress of the registration of a set of recording files."""
+
+    total: int = 0
+    """Number of files to register."""
+
+    processed: int = 0
+    """Files handled so far, whatever the outcome."""
+
+    created: int = 0
+    """Files registered as new recordings."""
+
+    existing: int = 0
+    """Files skipped because their path or content was already registered."""
+
+    failed: int = 0
+    """Files skipped because they could not be read as audio."""
+
+    failed_paths: list[str] = field(default_factory=list)
+    """Paths of the files that could not be read as audio."""
+
+
 class RecordingAPI(
     BaseAPI[
         UUID,
@@ -71,9 +99,11 @@ class RecordingAPI(
             return self._media_info_cache[recording_uuid]
 
         recording = await self.get(session, recording_uuid)
-        full_path = audio_dir / recording.path
-
-        media_info = get_media_info(full_path)
+        media_info = await run_in_thread(
+            _read_media_info,
+            recording.path,
+            audio_dir,
+        )
         self._media_info_cache[recording_uuid] = media_info
         return media_info
 
@@ -222,117 +252,330 @@ class RecordingAPI(
         session: AsyncSession,
         data: Sequence[dict],
         audio_dir: str | None = None,  # Changed to str
+        batch_size: int | None = None,
+        progress: Callable[[IngestionProgress], None] | None = None,
     ) -> None | Sequence[schemas.Recording]:
-        """Create recordings."""
-        
-        if use_s3:             
-            if audio_dir is None:
-                audio_dir = get_settings().audio_dir
-                
+        """Create recordings.
+
+        See `create_many_batched` for details. All recordings are collected
+        and returned at the end, so prefer `create_many_batched` when
+        registering a very large number of files.
+        """
+        created: list[schemas.Recording] = []
+        async for batch in self.create_many_batched(
+            session,
+            data,
+            audio_dir=audio_dir,
+            batch_size=batch_size,
+            progress=progress,
+        ):
+            created.extend(batch)
+        return created
+
+    async def create_many_batched(
+        self,
+        session: AsyncSession,
+        data: Sequence[dict],
+        audio_dir: str | Path | None = None,
+        batch_size: int | None = None,
+        progress: Callable[[IngestionProgress], None] | None = None,
+    ) -> AsyncIterator[list[schemas.Recording]]:
+        """Create recordings in batches, committing after each batch.
+
+        Files are read in the CPU executor and their information is
+        inserted as workers finish, so only a bounded number of files is
+        held in memory and the event loop is never blocked waiting for all
+        of them.
+
+        Ingestion can be resumed: files whose path is already registered
+        are not read again. If the same content is found under several
+        paths, only the first one is registered.
+
+        Parameters
+        ----------
+        session
+            SQLAlchemy AsyncSession. It is committed after every batch.
+        data
+            The data of each recording to create. Must include the path.
+        audio_dir
+            The root audio directory. If None, the root audio directory
+            from the settings will be used.
+        batch_size
+            Number of recordings inserted at a time. Defaults to the
+            `ingestion_batch_size` setting.
+        progress
+            Function called with the progress of the ingestion after every
+            batch.
+
+        Yields
+        ------
+        list[schemas.Recording]
+            The recordings of each committed batch. Recordings that were
+            already registered are included, so callers can finish any
+            work on them that was interrupted, e.g. adding them to a
+            dataset. Each recording is yielded at most once.
+        """
+        settings = get_settings()
+        if audio_dir is None:
+            audio_dir = settings.audio_dir
+
+        if batch_size is None:
+            batch_size = settings.ingestion_batch_size
+
+        if use_s3:
             # Filter out non-audio files (e.g., .DS_Store) from S3 file keys
-            valid_audio_files = [
-                key for key in [recording['path'] for recording in data] 
-                if key.endswith('.wav') and not key.endswith('.DS_Store')
+            data = [
+                recording
+                for recording in data
+                if str(recording["path"]).endswith(".wav")
             ]
-            
-            # Recreate the 'data' list with only valid audio files
-            filtered_data = [recording for recording in data if recording['path'] in valid_audio_files]
-                    
-            validated_data = remove_duplicates(
-                [
-                    schemas.RecordingCreate.model_validate(recording)
-                    for recording in filtered_data
-                ],
-                key=lambda x: x.path,
+
+        validated_data = remove_duplicates(
+            [
+                schemas.RecordingCreate.model_validate(recording)
+                for recording in data
+            ],
+            key=lambda x: x.path,
+        )
+
+        state = IngestionProgress(total=len(validated_data))
+        seen: set[int] = set()
+
+        def report() -> None:
+            logger.info(
+                "Ingested %d/%d files: %d created, %d existing, %d failed",
+                state.processed,
+                state.total,
+                state.created,
+                state.existing,
+                state.failed,
+            )
+            if progress is not None:
+                progress(state)
+
+        # Skip files registered by a previous, possibly interrupted, run.
+        pending: list[schemas.RecordingCreate] = []
+        for batch in itertools.batched(validated_data, batch_size):
+            stored = {
+                _get_stored_path(recording, audio_dir): recording
+                for recording in batch
+            }
+            existing = await common.get_objects_by_keys_batched(
+                session,
+                models.Recording,
+                models.Recording.path,
+                [path for path in stored if path is not None],
+            )
+            # NOTE: Paths are loaded from the database as Path objects,
+            # which turn S3 URLs like s3://bucket into s3:/bucket.
+            existing_paths = {recording.path for recording in existing}
+            pending.extend(
+                recording
+                for path, recording in stored.items()
+                if path is None or Path(path) not in existing_paths
             )
-            
-            with Pool() as pool:
-                results = pool.map_async(
-                    partial(_assemble_recording_data, audio_dir=audio_dir),
-                    validated_data,
-                )
-                # NOTE: This will block until all results are ready. Might
-                # want to change this in the future as it could be very
-                # slow for large numbers of files or large files.
-                all_data: list[dict | None] = results.get()
-                    
-            try:
-                # Filter and prepare the data for insertion
-                recordings_data = [rec for rec in all_data if rec is not None]
-
-                # Deduplicate based on the "hash" key
-                unique_recordings_data = {rec["hash"]: rec for rec in recordings_data}.values()
-
-                # Extract hashes from the incoming data
-                incoming_hashes = [rec["hash"] for rec in unique_recordings_data]
-
-                # Query existing recordings with the same hashes
-                existing_recordings_query = await session.execute(
-                    select(models.Recording).where(models.Recording.hash.in_(incoming_hashes))
-                )
-                existing_recordings = existing_recordings_query.unique().scalars().all()
 
-                # Get the set of existing hashes
-                existing_hashes = {rec.hash for rec in existing_recordings}
+            if not existing:
+                continue
 
-                # Filter out recordings that already exist
-                new_recordings_data = [
-                    rec for rec in unique_recordings_data if rec["hash"] not in existing_hashes
-                ]
+            state.processed += len(existing)
+            state.existing += len(existing)
+            seen.update(recording.id for recording in existing)
+            report()
+            yield [
+                schemas.Recording.model_validate(recording)
+                for recording in existing
+            ]
 
-                # Create new Recording objects
-                new_recording_objects = [
-                    models.Recording(**recording_data) for recording_data in new_recordings_data
-                ]
+        del validated_data
+
+        buffer: list[tuple[int, dict]] = []
+        results = get_cpu_executor().map_unordered(
+            partial(_assemble_numbered_recording_data, audio_dir=audio_dir),
+            enumerate(pending),
+        )
+        async for index, recording_data in results:
+            state.processed += 1
+            if recording_data is None:
+                state.failed += 1
+                state.failed_paths.append(str(pending[index].path))
+            else:
+                buffer.append((index, recording_data))
+
+            if len(buffer) < batch_size:
+                continue
+
+            batch = await self._store_batch(session, buffer, seen, state)
+            buffer = []
+            report()
+            if batch:
+                yield batch
+
+        batch = await self._store_batch(session, buffer, seen, state)
+        report()
+        if batch:
+            yield batch
+
+    async def refresh_many(
+        self,
+        session: AsyncSession,
+        paths: Sequence[str | Path],
+        audio_dir: str | Path | None = None,
+        progress: Callable[[IngestionProgress], None] | None = None,
+    ) -> list[schemas.Recording]:
+        """Update registered recordings whose files have changed.
+
+        The files are hashed and probed again and the hash and media
+        information of the recordings registered under the same paths are
+        updated. Files that are not registered, can no longer be read, or
+        now have the same content as another recording are skipped.
+
+        Parameters
+        ----------
+        session
+            SQLAlchemy AsyncSession. It is committed at the end.
+        paths
+            Paths of the changed files, as they would be given to
+            `create_many`.
+        audio_dir
+            The root audio directory. If None, the root audio directory
+            from the settings will be used.
+        progress
+            Function called with the progress of the refresh once all the
+            files were read. Files that could not be read are counted as
+            failed.
+
+        Returns
+        -------
+        list[schemas.Recording]
+            The recordings whose content changed.
+        """
+        if not paths:
+            return []
+
+        if audio_dir is None:
+            audio_dir = get_settings().audio_dir
+
+        stored = {}
+        for path in paths:
+            recording_data = schemas.RecordingCreate.model_validate(
+                dict(path=path)
+            )
+            stored_path = _get_stored_path(recording_data, audio_dir)
+            if stored_path is not None:
+                stored[stored_path] = recording_data
 
-                # Add new recordings to the session and commit
-                if new_recording_objects:
-                    session.add_all(new_recording_objects)
-                    await session.commit()
-
-                # Combine newly created and existing recordings
-                all_recordings = existing_recordings + new_recording_objects
-
-            except Exception as e:
-                print(f"Error while storing recordings: {e}")
-                await session.rollback()  
-                return [] 
-
-            return [schemas.Recording.model_validate(rec) for rec in all_recordings]
-        else: 
-            if audio_dir is None:
-                audio_dir = get_settings().audio_dir
-
-            validated_data = remove_duplicates(
-                [
-                    schemas.RecordingCreate.model_validate(recording)
-                    for recording in data
-                ],
-                key=lambda x: x.path,
+        registered = await common.get_objects_by_keys_batched(
+            session,
+            models.Recording,
+            models.Recording.path,
+            list(stored),
+        )
+
+        # Media information depends on the time expansion of each
+        # recording.
+        by_path = {Path(path): value for path, value in stored.items()}
+        pending = [
+            (
+                recording,
+                by_path[recording.path].model_copy(
+                    update=dict(time_expansion=recording.time_expansion)
+                ),
             )
-            
-            with Pool() as pool:
-                results = pool.map_async(
-                    partial(_assemble_recording_data, audio_dir=audio_dir),
-                    validated_data,
+            for recording in registered
+        ]
+
+        state = IngestionProgress(total=len(pending))
+        updated = []
+        results = get_cpu_executor().map_unordered(
+            partial(_assemble_numbered_recording_data, audio_dir=audio_dir),
+            enumerate(recording_data for _, recording_data in pending),
+        )
+        async for index, recording_data in results:
+            recording, file_data = pending[index]
+            state.processed += 1
+            if recording_data is None:
+                state.failed += 1
+                state.failed_paths.append(str(file_data.path))
+                continue
+
+            if recording_data["hash"] == recording.hash:
+                continue
+
+            duplicate = await session.execute(
+                select(models.Recording.id).where(
+                    models.Recording.hash == recording_data["hash"]
                 )
-                # NOTE: This will block until all results are ready. Might
-                # want to change this in the future as it could be very
-                # slow for large numbers of files or large files.
-                all_data: list[dict | None] = results.get()
-
-            try:
-                recordings = await common.create_objects_without_duplicates(
-                    session,
-                    models.Recording,
-                    [rec for rec in all_data if rec is not None],
-                    key=lambda recording: recording.get("hash"),
-                    key_column=models.Recording.hash,
+            )
+            if duplicate.first() is not None:
+                logger.warning(
+                    f"File {recording.path} now has the same content as "
+                    "another recording. Skipping file."
                 )
-            except Exception as e:
-                print(f"Error occured in creating recording : {e}")    
+                continue
 
-            return [schemas.Recording.model_validate(rec) for rec in recordings]
+            db_recording = await common.update_object(
+                session,
+                models.Recording,
+                models.Recording.id == recording.id,
+                hash=recording_data["hash"],
+                hash_algorithm=recording_data["hash_algorithm"],
+                duration=recording_data["duration"],
+                samplerate=recording_data["samplerate"],
+                channels=recording_data["channels"],
+            )
+            updated.append(schemas.Recording.model_validate(db_recording))
+
+        await session.commit()
+        if progress is not None:
+            progress(state)
+        return updated
+
+    async def _store_batch(
+        self,
+        session: AsyncSession,
+        buffer: list[tuple[int, dict]],
+        seen: set[int],
+        state: IngestionProgress,
+    ) -> list[schemas.Recording]:
+        """Insert a batch of recordings and commit the session."""
+        if not buffer:
+            return []
+
+        # Results arrive in completion order. Sort them so that, among
+        # files with the same content, the first one given is registered.
+        buffer = sorted(buffer, key=lambda item: item[0])
+        batch = [recording for _, recording in buffer]
+        try:
+            existing = await common.get_objects_by_keys_batched(
+                session,
+                models.Recording,
+                models.Recording.hash,
+                [recording["hash"] for recording in batch],
+            )
+            created = await common.create_objects_without_duplicates(
+                session,
+                models.Recording,
+                batch,
+                key=lambda recording: recording.get("hash"),
+                key_column=models.Recording.hash,
+            )
+            await session.commit()
+        except Exception:
+            logger.exception("Error while storing recordings")
+            await session.rollback()
+            raise
+
+        state.created += len(created)
+        state.existing += len(batch) - len(created)
+
+        recordings = []
+        for recording in [*existing, *created]:
+            if recording.id in seen:
+                continue
+            seen.add(recording.id)
+            recordings.append(schemas.Recording.model_validate(recording))
+        return recordings
 
     async def update(
         self,
@@ -364,9 +607,15 @@ class RecordingAPI(
             audio_dir = get_settings().audio_dir
 
         if data.path is not None:
-            new_hash = compute_md5_checksum(data.path)
-
-            if new_hash != obj.hash:
+            algorithm, quick = files.parse_hash_name(obj.hash_algorithm)
+            if algorithm == files.ETAG_HASH_ALGORITHM:
+                # NOTE: The ETag of an S3 object cannot be computed from a
+                # file, so the file cannot be checked against it.
+                logger.warning(
+                    f"Cannot check that {data.path} matches recording "
+                    f"{obj.uuid}: its hash is an S3 ETag."
+                )
+            elif files.compute_hash(data.path, algorithm, quick) != obj.hash:
                 raise ValueError(
                     "File at the given path does not match the hash of the "
                     "recording."
@@ -988,37 +1237,92 @@ def validate_path(
     return path
 
 
+def _read_media_info(path: Path, audio_dir: str | Path) -> MediaInfo:
+    """Read the media info of a recording file.
+
+    Only the header of files stored in S3 is downloaded.
+    """
+    if not use_s3:
+        return get_media_info(Path(audio_dir) / path)
+
+    s3_path = str(path)
+    if not s3_path.startswith("s3://"):
+        s3_path = s3_path.replace("s3:/", "s3://")
+
+    bucket_name, key = parse_s3_path(s3_path)
+    with s3_client.open_file(bucket_name, key) as fp:
+        media_info = files.read_media_info(fp, fp.size)  # type: ignore
+
+    if media_info is None:
+        raise ValueError(f"Could not read the media info of {path}")
+
+    return media_info
+
+
+def _get_stored_path(
+    data: schemas.RecordingCreate,
+    audio_dir: str | Path,
+) -> str | Path | None:
+    """Get the path a recording is registered under in the database."""
+    if use_s3:
+        return str(data.path)
+
+    path = Path(data.path)
+    if not path.is_relative_to(audio_dir):
+        return None
+
+    return path.relative_to(audio_dir)
+
+
+def _assemble_numbered_recording_data(
+    item: tuple[int, schemas.RecordingCreate],
+    audio_dir: str | Path,
+) -> tuple[int, dict | None]:
+    index, data = item
+    return index, _assemble_recording_data(data, audio_dir)
+
+
 def _assemble_recording_data(
     data: schemas.RecordingCreate,
     audio_dir: str | Path,
 ) -> dict | None:
     """Get missing recording data from S3 file."""
     logger.debug(f"Assembling recording data from file: {data.path}")
+    settings = get_settings()
 
     if use_s3:
         try:
             bucket_name, key = parse_s3_path(data.path)
-            
-            # Download the file temporarily to analyze
-            with TemporaryDirectory() as temp_dir:
-                temp_file_path = Path(temp_dir) / key.split('/')[-1]
-                try:
-                    # downloaded_path = Path("C:\\Users\\DELL\\Desktop\\medsensio\\audio_dir\\sample-file-1.wav")
-                    s3_client.download_file(bucket_name=bucket_name, key=key, download_path=str(temp_file_path))
-                except Exception as e:
-                    print(f"Failed to download file from S3. Bucket: {bucket_name}, Key: {key}",
-                        exc_info=e,)
-                    return None
-                
-                # Analyze the file
-                info = files.get_file_info(temp_file_path)
-                # print(f"info : {info}")
-        except (ValueError, KeyError, sf.LibsndfileError, boto3.exceptions.Boto3Error) as e:
-            print(f"Could not get file info from file. {data.path} Skipping file.")
+            # Only the header of the object is downloaded. The waveform is
+            # built the first time it is requested.
+            info = get_s3_file_info(
+                s3_client.get_client(),
+                bucket_name,
+                key,
+                algorithm=settings.hash_algorithm,
+                quick=settings.quick_hash,
+                full_hash=settings.s3_full_hash,
+            )
+        except (
+            ValueError,
+            KeyError,
+            sf.LibsndfileError,
+            BotoCoreError,
+            ClientError,
+        ) as e:
+            logger.warning(
+                f"Could not get file info from file. {data.path} "
+                "Skipping file.",
+                exc_info=e,
+            )
             return None
     else:
         try:
-            info = files.get_file_info(data.path)
+            info = files.get_file_info(
+                data.path,
+                algorithm=settings.hash_algorithm,
+                quick=settings.quick_hash,
+            )
         except (ValueError, KeyError, sf.LibsndfileError) as e:
             logger.warning(
                 f"Could not get file info from file. {data.path} Skipping file.",
@@ -1051,6 +1355,7 @@ def _assemble_recording_data(
         )
         return None
 
+
     duration = info.media_info.duration_s / data.time_expansion
     samplerate = int(info.media_info.samplerate_hz * data.time_expansion)
     channels = info.media_info.channels
@@ -1062,6 +1367,7 @@ def _assemble_recording_data(
             samplerate=samplerate,
             channels=channels,
             hash=info.hash,
+            hash_algorithm=info.hash_algorithm,
             path=str(data.path) if use_s3 else data.path.relative_to(audio_dir),
         ),
     }
@@ -1,28 +1,131 @@
 """API functions to generate spectrograms."""
 
+import asyncio
+import hashlib
+import io
+import json
+import logging
+from collections.abc import Callable, Sequence
+from contextlib import ExitStack
+from functools import lru_cache, partial
 from pathlib import Path
+from typing import Literal, ParamSpec, cast
 
 import numpy as np
+import soundfile as sf
+import xarray as xr
 from soundevent import arrays, audio
 
 import whombat.api.audio as audio_api
-from whombat import schemas
-from whombat.core.spectrograms import normalize_spectrogram
+from whombat import exceptions, schemas
+from whombat.core import images
+from whombat.core.audio_streaming import get_output_frames
+from whombat.core.file_cache import FileCache
+from whombat.core.pyramids import SpectrogramPyramid, build_spectrogram_pyramid
+from whombat.core.single_flight import SingleFlight
+from whombat.core.spectrograms import (
+    compute_normalized_spectrogram,
+    compute_normalized_spectrogram_blocks,
+    encode_raw_spectrogram,
+    normalize_spectrogram,
+    stft_frame_sizes,
+)
+from whombat.core.tile_cache import TileCache
+from whombat.system import get_settings
+from whombat.system.data import get_app_data_dir
+from whombat.system.executors import run_in_process, run_in_thread
 
 __all__ = [
+    "build_recording_pyramid",
+    "audio_to_spectrogram_db",
     "compute_spectrogram",
+    "compute_spectrogram_blocks",
+    "compute_spectrogram_db",
+    "compute_spectrograms",
+    "encode_spectrogram",
+    "get_raw_spectrogram",
+    "get_spectrogram_cache",
+    "get_spectrogram_flights",
+    "get_spectrogram_image",
+    "get_spectrogram_images",
+    "get_spectrogram_key",
+    "get_spectrogram_pyramid",
+    "get_spectrogram_tile",
+    "render_raw_spectrogram",
+    "render_spectrogram_image",
+    "render_spectrogram_images",
+    "request_spectrogram_pyramid",
 ]
 
+logger = logging.getLogger(__name__)
 
-def compute_spectrogram(
+P = ParamSpec("P")
+
+_pyramid_builds: dict[Path, asyncio.Task] = {}
+"""Pyramid builds running in the background, by pyramid directory."""
+
+
+@lru_cache
+def get_spectrogram_cache() -> TileCache:
+    """Get the cache of rendered spectrogram images."""
+    settings = get_settings()
+
+    disk = None
+    if settings.spectrogram_cache_size > 0:
+        directory = settings.spectrogram_cache_dir
+        if directory is None:
+            directory = get_app_data_dir() / "spectrogram_cache"
+        disk = FileCache(directory, max_size=settings.spectrogram_cache_size)
+
+    return TileCache(
+        memory_size=settings.spectrogram_cache_memory_size,
+        disk=disk,
+    )
+
+
+@lru_cache
+def get_spectrogram_flights() -> SingleFlight:
+    """Get the group coalescing identical concurrent spectrogram renders."""
+    return SingleFlight("spectrograms")
+
+
+def get_spectrogram_key(
+    recording: schemas.Recording,
+    start_time: float,
+    end_time: float,
+    audio_parameters: schemas.AudioParameters,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    **extra,
+) -> str:
+    """Compute the cache key of a spectrogram.
+
+    The key is derived from the recording content hash, so it remains
+    valid even if the recording is moved.
+    """
+    payload = json.dumps(
+        [
+            recording.hash,
+            recording.time_expansion,
+            start_time,
+            end_time,
+            audio_parameters.model_dump(mode="json"),
+            spectrogram_parameters.model_dump(mode="json"),
+            extra,
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def compute_spectrogram_db(
     recording: schemas.Recording,
     start_time: float,
     end_time: float,
     audio_parameters: schemas.AudioParameters,
     spectrogram_parameters: schemas.SpectrogramParameters,
     audio_dir: Path | None = None,
-) -> np.ndarray:
-    """Compute a spectrogram for a recording.
+) -> xr.DataArray:
+    """Compute a spectrogram for a recording in decibels.
 
     Parameters
     ----------
@@ -32,15 +135,18 @@ def compute_spectrogram(
         Start time in seconds.
     end_time
         End time in seconds.
+    audio_parameters
+        Audio parameters.
+    spectrogram_parameters
+        Spectrogram parameters.
     audio_dir
         The directory where the audio files are stored.
-    spectrogram_parameters : SpectrogramParameters
-        Spectrogram parameters.
 
     Returns
     -------
     DataArray
-        Spectrogram image.
+        Spectrogram with frequency and time dimensions, clamped to the
+        dB range of the spectrogram parameters.
     """
     if audio_dir is None:
         audio_dir = Path.cwd()
@@ -53,6 +159,28 @@ def compute_spectrogram(
         audio_dir=audio_dir,
     )
 
+    return audio_to_spectrogram_db(wav, spectrogram_parameters)
+
+
+def audio_to_spectrogram_db(
+    wav: xr.DataArray,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+) -> xr.DataArray:
+    """Compute the spectrogram of loaded audio in decibels.
+
+    Parameters
+    ----------
+    wav
+        Audio as returned by `whombat.api.load_audio`.
+    spectrogram_parameters
+        Spectrogram parameters.
+
+    Returns
+    -------
+    DataArray
+        Spectrogram with frequency and time dimensions, clamped to the
+        dB range of the spectrogram parameters.
+    """
     # Select channel. Do this early to avoid unnecessary computation.
     wav = wav[dict(channel=[spectrogram_parameters.channel])]
 
@@ -81,23 +209,891 @@ def compute_spectrogram(
         max_db=spectrogram_parameters.max_dB,
     )
 
-    # # Clamp amplitude.
-    # spectrogram = audio.clamp_amplitude(
-    #     spectrogram,
-    #     spectrogram_parameters.min_dB,
-    #     spectrogram_parameters.max_dB,
-    # )
+    # Remove the channel dimension.
+    return spectrogram.squeeze("channel", drop=True)
 
-    # Scale to [0, 1]. If normalization is relative, the minimum and maximum
-    # values are computed from the spectrogram, otherwise they are taken from
-    # the provided min_dB and max_dB.
-    spectrogram = normalize_spectrogram(
-        spectrogram,
-        relative=spectrogram_parameters.normalize,
+
+def compute_spectrogram(
+    recording: schemas.Recording,
+    start_time: float,
+    end_time: float,
+    audio_parameters: schemas.AudioParameters,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+) -> np.ndarray:
+    """Compute a spectrogram for a recording.
+
+    Parameters
+    ----------
+    recording
+        The recording to compute the spectrogram for.
+    start_time
+        Start time in seconds.
+    end_time
+        End time in seconds.
+    audio_dir
+        The directory where the audio files are stored.
+    spectrogram_parameters : SpectrogramParameters
+        Spectrogram parameters.
+
+    Returns
+    -------
+    np.ndarray
+        Spectrogram normalized to [0, 1].
+
+    Notes
+    -----
+    When the audio does not need to be resampled or filtered, the samples
+    are read directly into a numpy array, skipping the labelled arrays
+    built by `whombat.api.load_audio`. Windows longer than the
+    `spectrogram_block_size` setting are computed in blocks with
+    `compute_spectrogram_blocks`.
+    """
+    return compute_spectrograms(
+        recording,
+        [(start_time, end_time)],
+        audio_parameters,
+        spectrogram_parameters,
+        audio_dir=audio_dir,
+    )[0]
+
+
+def compute_spectrograms(
+    recording: schemas.Recording,
+    windows: Sequence[tuple[float, float]],
+    audio_parameters: schemas.AudioParameters,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+) -> list[np.ndarray]:
+    """Compute spectrograms of several windows of a recording.
+
+    Each window is computed as by `compute_spectrogram`. The audio file
+    is opened once for all the windows read directly into numpy arrays.
+
+    Parameters
+    ----------
+    recording
+        The recording to compute the spectrograms for.
+    windows
+        Start and end times in seconds of each window.
+    audio_parameters
+        Audio parameters.
+    spectrogram_parameters
+        Spectrogram parameters.
+    audio_dir
+        The directory where the audio files are stored.
+
+    Returns
+    -------
+    list[np.ndarray]
+        The spectrogram of each window, normalized to [0, 1].
+    """
+    block_size = get_settings().spectrogram_block_size
+    direct = (
+        not audio_parameters.resample
+        and audio_parameters.low_freq is None
+        and audio_parameters.high_freq is None
+    )
+
+    spectrograms: list[np.ndarray | None] = [None] * len(windows)
+    processed: list[int] = []
+    with ExitStack() as stack:
+        source = None
+        for position, (start_time, end_time) in enumerate(windows):
+            frames = (end_time - start_time) * recording.samplerate
+            if start_time >= 0 and frames > block_size:
+                spectrograms[position] = compute_spectrogram_blocks(
+                    recording,
+                    start_time,
+                    end_time,
+                    audio_parameters,
+                    spectrogram_parameters,
+                    audio_dir=audio_dir,
+                    block_size=block_size,
+                )
+                continue
+
+            if start_time < 0 or not direct:
+                processed.append(position)
+                continue
+
+            if source is None:
+                source = stack.enter_context(
+                    audio_api.open_audio_file(
+                        audio_api.get_audio_path(recording, audio_dir),
+                        recording_hash=recording.hash,
+                    )
+                )
+            elif isinstance(source, io.IOBase):
+                source.seek(0)
+
+            samples = audio_api.read_frames(
+                source,
+                int(np.floor(start_time * recording.samplerate)),
+                int(np.floor(frames)),
+                channel=spectrogram_parameters.channel,
+            )
+            spectrograms[position] = _compute_normalized_spectrogram(
+                samples,
+                recording.samplerate,
+                spectrogram_parameters,
+            ).squeeze()
+
+    # NOTE: Windows that need resampling or filtering, or that start
+    # before the recording, are loaded as labelled arrays.
+    waves = []
+    if processed:
+        waves = audio_api.load_audio_windows(
+            recording,
+            [windows[position] for position in processed],
+            audio_dir=audio_dir,
+            audio_parameters=audio_parameters,
+        )
+
+    for position, wav in zip(processed, waves, strict=True):
+        spectrograms[position] = _compute_normalized_spectrogram(
+            wav.data[:, spectrogram_parameters.channel],
+            1 / arrays.get_dim_step(wav, "time"),
+            spectrogram_parameters,
+        ).squeeze()
+
+    # NOTE: Every window was computed by one of the paths above.
+    return cast(list[np.ndarray], spectrograms)
+
+
+def compute_spectrogram_blocks(
+    recording: schemas.Recording,
+    start_time: float,
+    end_time: float,
+    audio_parameters: schemas.AudioParameters,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+    block_size: int = 2**20,
+) -> np.ndarray:
+    """Compute a spectrogram for a recording in blocks of audio.
+
+    Only a block of audio and its STFT are held in memory at a time, the
+    spectrogram columns are written into a single preallocated array.
+    Without resampling or filtering the result is the same as that of
+    `compute_spectrogram`.
+
+    Parameters
+    ----------
+    recording
+        The recording to compute the spectrogram for.
+    start_time
+        Start time in seconds.
+    end_time
+        End time in seconds.
+    audio_parameters
+        Audio parameters.
+    spectrogram_parameters
+        Spectrogram parameters.
+    audio_dir
+        The directory where the audio files are stored.
+    block_size
+        Approximate number of samples read at a time.
+
+    Returns
+    -------
+    np.ndarray
+        Spectrogram normalized to [0, 1].
+
+    Notes
+    -----
+    Audio is resampled with a polyphase filter, see
+    `whombat.api.audio.iter_audio_blocks`. Its anti-aliasing filter
+    attenuates frequencies close to the Nyquist frequency, so the top
+    rows of resampled spectrograms differ from those of
+    `compute_spectrogram`.
+    """
+    samplerate = audio_api.get_output_samplerate(recording, audio_parameters)
+    frames = get_output_frames(
+        int(np.floor((end_time - start_time) * recording.samplerate)),
+        recording.samplerate,
+        samplerate,
+    )
+
+    blocks = audio_api.iter_audio_blocks(
+        recording,
+        start_time,
+        end_time,
+        audio_parameters=audio_parameters,
+        channel=spectrogram_parameters.channel,
+        audio_dir=audio_dir,
+        block_size=block_size,
+    )
+
+    return compute_normalized_spectrogram_blocks(
+        blocks,
+        frames,
+        samplerate,
+        window_size=spectrogram_parameters.window_size,
+        overlap=spectrogram_parameters.overlap,
+        window=spectrogram_parameters.window,
+        pcen=spectrogram_parameters.pcen,
+        min_db=spectrogram_parameters.min_dB,
+        max_db=spectrogram_parameters.max_dB,
+    )
+
+
+def _compute_normalized_spectrogram(
+    samples: np.ndarray,
+    samplerate: float,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+) -> np.ndarray:
+    return compute_normalized_spectrogram(
+        samples,
+        samplerate,
+        window_size=spectrogram_parameters.window_size,
+        overlap=spectrogram_parameters.overlap,
+        window=spectrogram_parameters.window,
+        pcen=spectrogram_parameters.pcen,
+        min_db=spectrogram_parameters.min_dB,
+        max_db=spectrogram_parameters.max_dB,
+    )
+
+
+def encode_spectrogram(
+    data: np.ndarray,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    image_parameters: schemas.ImageParameters | None = None,
+) -> bytes:
+    """Colormap a spectrogram with values in [0, 1] and encode it."""
+    if image_parameters is None:
+        image_parameters = schemas.ImageParameters()
+
+    return images.encode_image(
+        data,
+        cmap=spectrogram_parameters.cmap,
+        fmt=image_parameters.format,
+        quality=image_parameters.quality,
+        compress_level=image_parameters.compress_level,
+    )
+
+
+def render_spectrogram_image(
+    recording: schemas.Recording,
+    start_time: float,
+    end_time: float,
+    audio_parameters: schemas.AudioParameters,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+    image_parameters: schemas.ImageParameters | None = None,
+) -> bytes:
+    """Compute a spectrogram of a recording and render it as an image.
+
+    Parameters
+    ----------
+    recording
+        The recording to compute the spectrogram for.
+    start_time
+        Start time in seconds.
+    end_time
+        End time in seconds.
+    audio_parameters
+        Audio parameters.
+    spectrogram_parameters
+        Spectrogram parameters.
+    audio_dir
+        The directory where the audio files are stored.
+    image_parameters
+        Image format and compression options. Defaults to PNG.
+
+    Returns
+    -------
+    bytes
+        The encoded image.
+    """
+    data = compute_spectrogram(
+        recording,
+        start_time,
+        end_time,
+        audio_parameters,
+        spectrogram_parameters,
+        audio_dir=audio_dir,
+    )
+    return _spectrogram_to_image(
+        data,
+        spectrogram_parameters,
+        image_parameters,
+    )
+
+
+def render_spectrogram_images(
+    recording: schemas.Recording,
+    windows: Sequence[tuple[float, float]],
+    audio_parameters: schemas.AudioParameters,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+    image_parameters: schemas.ImageParameters | None = None,
+) -> list[bytes]:
+    """Render spectrograms of several windows of a recording.
+
+    The spectrograms are computed with `compute_spectrograms`, so each
+    window takes the same path as in `render_spectrogram_image`.
+
+    Parameters
+    ----------
+    recording
+        The recording to compute the spectrograms for.
+    windows
+        Start and end times in seconds of each window.
+    audio_parameters
+        Audio parameters.
+    spectrogram_parameters
+        Spectrogram parameters.
+    audio_dir
+        The directory where the audio files are stored.
+    image_parameters
+        Image format and compression options. Defaults to PNG.
+
+    Returns
+    -------
+    list[bytes]
+        The encoded image of each window.
+    """
+    spectrograms = compute_spectrograms(
+        recording,
+        windows,
+        audio_parameters,
+        spectrogram_parameters,
+        audio_dir=audio_dir,
+    )
+    return [
+        _spectrogram_to_image(data, spectrogram_parameters, image_parameters)
+        for data in spectrograms
+    ]
+
+
+def _spectrogram_to_image(
+    data: np.ndarray,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    image_parameters: schemas.ImageParameters | None = None,
+) -> bytes:
+    # Normalize.
+    if spectrogram_parameters.normalize:
+        data_min = data.min()
+        data_max = data.max()
+        data = data - data_min
+        data_range = data_max - data_min
+        if data_range > 0:
+            data = data / data_range
+
+    return encode_spectrogram(data, spectrogram_parameters, image_parameters)
+
+
+async def get_spectrogram_image(
+    recording: schemas.Recording,
+    start_time: float,
+    end_time: float,
+    audio_parameters: schemas.AudioParameters,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+    image_parameters: schemas.ImageParameters | None = None,
+) -> bytes:
+    """Get a spectrogram of a recording rendered as an image.
+
+    Rendered images are cached, so only the first request for a given
+    recording, time window and set of parameters computes the spectrogram.
+
+    Parameters
+    ----------
+    recording
+        The recording to compute the spectrogram for.
+    start_time
+        Start time in seconds.
+    end_time
+        End time in seconds.
+    audio_parameters
+        Audio parameters.
+    spectrogram_parameters
+        Spectrogram parameters.
+    audio_dir
+        The directory where the audio files are stored.
+    image_parameters
+        Image format and compression options. Defaults to PNG.
+
+    Returns
+    -------
+    bytes
+        The encoded image.
+    """
+    if image_parameters is None:
+        image_parameters = schemas.ImageParameters()
+
+    key = get_spectrogram_key(
+        recording,
+        start_time,
+        end_time,
+        audio_parameters,
+        spectrogram_parameters,
+        image=image_parameters.model_dump(mode="json"),
+    )
+
+    return await _get_or_render(
+        key,
+        render_spectrogram_image,
+        recording,
+        start_time,
+        end_time,
+        audio_parameters,
+        spectrogram_parameters,
+        audio_dir=audio_dir,
+        image_parameters=image_parameters,
+    )
+
+
+async def get_spectrogram_images(
+    windows: Sequence[tuple[schemas.Recording, float, float]],
+    audio_parameters: schemas.AudioParameters,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+    image_parameters: schemas.ImageParameters | None = None,
+) -> list[bytes]:
+    """Get spectrograms of many windows rendered as images.
+
+    Cached images are returned as is. The remaining windows are grouped
+    by recording, so each audio file is opened once, and the recordings
+    are rendered in parallel in the CPU executor.
+
+    Parameters
+    ----------
+    windows
+        The recording, start time and end time in seconds of each window.
+    audio_parameters
+        Audio parameters shared by all windows.
+    spectrogram_parameters
+        Spectrogram parameters shared by all windows.
+    audio_dir
+        The directory where the audio files are stored.
+    image_parameters
+        Image format and compression options. Defaults to PNG.
+
+    Returns
+    -------
+    list[bytes]
+        The encoded image of each window, in the order of `windows`.
+    """
+    if image_parameters is None:
+        image_parameters = schemas.ImageParameters()
+
+    cache = get_spectrogram_cache()
+    keys = [
+        get_spectrogram_key(
+            recording,
+            start_time,
+            end_time,
+            audio_parameters,
+            spectrogram_parameters,
+            image=image_parameters.model_dump(mode="json"),
+        )
+        for recording, start_time, end_time in windows
+    ]
+
+    results: list[bytes | None] = list(
+        await run_in_thread(lambda: [cache.get(key) for key in keys])
+    )
+
+    # Group the missing windows by recording.
+    missing: dict[int, list[int]] = {}
+    for position, content in enumerate(results):
+        if content is None:
+            recording = windows[position][0]
+            missing.setdefault(recording.id, []).append(position)
+
+    # NOTE: Identical batches, e.g. from annotators opening the same
+    # page, share the rendering of each recording.
+    flights = get_spectrogram_flights()
+    rendered = await asyncio.gather(
+        *[
+            flights.run(
+                hashlib.sha256(
+                    "".join(keys[position] for position in positions).encode()
+                ).hexdigest(),
+                partial(
+                    run_in_process,
+                    render_spectrogram_images,
+                    windows[positions[0]][0],
+                    [windows[position][1:] for position in positions],
+                    audio_parameters,
+                    spectrogram_parameters,
+                    audio_dir=audio_dir,
+                    image_parameters=image_parameters,
+                ),
+            )
+            for positions in missing.values()
+        ]
+    )
+
+    new_items = []
+    for positions, contents in zip(missing.values(), rendered):
+        for position, content in zip(positions, contents, strict=True):
+            results[position] = content
+            new_items.append((keys[position], content))
+
+    await run_in_thread(
+        lambda: [cache.put(key, content) for key, content in new_items]
+    )
+
+    images = []
+    for position, content in enumerate(results):
+        if content is None:
+            raise RuntimeError(
+                f"The spectrogram of window {position} was not rendered."
+            )
+        images.append(content)
+
+    return images
+
+
+def render_raw_spectrogram(
+    recording: schemas.Recording,
+    start_time: float,
+    end_time: float,
+    audio_parameters: schemas.AudioParameters,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+    dtype: Literal["uint8", "float16"] = "uint8",
+) -> bytes:
+    """Compute a normalized spectrogram and encode it as raw values.
+
+    See `whombat.core.spectrograms.RAW_HEADER_FORMAT` for a description
+    of the encoding.
+    """
+    spectrogram = compute_spectrogram_db(
+        recording,
+        start_time,
+        end_time,
+        audio_parameters,
+        spectrogram_parameters,
+        audio_dir=audio_dir,
+    )
+
+    # NOTE: Match the normalization of `compute_spectrogram`, keeping
+    # track of the dB range so clients can map values back to dB.
+    min_db = float(spectrogram.min())
+    max_db = float(spectrogram.max())
+    data = normalize_spectrogram(spectrogram, relative=True).data
+
+    times = spectrogram.time.data
+    frequencies = spectrogram.frequency.data
+
+    return encode_raw_spectrogram(
+        data,
+        dtype=dtype,
+        start_time=float(times[0]) if len(times) else start_time,
+        time_step=float(times[1] - times[0]) if len(times) > 1 else 0,
+        min_freq=float(frequencies[0]),
+        freq_step=(
+            float(frequencies[1] - frequencies[0])
+            if len(frequencies) > 1
+            else 0
+        ),
+        min_db=min_db,
+        max_db=max_db,
+    )
+
+
+async def get_raw_spectrogram(
+    recording: schemas.Recording,
+    start_time: float,
+    end_time: float,
+    audio_parameters: schemas.AudioParameters,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+    dtype: Literal["uint8", "float16"] = "uint8",
+) -> bytes:
+    """Get a normalized spectrogram of a recording as raw values.
+
+    Clients can apply colormaps and contrast changes to the values
+    themselves, without requesting a new image from the server.
+
+    Parameters
+    ----------
+    recording
+        The recording to compute the spectrogram for.
+    start_time
+        Start time in seconds.
+    end_time
+        End time in seconds.
+    audio_parameters
+        Audio parameters.
+    spectrogram_parameters
+        Spectrogram parameters. The colormap is ignored.
+    audio_dir
+        The directory where the audio files are stored.
+    dtype
+        Data type of the values, uint8 or float16.
+
+    Returns
+    -------
+    bytes
+        A header with the shape, axes and dB range, followed by the
+        values. See `whombat.core.spectrograms.RAW_HEADER_FORMAT`.
+    """
+    key = get_spectrogram_key(
+        recording,
+        start_time,
+        end_time,
+        audio_parameters,
+        spectrogram_parameters.model_copy(update={"cmap": "gray"}),
+        raw=dtype,
+    )
+    return await _get_or_render(
+        key,
+        render_raw_spectrogram,
+        recording,
+        start_time,
+        end_time,
+        audio_parameters,
+        spectrogram_parameters,
+        audio_dir=audio_dir,
+        dtype=dtype,
+    )
+
+
+async def _get_or_render(
+    key: str,
+    render: Callable[P, bytes],
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> bytes:
+    """Get content from the spectrogram cache or render it.
+
+    The cache is read in the I/O executor and content is rendered in the
+    CPU executor, so the event loop is never blocked. Concurrent calls
+    with the same key share a single render.
+    """
+    cache = get_spectrogram_cache()
+
+    content = await run_in_thread(cache.get, key)
+    if content is not None:
+        return content
+
+    async def render_and_cache() -> bytes:
+        content = await run_in_process(render, *args, **kwargs)
+        await run_in_thread(cache.put, key, content)
+        return content
+
+    return await get_spectrogram_flights().run(key, render_and_cache)
+
+
+def get_spectrogram_pyramid(
+    recording: schemas.Recording,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+) -> SpectrogramPyramid:
+    """Get the tile pyramid of a recording for a set of STFT parameters.
+
+    The pyramid may not have been built yet, check `pyramid.exists`.
+    Only the parameters that affect the STFT identify a pyramid; the
+    amplitude range and colormap are applied when rendering tiles.
+    """
+    settings = get_settings()
+    directory = settings.spectrogram_pyramid_dir
+    if directory is None:
+        directory = get_app_data_dir() / "spectrogram_pyramids"
+
+    payload = json.dumps(
+        [
+            recording.hash,
+            spectrogram_parameters.window_size,
+            spectrogram_parameters.overlap,
+            spectrogram_parameters.window,
+            spectrogram_parameters.channel,
+            settings.spectrogram_tile_width,
+            settings.spectrogram_pyramid_pooling,
+        ]
+    )
+    key = hashlib.sha256(payload.encode()).hexdigest()
+    return SpectrogramPyramid(Path(directory) / key[:2] / key)
+
+
+def build_recording_pyramid(
+    recording: schemas.Recording,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+) -> None:
+    """Build the tile pyramid of a recording.
+
+    This reads the whole recording and can take a while for long
+    recordings. Use `request_spectrogram_pyramid` to build it in the
+    background.
+    """
+    settings = get_settings()
+    pyramid = get_spectrogram_pyramid(recording, spectrogram_parameters)
+    if pyramid.exists:
+        return
+
+    nperseg, hop = stft_frame_sizes(
+        recording.samplerate,
+        spectrogram_parameters.window_size,
+        spectrogram_parameters.overlap,
+    )
+
+    with (
+        audio_api.open_audio_file(
+            audio_api.get_audio_path(recording, audio_dir),
+            recording_hash=recording.hash,
+        ) as source,
+        sf.SoundFile(source) as sf_file,
+    ):
+        build_spectrogram_pyramid(
+            pyramid.directory,
+            sf_file,
+            nperseg=nperseg,
+            hop=hop,
+            window=spectrogram_parameters.window,
+            channel=spectrogram_parameters.channel,
+            tile_width=settings.spectrogram_tile_width,
+            pooling=settings.spectrogram_pyramid_pooling,
+        )
+
+
+async def request_spectrogram_pyramid(
+    recording: schemas.Recording,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+) -> SpectrogramPyramid | None:
+    """Get the tile pyramid of a recording, building it if needed.
+
+    Returns
+    -------
+    SpectrogramPyramid | None
+        The pyramid if it has been built. Otherwise None is returned and
+        the pyramid is built in the CPU executor in the background.
+    """
+    pyramid = get_spectrogram_pyramid(recording, spectrogram_parameters)
+    if pyramid.exists:
+        return pyramid
+
+    if pyramid.directory not in _pyramid_builds:
+        task = asyncio.create_task(
+            run_in_process(
+                build_recording_pyramid,
+                recording,
+                spectrogram_parameters,
+                audio_dir=audio_dir,
+            )
+        )
+        _pyramid_builds[pyramid.directory] = task
+        task.add_done_callback(
+            lambda _: _pyramid_builds.pop(pyramid.directory, None)
+        )
+        task.add_done_callback(_log_pyramid_build_error)
+
+    return None
+
+
+def _log_pyramid_build_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(
+            "Failed to build spectrogram pyramid",
+            exc_info=task.exception(),
+        )
+
+
+def render_pyramid_tile(
+    pyramid: SpectrogramPyramid,
+    level: int,
+    index: int,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    image_parameters: schemas.ImageParameters | None = None,
+) -> bytes:
+    """Render a tile of a spectrogram pyramid as an image."""
+    try:
+        data = pyramid.tile(level, index)
+    except IndexError as error:
+        raise exceptions.NotFoundError(str(error)) from error
+
+    data = np.clip(
+        data,
+        spectrogram_parameters.min_dB,
+        spectrogram_parameters.max_dB,
+    )
+
+    if spectrogram_parameters.normalize:
+        data_min = data.min()
+        data_max = data.max()
+    else:
+        data_min = spectrogram_parameters.min_dB
+        data_max = spectrogram_parameters.max_dB
+
+    data_range = data_max - data_min
+    if data_range > 0:
+        data = (data - data_min) / data_range
+    else:
+        data = np.zeros_like(data)
+
+    return encode_spectrogram(data, spectrogram_parameters, image_parameters)
+
+
+async def get_spectrogram_tile(
+    recording: schemas.Recording,
+    level: int,
+    index: int,
+    spectrogram_parameters: schemas.SpectrogramParameters,
+    audio_dir: Path | None = None,
+    image_parameters: schemas.ImageParameters | None = None,
+) -> bytes | None:
+    """Get a tile of the spectrogram pyramid of a recording.
+
+    Parameters
+    ----------
+    recording
+        The recording.
+    level
+        Pyramid level, 0 being the finest resolution. Each level halves
+        the time resolution of the previous one.
+    index
+        Index of the tile within the level.
+    spectrogram_parameters
+        Spectrogram parameters.
+    audio_dir
+        The directory where the audio files are stored.
+    image_parameters
+        Image format and compression options. Defaults to PNG.
+
+    Returns
+    -------
+    bytes | None
+        The rendered tile, or None if the pyramid is still being built.
+
+    Raises
+    ------
+    NotFoundError
+        If the tile is outside of the pyramid.
+    """
+    pyramid = await request_spectrogram_pyramid(
+        recording,
+        spectrogram_parameters,
+        audio_dir=audio_dir,
     )
+    if pyramid is None:
+        return None
+
+    if image_parameters is None:
+        image_parameters = schemas.ImageParameters()
 
-    # Get the underlying numpy array.
-    array = spectrogram.data
+    key = hashlib.sha256(
+        json.dumps(
+            [
+                pyramid.directory.name,
+                level,
+                index,
+                spectrogram_parameters.model_dump(mode="json"),
+                image_parameters.model_dump(mode="json"),
+            ],
+            sort_keys=True,
+        ).encode()
+    ).hexdigest()
 
-    # Remove unncecessary dimensions.
-    return array.squeeze()
+    return await _get_or_render(
+        key,
+        render_pyramid_tile,
+        pyramid,
+        level,
+        index,
+        spectrogram_parameters,
+        image_parameters,
+    )
@@ -0,0 +1,146 @@
+"""API functions to get waveform overviews of recordings."""
+
+import asyncio
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+import whombat.api.audio as audio_api
+from whombat import schemas
+from whombat.core.waveforms import WaveformPyramid, build_waveform_pyramid
+from whombat.system import get_settings
+from whombat.system.data import get_app_data_dir
+from whombat.system.executors import run_in_process
+
+__all__ = [
+    "build_recording_waveform",
+    "get_waveform",
+    "get_waveform_pyramid",
+    "request_waveform_pyramid",
+]
+
+logger = logging.getLogger(__name__)
+
+_waveform_builds: dict[Path, asyncio.Task] = {}
+"""Waveform pyramid builds running in the background, by path."""
+
+
+@lru_cache(maxsize=1024)
+def get_waveform_pyramid(recording_hash: str) -> WaveformPyramid:
+    """Get the waveform envelope pyramid of a recording by its hash.
+
+    The pyramid may not have been built yet, check `pyramid.exists`.
+    Pyramids are cached so their files are only opened once.
+    """
+    directory = get_settings().waveform_dir
+    if directory is None:
+        directory = get_app_data_dir() / "waveforms"
+
+    return WaveformPyramid(
+        Path(directory) / recording_hash[:2] / recording_hash
+    )
+
+
+def build_recording_waveform(
+    recording: schemas.Recording,
+    audio_dir: Path | None = None,
+) -> None:
+    """Build the waveform pyramid of a recording.
+
+    This reads the whole recording. Use `request_waveform_pyramid` to
+    build it in the background.
+    """
+    pyramid = get_waveform_pyramid(recording.hash)
+    if pyramid.exists:
+        return
+
+    with audio_api.open_sound_file(
+        audio_api.get_audio_path(recording, audio_dir),
+        recording_hash=recording.hash,
+    ) as source:
+        build_waveform_pyramid(
+            pyramid.path,
+            source,
+            bin_size=get_settings().waveform_bin_size,
+        )
+
+
+async def request_waveform_pyramid(
+    recording: schemas.Recording,
+    audio_dir: Path | None = None,
+) -> WaveformPyramid | None:
+    """Get the waveform pyramid of a recording, building it if needed.
+
+    Pyramids are not built on ingestion, to read each file only once
+    while registering it. They are built the first time they are needed.
+
+    Returns
+    -------
+    WaveformPyramid | None
+        The pyramid if it has been built. Otherwise None is returned and
+        the pyramid is built in the CPU executor in the background.
+    """
+    pyramid = get_waveform_pyramid(recording.hash)
+    if pyramid.exists:
+        return pyramid
+
+    if pyramid.path not in _waveform_builds:
+        task = asyncio.create_task(
+            run_in_process(
+                build_recording_waveform,
+                recording,
+                audio_dir=audio_dir,
+            )
+        )
+        _waveform_builds[pyramid.path] = task
+        task.add_done_callback(
+            lambda _: _waveform_builds.pop(pyramid.path, None)
+        )
+        task.add_done_callback(_log_waveform_build_error)
+
+    return None
+
+
+def _log_waveform_build_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(
+            "Failed to build waveform pyramid",
+            exc_info=task.exception(),
+        )
+
+
+def get_waveform(
+    pyramid: WaveformPyramid,
+    recording: schemas.Recording,
+    start_time: float,
+    end_time: float,
+    width: int,
+) -> schemas.Waveform:
+    """Get the waveform envelope of a window of a recording.
+
+    Parameters
+    ----------
+    pyramid
+        The waveform pyramid of the recording.
+    recording
+        The recording.
+    start_time
+        Start time in seconds.
+    end_time
+        End time in seconds.
+    width
+        Number of columns of the envelope, usually the width in pixels of
+        the waveform drawing.
+    """
+    envelope = pyramid.envelope(
+        start_frame=int(start_time * recording.samplerate),
+        end_frame=int(end_time * recording.samplerate),
+        width=width,
+    )
+    return schemas.Waveform(
+        start_time=start_time,
+        end_time=end_time,
+        min=envelope.min.tolist(),
+        max=envelope.max.tolist(),
+        rms=envelope.rms.tolist(),
+    )
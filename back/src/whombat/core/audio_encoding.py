@@ -0,0 +1,209 @@
+"""Functions to encode audio for playback and download.
+
+Uncompressed 16-bit WAV is simple to serve in ranges but uses much more
+bandwidth than needed to listen to a recording. FLAC halves the size
+without losing information, and the lossy Vorbis and Opus codecs make
+it about ten times smaller.
+
+Lossy codecs only support the sample rates that are relevant for
+listening, so audio is resampled before being encoded with them. The
+sample rate given to the encoder is the rate at which the audio should
+be played back, which is how slowed down or time expanded audio is
+handled.
+"""
+
+import io
+from collections.abc import Iterable
+from dataclasses import dataclass
+from fractions import Fraction
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+import soundfile as sf
+from scipy import signal
+
+__all__ = [
+    "AudioCodecInfo",
+    "CODECS",
+    "encode_audio",
+    "encode_audio_blocks",
+    "get_encoding_samplerate",
+]
+
+
+@dataclass(frozen=True)
+class AudioCodecInfo:
+    """How audio is written with a codec."""
+
+    format: str
+    """Container format, as understood by soundfile."""
+
+    subtype: str
+    """Codec, as understood by soundfile."""
+
+    media_type: str
+    """Media type of the encoded audio."""
+
+    extension: str
+    """File extension of the encoded audio."""
+
+    max_samplerate: int
+    """Highest sample rate the codec is used with."""
+
+    samplerates: tuple[int, ...] | None = None
+    """Sample rates supported by the codec, or None if any rate below
+    `max_samplerate` is supported."""
+
+
+CODECS: dict[str, AudioCodecInfo] = {
+    "wav": AudioCodecInfo(
+        format="WAV",
+        subtype="PCM_16",
+        media_type="audio/wav",
+        extension="wav",
+        max_samplerate=2**32 - 1,
+    ),
+    "flac": AudioCodecInfo(
+        format="FLAC",
+        subtype="PCM_16",
+        media_type="audio/flac",
+        extension="flac",
+        max_samplerate=655_350,
+    ),
+    "vorbis": AudioCodecInfo(
+        format="OGG",
+        subtype="VORBIS",
+        media_type="audio/ogg",
+        extension="ogg",
+        max_samplerate=48_000,
+    ),
+    "opus": AudioCodecInfo(
+        format="OGG",
+        subtype="OPUS",
+        media_type="audio/ogg",
+        extension="opus",
+        max_samplerate=48_000,
+        samplerates=(8_000, 12_000, 16_000, 24_000, 48_000),
+    ),
+}
+"""Supported codecs by name."""
+
+
+def get_encoding_samplerate(codec: str, samplerate: int) -> int:
+    """Return the sample rate at which audio is encoded with a codec.
+
+    Parameters
+    ----------
+    codec
+        Name of the codec.
+    samplerate
+        Playback sample rate of the audio.
+
+    Returns
+    -------
+    int
+        The playback sample rate if the codec supports it. Otherwise the
+        closest supported rate that does not lose bandwidth, or the
+        highest supported rate.
+    """
+    info = CODECS[codec]
+    samplerate = min(samplerate, info.max_samplerate)
+
+    if info.samplerates is None:
+        return samplerate
+
+    for supported in info.samplerates:
+        if supported >= samplerate:
+            return supported
+
+    return info.samplerates[-1]
+
+
+def encode_audio(
+    data: np.ndarray,
+    samplerate: int,
+    codec: str = "wav",
+) -> bytes:
+    """Encode audio with a codec.
+
+    Parameters
+    ----------
+    data
+        Audio samples of shape `(frames, channels)` with values between
+        -1 and 1.
+    samplerate
+        Playback sample rate of the audio.
+    codec
+        Name of the codec. See `CODECS`.
+
+    Returns
+    -------
+    bytes
+        The encoded audio file.
+    """
+    info = CODECS[codec]
+    target = get_encoding_samplerate(codec, samplerate)
+
+    if target != samplerate:
+        ratio = Fraction(target, samplerate).limit_denominator(1000)
+        data = signal.resample_poly(
+            data,
+            ratio.numerator,
+            ratio.denominator,
+            axis=0,
+        )
+
+    # NOTE: libsndfile wraps around, instead of clipping, values outside
+    # of [-1, 1] when writing integer samples.
+    data = np.clip(data, -1, 1)
+
+    buffer = io.BytesIO()
+    sf.write(
+        buffer,
+        data,
+        target,
+        format=info.format,
+        subtype=info.subtype,
+    )
+    return buffer.getvalue()
+
+
+def encode_audio_blocks(
+    blocks: Iterable[np.ndarray],
+    output: Path | BinaryIO,
+    samplerate: int,
+    channels: int,
+    codec: str = "wav",
+) -> None:
+    """Encode audio given in consecutive blocks to a file.
+
+    Only one block is held in memory at a time. Unlike `encode_audio`,
+    the audio is not resampled, so it must already be at a sample rate
+    supported by the codec, see `get_encoding_samplerate`.
+
+    Parameters
+    ----------
+    blocks
+        Consecutive blocks of audio of shape `(frames, channels)`.
+    output
+        Path or seekable file to write the encoded audio to.
+    samplerate
+        Sample rate at which the audio is encoded.
+    channels
+        Number of channels of the audio.
+    codec
+        Name of the codec. See `CODECS`.
+    """
+    info = CODECS[codec]
+    with sf.SoundFile(
+        output,
+        mode="w",
+        samplerate=samplerate,
+        channels=channels,
+        format=info.format,
+        subtype=info.subtype,
+    ) as encoder:
+        for block in blocks:
+            # NOTE: See `encode_audio`.
+            encoder.write(np.clip(block, -1, 1))
@@ -0,0 +1,203 @@
+"""Block-wise audio processing with bounded memory.
+
+Resampling and filtering a whole clip at once needs several copies of
+the clip in memory, which is a problem for long, high sample rate
+recordings. The functions in this module process audio in fixed-size
+blocks instead, so memory usage does not depend on the clip length.
+
+Each output block is computed from the input block that produces it plus
+enough context on both sides for the polyphase resampler and the
+zero-phase filter to settle. The context is then discarded. At the
+start and end of the clip there is no context to read, and the edges
+are handled exactly as if the whole clip had been processed at once.
+"""
+
+import math
+from collections.abc import Callable, Iterator
+from fractions import Fraction
+
+import numpy as np
+from scipy import signal
+
+__all__ = [
+    "design_filter",
+    "get_filter_margin",
+    "get_output_frames",
+    "iter_processed_blocks",
+]
+
+RESAMPLE_WINDOW = ("kaiser", 5.0)
+"""Window of the anti-aliasing filter, as in `scipy.signal.resample_poly`."""
+
+
+def design_filter(
+    samplerate: int,
+    low_freq: float | None = None,
+    high_freq: float | None = None,
+    order: int = 5,
+) -> np.ndarray:
+    """Design a Butterworth band, low or high pass filter.
+
+    Returns
+    -------
+    np.ndarray
+        The filter in second-order sections.
+    """
+    if low_freq is None and high_freq is None:
+        raise ValueError(
+            "At least one of low_freq and high_freq must be specified."
+        )
+
+    if low_freq is None:
+        return signal.butter(
+            order,
+            high_freq,
+            btype="lowpass",
+            output="sos",
+            fs=samplerate,
+        )
+
+    if high_freq is None:
+        return signal.butter(
+            order,
+            low_freq,
+            btype="highpass",
+            output="sos",
+            fs=samplerate,
+        )
+
+    if low_freq > high_freq:
+        raise ValueError("low_freq must be less than high_freq.")
+
+    return signal.butter(
+        order,
+        [low_freq, high_freq],
+        btype="bandpass",
+        output="sos",
+        fs=samplerate,
+    )
+
+
+def get_filter_margin(
+    samplerate: int,
+    low_freq: float | None = None,
+    high_freq: float | None = None,
+    periods: int = 10,
+) -> int:
+    """Number of frames of context needed to filter a block.
+
+    The impulse response of a Butterworth filter decays within a few
+    periods of its lowest cutoff frequency. With the default of 10
+    periods, blocks match the whole clip filtered at once to within
+    1e-8.
+    """
+    cutoffs = [freq for freq in (low_freq, high_freq) if freq]
+    if not cutoffs:
+        return 0
+    return math.ceil(periods * samplerate / min(cutoffs))
+
+
+def get_output_frames(
+    frames: int,
+    samplerate: int,
+    target_samplerate: int | None = None,
+) -> int:
+    """Number of frames of a clip after resampling."""
+    if target_samplerate is None:
+        return frames
+    return int(frames * target_samplerate / samplerate)
+
+
+def iter_processed_blocks(
+    read: Callable[[int, int], np.ndarray],
+    frames: int,
+    samplerate: int,
+    target_samplerate: int | None = None,
+    sos: np.ndarray | None = None,
+    filter_margin: int = 0,
+    block_size: int = 65_536,
+) -> Iterator[np.ndarray]:
+    """Resample and filter a clip in blocks.
+
+    Parameters
+    ----------
+    read
+        Function returning `frames` frames of the clip starting at a
+        given offset, as an array of shape `(frames, channels)`.
+    frames
+        Number of frames of the clip.
+    samplerate
+        Sample rate of the clip.
+    target_samplerate
+        Sample rate to resample to. If None the clip is not resampled.
+    sos
+        Filter, in second-order sections, applied forwards and backwards
+        after resampling. If None the clip is not filtered.
+    filter_margin
+        Number of output frames of context used on each side of a block
+        when filtering. It should cover the impulse response of the
+        filter.
+    block_size
+        Approximate number of output frames in each block.
+
+    Yields
+    ------
+    np.ndarray
+        Consecutive blocks of processed audio of shape
+        `(frames, channels)`. In total `get_output_frames` frames are
+        yielded.
+    """
+    up, down = 1, 1
+    window = None
+    half_len = 0
+    if target_samplerate is not None and target_samplerate != samplerate:
+        ratio = Fraction(target_samplerate, samplerate)
+        up, down = ratio.numerator, ratio.denominator
+        half_len = 10 * max(up, down)
+        window = signal.firwin(
+            2 * half_len + 1,
+            1 / max(up, down),
+            window=RESAMPLE_WINDOW,
+        )
+
+    total = get_output_frames(frames, samplerate, target_samplerate)
+
+    if sos is None:
+        filter_margin = 0
+
+    # Context, in input frames, needed so that the kept output frames do
+    # not depend on the edges of the block. It is a multiple of `down`
+    # so blocks start on input frames that map to whole output frames.
+    context = math.ceil(half_len / up) + math.ceil(filter_margin * down / up)
+    context = -(-context // down) * down
+
+    block_size = max(-(-block_size // up) * up, up)
+
+    for start in range(0, total, block_size):
+        end = min(start + block_size, total)
+
+        # Input frames that produce the output frames of the block.
+        first = start * down // up
+        last = min(-(-end * down // up), frames)
+
+        read_start = max(first - context, 0)
+        read_end = min(last + context, frames)
+        block = read(read_start, read_end - read_start)
+
+        offset = read_start * up // down
+
+        if window is not None:
+            block = signal.resample_poly(
+                block,
+                up,
+                down,
+                axis=0,
+                window=window,
+            )
+            # The last output frame may be past the end of the clip.
+            block = block[: total - offset]
+
+        if sos is not None:
+            block = signal.sosfiltfilt(sos, block, axis=0)
+
+        yield block[start - offset : end - offset]
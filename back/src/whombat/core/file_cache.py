@@ -0,0 +1,248 @@
+"""Content-addressed on-disk cache of files.
+
+Used to keep local copies of recordings stored in remote object storage,
+keyed by their content hash, and to store rendered spectrogram tiles, so
+repeated access reads a local file instead of fetching or computing it
+again.
+
+The cache keeps no in-memory index: the file system is the source of
+truth, which makes it safe to share the cache directory between worker
+processes. Files are written atomically (write to a temporary file, then
+rename) and the modification time of each file is updated on access to
+implement least-recently-used eviction.
+"""
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "CacheStats",
+    "FileCache",
+]
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+_TMP_PREFIX = ".tmp-"
+
+
+@contextmanager
+def _atomic_write(path: Path) -> Iterator[Path]:
+    """Yield a temporary path that is renamed to `path` on success."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=_TMP_PREFIX)
+    os.close(fd)
+    tmp_path = Path(tmp)
+
+    try:
+        yield tmp_path
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class CacheStats:
+    """Usage statistics of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class FileCache:
+    """Local LRU cache of files keyed by content hash.
+
+    Parameters
+    ----------
+    directory
+        Directory where cached files are stored. It is created if it does
+        not exist.
+    max_size
+        Maximum total size of the cached files in bytes. When exceeded,
+        the least recently used files are removed.
+    """
+
+    def __init__(self, directory: Path, max_size: int):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._estimated_size: int | None = None
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        """Return the location of a key in the cache."""
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid cache key: {key!r}")
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> Path | None:
+        """Return the cached file for a key, or None if not cached."""
+        path = self.path_for(key)
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return path
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[Path], object],
+    ) -> Path:
+        """Return the cached file for a key, fetching it if missing.
+
+        Concurrent callers asking for the same key within this process
+        wait for a single fetch to complete.
+
+        Parameters
+        ----------
+        key
+            The content hash of the file.
+        fetch
+            Function that writes the file contents to the given path.
+
+        Returns
+        -------
+        Path
+            Location of the cached file.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        with self._get_lock(key):
+            # Another thread might have fetched the file while we waited.
+            path = self.path_for(key)
+            if path.is_file():
+                return path
+
+            with _atomic_write(path) as tmp_path:
+                fetch(tmp_path)
+
+        self._register(path)
+        return path
+
+    def put_file(self, key: str, source: Path) -> Path:
+        """Move an existing file into the cache.
+
+        The source file is consumed. If the key is already cached the
+        source file is left untouched.
+        """
+        path = self.path_for(key)
+        if path.is_file():
+            return path
+
+        with self._get_lock(key), _atomic_write(path) as tmp_path:
+            shutil.move(source, tmp_path)
+
+        self._register(path)
+        return path
+
+    def read_bytes(self, key: str) -> bytes | None:
+        """Return the contents cached for a key, or None if not cached."""
+        path = self.get(key)
+        if path is None:
+            return None
+
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            # Evicted by another process in the meantime.
+            return None
+
+    def put_bytes(self, key: str, content: bytes) -> Path:
+        """Store the given contents under a key."""
+        path = self.path_for(key)
+        with _atomic_write(path) as tmp_path:
+            tmp_path.write_bytes(content)
+
+        self._register(path)
+        return path
+
+    def size(self) -> int:
+        """Total size in bytes of the cached files."""
+        return sum(size for _, size, _ in self._scan())
+
+    def entries(self) -> int:
+        """Number of cached files."""
+        return len(self._scan())
+
+    def clear(self) -> None:
+        """Remove all cached files."""
+        for path, _, _ in self._scan():
+            path.unlink(missing_ok=True)
+        self._estimated_size = 0
+
+    def _get_lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _scan(self) -> list[tuple[Path, int, float]]:
+        files = []
+        for shard in self.directory.iterdir():
+            if not shard.is_dir():
+                continue
+
+            for entry in os.scandir(shard):
+                if entry.name.startswith(_TMP_PREFIX) or not entry.is_file():
+                    continue
+
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                files.append((Path(entry.path), stat.st_size, stat.st_mtime))
+        return files
+
+    def _register(self, path: Path) -> None:
+        # NOTE: The total size is tracked incrementally so that the cache
+        # directory is only scanned when the budget might be exceeded.
+        if self._estimated_size is None:
+            self._estimated_size = self.size()
+        else:
+            self._estimated_size += path.stat().st_size
+
+        if self._estimated_size > self.max_size:
+            self._enforce_budget(keep=path)
+
+    def _enforce_budget(self, keep: Path | None = None) -> None:
+        files = self._scan()
+        total = sum(size for _, size, _ in files)
+        self._estimated_size = total
+        if total <= self.max_size:
+            return
+
+        for path, size, _ in sorted(files, key=lambda x: x[2]):
+            if total <= self.max_size:
+                break
+
+            if path == keep:
+                continue
+
+            path.unlink(missing_ok=True)
+            total -= size
+            self._estimated_size = total
+            self.stats.evictions += 1
+            logger.debug("Evicted %s from %s", path.name, self.directory)
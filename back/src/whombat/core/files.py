@@ -1,24 +1,93 @@
-"""File handling functions."""
+"""File handling functions.
 
+Registering a recording requires its hash and its media information.
+Both are obtained in a single pass over the file: the blocks that are read
+to compute the hash are also used to parse the header, so files on
+network filesystems are only read once.
+
+The hash algorithm can be chosen. MD5 is the default, as it is the hash
+used by soundevent and by existing databases. BLAKE2b, and xxHash when the
+`xxhash` package is installed, are faster to compute. For very large
+archives a quick hash can be used instead, which only reads a fixed number
+of blocks spread over the file.
+
+The same functions work on any seekable file object, so the media
+information of remote files can be read from their first bytes only.
+"""
+
+import hashlib
 import logging
+import os
+import struct
+from collections.abc import Iterator
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import BinaryIO, Literal, Protocol, get_args
 
 from soundevent.audio import (
     MediaInfo,
-    compute_md5_checksum,
     get_media_info,
     is_audio_file,
 )
 
+from whombat.core.manifest import FileStat
+from whombat.core.wav import WAVE_FORMAT_IEEE_FLOAT, parse_wav_header
+
 logger = logging.getLogger(__name__)
 
 __all__ = [
+    "ETAG_HASH_ALGORITHM",
+    "HashAlgorithm",
+    "ObjectHashAlgorithm",
+    "compute_hash",
     "get_audio_files_in_folder",
     "get_file_info",
+    "get_hash_name",
+    "hash_file_object",
+    "parse_hash_name",
+    "read_media_info",
+    "scan_audio_files",
     "FileInfo",
 ]
 
+HashAlgorithm = Literal["md5", "blake2b", "xxh3_128"]
+"""Algorithms that can be used to hash recordings."""
+
+ObjectHashAlgorithm = Literal["sha256", "etag"]
+"""Algorithms of hashes taken from the metadata of objects in S3.
+
+SHA-256 checksums are digests of the whole content, so they can also be
+computed from a file. ETags cannot.
+"""
+
+ETAG_HASH_ALGORITHM = "etag"
+"""Name stored as the hash algorithm of hashes taken from opaque ETags."""
+
+BLOCK_SIZE = 64 * 1024
+"""Size of the blocks in which files are read."""
+
+QUICK_HASH_BLOCKS = 16
+"""Number of blocks read to compute a quick hash."""
+
+_PCM_SUBTYPES = {
+    8: "PCM_U8",
+    16: "PCM_16",
+    24: "PCM_24",
+    32: "PCM_32",
+}
+
+_FLOAT_SUBTYPES = {
+    32: "FLOAT",
+    64: "DOUBLE",
+}
+
+
+class _Hasher(Protocol):
+    def update(self, data: bytes, /) -> None: ...
+
+    def hexdigest(self) -> str: ...
+
 
 def get_audio_files_in_folder(
     audio_dir: Path, relative: bool = True
@@ -46,32 +115,192 @@ def get_audio_files_in_folder(
     ]
 
 
+def scan_audio_files(directory: Path) -> Iterator[FileStat]:
+    """List the audio files in a directory recursively with their stats.
+
+    Only the directory entries are read, the files are not opened.
+
+    Parameters
+    ----------
+    directory: Path
+        Path to the directory containing the audio files.
+
+    Yields
+    ------
+    stat: FileStat
+        Size and modification time of each audio file. Paths are relative
+        to the directory and use forward slashes.
+    """
+    pending = [directory]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    pending.append(Path(entry.path))
+                    continue
+
+                if not entry.is_file() or not is_audio_file(entry.path):
+                    continue
+
+                stat = entry.stat()
+                yield FileStat(
+                    path=Path(entry.path).relative_to(directory).as_posix(),
+                    size=stat.st_size,
+                    mtime=stat.st_mtime,
+                )
+
+
 @dataclass
 class FileInfo:
     path: Path
     exists: bool
     is_audio: bool = False
     hash: str | None = None
+    hash_algorithm: str | None = None
     media_info: MediaInfo | None = None
 
 
-def get_file_info(path: Path) -> FileInfo:
+def get_hash_name(algorithm: HashAlgorithm, quick: bool = False) -> str:
+    """Get the name under which a hash algorithm is stored.
+
+    Quick hashes are stored with a `-quick` suffix, e.g. `blake2b-quick`.
+    """
+    if quick:
+        return f"{algorithm}-quick"
+    return algorithm
+
+
+def parse_hash_name(
+    name: str,
+) -> tuple[HashAlgorithm | ObjectHashAlgorithm, bool]:
+    """Get the algorithm and hashing mode from a stored hash name.
+
+    Hashes taken from the metadata of S3 objects are never quick hashes.
+
+    Raises
+    ------
+    ValueError
+        If the name does not correspond to a supported algorithm.
+    """
+    if name in get_args(ObjectHashAlgorithm):
+        return name, False  # type: ignore
+
+    algorithm, _, mode = name.partition("-")
+    if algorithm not in get_args(HashAlgorithm) or mode not in ("", "quick"):
+        raise ValueError(f"Unknown hash algorithm: {name}")
+    return algorithm, mode == "quick"  # type: ignore
+
+
+def compute_hash(
+    path: Path,
+    algorithm: HashAlgorithm | ObjectHashAlgorithm = "md5",
+    quick: bool = False,
+) -> str:
+    """Compute the hash of a file.
+
+    Parameters
+    ----------
+    path: Path
+        Path to the file.
+    algorithm: HashAlgorithm | ObjectHashAlgorithm, optional
+        The hash algorithm to use. By default "md5". The SHA-256 checksum
+        of S3 objects can be computed too, but not their ETag.
+    quick: bool, optional
+        If True, only a sample of the file is hashed. By default False.
+
+    Returns
+    -------
+    hash: str
+        The hexadecimal digest of the file.
+    """
+    size = path.stat().st_size
+    with open(path, "rb") as fp:
+        return hash_file_object(fp, size, algorithm, quick=quick)
+
+
+def hash_file_object(
+    fp: BinaryIO,
+    size: int,
+    algorithm: HashAlgorithm | ObjectHashAlgorithm = "md5",
+    quick: bool = False,
+) -> str:
+    """Compute the hash of an open binary file.
+
+    The file is read from the start, whatever its current position.
+
+    Parameters
+    ----------
+    fp: BinaryIO
+        A seekable file object opened in binary mode.
+    size: int
+        Size of the file in bytes.
+    algorithm: HashAlgorithm | ObjectHashAlgorithm, optional
+        The hash algorithm to use. By default "md5". The SHA-256 checksum
+        of S3 objects can be computed too, but not their ETag.
+    quick: bool, optional
+        If True, only a sample of the file is hashed. By default False.
+
+    Returns
+    -------
+    hash: str
+        The hexadecimal digest of the file.
+    """
+    hasher = _create_hasher(algorithm)
+    fp.seek(0)
+    _update_hash(hasher, fp, fp.read(BLOCK_SIZE), size, quick)
+    return hasher.hexdigest()
+
+
+def read_media_info(fp: BinaryIO, size: int) -> MediaInfo | None:
+    """Get the media info of an open audio file reading as little as possible.
+
+    The header of WAV files is parsed from the first block of the file.
+    Other files are probed with soundfile, which only reads the parts of
+    the file it needs.
+
+    Parameters
+    ----------
+    fp: BinaryIO
+        A seekable file object opened in binary mode.
+    size: int
+        Size of the file in bytes.
+
+    Returns
+    -------
+    media_info: MediaInfo | None
+        The media info of the file, or None if it could not be read.
+    """
+    fp.seek(0)
+    header = fp.read(BLOCK_SIZE)
+    return _probe_media_info(fp, header, size)
+
+
+def get_file_info(
+    path: Path,
+    algorithm: HashAlgorithm = "md5",
+    quick: bool = False,
+) -> FileInfo:
     """Get information about a file.
 
     This function will gather the following information about the file:
 
     - If the file exists.
     - If the file is an audio file.
-    - The SHA256 hash of the file.
+    - The hash of the file.
     - Information about the media file (duration, samplerate, etc).
 
     The hash and media information will only be computed if the file exists and
-    is an audio file.
+    is an audio file. They are computed while reading the file once.
 
     Parameters
     ----------
     path: Path
         Path to the file.
+    algorithm: HashAlgorithm, optional
+        The hash algorithm to use. By default "md5".
+    quick: bool, optional
+        If True, compute a quick hash that only reads a sample of the file.
+        By default False.
 
     Returns
     -------
@@ -88,23 +317,112 @@ def get_file_info(path: Path) -> FileInfo:
         logger.warning(f"File is not an audio file: {path}")
         return FileInfo(path=path, exists=True, is_audio=False)
 
-    logger.debug(f"Computing hash of file: {path}")
-    hash = compute_md5_checksum(path)
-    logger.debug("done")
+    size = path.stat().st_size
+    hasher = _create_hasher(algorithm)
 
-    try:
-        logger.debug(f"Getting media info of file: {path}")
-        media_info = get_media_info(path)
-        logger.debug("done")
-    except ValueError:
-        logger.warning(f"Could not get media info of file: {path}")
-        media_info = None
+    logger.debug(f"Computing hash and media info of file: {path}")
+    with open(path, "rb") as fp:
+        header = fp.read(BLOCK_SIZE)
+        _update_hash(hasher, fp, header, size, quick)
+        media_info = _probe_media_info(fp, header, size)
 
     logger.debug(f"Finished getting information about file: {path}")
     return FileInfo(
         path=path,
         exists=True,
         is_audio=True,
-        hash=hash,
+        hash=hasher.hexdigest(),
+        hash_algorithm=get_hash_name(algorithm, quick),
         media_info=media_info,
     )
+
+
+def _create_hasher(algorithm: str) -> _Hasher:
+    if algorithm == "md5":
+        return hashlib.md5()
+
+    if algorithm == "sha256":
+        return hashlib.sha256()
+
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+
+    if algorithm == "xxh3_128":
+        try:
+            import xxhash
+        except ImportError as error:
+            raise ImportError(
+                "The xxh3_128 hash algorithm requires the xxhash package. "
+                "Install it with `pip install xxhash`."
+            ) from error
+        return xxhash.xxh3_128()
+
+    raise ValueError(f"Unknown hash algorithm: {algorithm}")
+
+
+def _update_hash(
+    hasher: _Hasher,
+    fp: BinaryIO,
+    header: bytes,
+    size: int,
+    quick: bool,
+) -> None:
+    """Feed a file to a hasher, given the block already read from it."""
+    if quick:
+        hasher.update(struct.pack("<Q", size))
+
+    hasher.update(header)
+
+    if quick and size > QUICK_HASH_BLOCKS * BLOCK_SIZE:
+        # A quick hash covers the size of the file and blocks spaced
+        # evenly between its start and its end. Files whose sampled blocks
+        # are equal get the same hash even if they differ elsewhere.
+        step = (size - BLOCK_SIZE) / (QUICK_HASH_BLOCKS - 1)
+        for index in range(1, QUICK_HASH_BLOCKS):
+            fp.seek(round(index * step))
+            hasher.update(fp.read(BLOCK_SIZE))
+        return
+
+    for block in iter(partial(fp.read, BLOCK_SIZE), b""):
+        hasher.update(block)
+
+
+def _probe_media_info(
+    fp: BinaryIO,
+    header: bytes,
+    size: int,
+) -> MediaInfo | None:
+    """Get the media info of a file given the first block read from it."""
+    media_info = _parse_media_info(header, size)
+    if media_info is not None:
+        return media_info
+
+    # The header could not be parsed from the first block, so let
+    # soundfile read it from the open file.
+    try:
+        fp.seek(0)
+        return get_media_info(fp)  # type: ignore
+    except ValueError:
+        name = getattr(fp, "name", fp)
+        logger.warning(f"Could not get media info of file: {name}")
+        return None
+
+
+def _parse_media_info(header: bytes, size: int) -> MediaInfo | None:
+    """Get the media info of a WAV file from its first bytes."""
+    layout = parse_wav_header(header, size)
+    if layout is None or layout.samplerate == 0:
+        return None
+
+    subtypes = _PCM_SUBTYPES
+    if layout.format == WAVE_FORMAT_IEEE_FLOAT:
+        subtypes = _FLOAT_SUBTYPES
+
+    return MediaInfo(
+        samplerate_hz=layout.samplerate,
+        duration_s=layout.frames / layout.samplerate,
+        samples=layout.frames,
+        channels=layout.channels,
+        format="WAVEX" if layout.extensible else "WAV",
+        subtype=subtypes[layout.bits_per_sample],
+    )
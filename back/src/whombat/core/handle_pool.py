@@ -0,0 +1,355 @@
+"""Pool of open audio file handles.
+
+The browser plays recordings through a sequence of small HTTP Range
+requests. Opening the audio file for each of them means parsing its
+header (and, for files in object storage, issuing extra requests) every
+few hundred milliseconds of playback.
+
+The pool keeps decoder handles open between requests, keyed by the
+audio file and the stream reading it, so that consecutive requests of
+the same stream reuse the same handle. Handles are closed when they have
+been idle for too long, or when the pool is full and they are the least
+recently used.
+
+After serving a read, the pool can also decode the following chunk in
+the background. When the next request asks for exactly that chunk it is
+served from memory, hiding the decoding latency from playback.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from concurrent.futures import Future
+from contextlib import AbstractContextManager, ExitStack, contextmanager
+from dataclasses import dataclass
+
+import numpy as np
+import soundfile as sf
+
+from whombat.core.file_cache import CacheStats
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "AudioHandle",
+    "AudioHandlePool",
+]
+
+
+@dataclass
+class _Prefetch:
+    offset: int
+    frames: int
+    future: Future
+
+
+class AudioHandle:
+    """An open audio file shared by the requests of a stream.
+
+    Parameters
+    ----------
+    key
+        Key of the handle in the pool.
+    opener
+        Function returning a context manager that yields the open file.
+    """
+
+    def __init__(
+        self,
+        key: Hashable,
+        opener: Callable[[], AbstractContextManager[sf.SoundFile]],
+    ):
+        self.key = key
+        self._stack = ExitStack()
+        self.file: sf.SoundFile = self._stack.enter_context(opener())
+        self.last_used = time.monotonic()
+        self.users = 0
+        """Number of readers currently holding the handle."""
+
+        self._lock = threading.Lock()
+        self._prefetch: _Prefetch | None = None
+
+    @property
+    def samplerate(self) -> int:
+        """Sample rate of the audio file."""
+        return self.file.samplerate
+
+    @property
+    def channels(self) -> int:
+        """Number of channels of the audio file."""
+        return self.file.channels
+
+    @property
+    def frames(self) -> int:
+        """Number of frames of the audio file."""
+        return self.file.frames
+
+    def read(self, offset: int, frames: int) -> np.ndarray:
+        """Read frames from the file.
+
+        Frames past the end of the file are filled with zeros.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape `(frames, channels)`.
+        """
+        with self._lock:
+            self.file.seek(offset)
+            return self.file.read(frames, fill_value=0, always_2d=True)
+
+    def close(self) -> None:
+        """Close the file."""
+        with self._lock:
+            self._stack.close()
+
+
+class AudioHandlePool:
+    """Bounded LRU pool of open audio handles with read-ahead.
+
+    Parameters
+    ----------
+    max_handles
+        Maximum number of open handles. Handles in use are never closed,
+        so the pool may briefly hold more under heavy load.
+    idle_timeout
+        Seconds after which an unused handle is closed.
+    submit
+        Function used to schedule prefetches in the background, such as
+        the `submit` method of an executor. If None, nothing is
+        prefetched.
+    """
+
+    def __init__(
+        self,
+        max_handles: int = 64,
+        idle_timeout: float = 30,
+        submit: Callable[..., Future] | None = None,
+    ):
+        self.max_handles = max_handles
+        self.idle_timeout = idle_timeout
+        self.submit = submit
+        self.stats = CacheStats()
+        """Handle reuses (hits), opens (misses) and evictions."""
+
+        self.prefetch_hits = 0
+        """Number of reads served from a prefetched chunk."""
+
+        self._handles: OrderedDict[Hashable, AudioHandle] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    @contextmanager
+    def acquire(
+        self,
+        key: Hashable,
+        opener: Callable[[], AbstractContextManager[sf.SoundFile]],
+    ) -> Iterator[AudioHandle]:
+        """Get the handle stored under a key, opening it if missing.
+
+        Parameters
+        ----------
+        key
+            Identifies the file and the stream reading it.
+        opener
+            Function returning a context manager that yields the open
+            file. Only called if there is no handle for the key.
+        """
+        handle = self._checkout(key, opener)
+        try:
+            yield handle
+        finally:
+            self._checkin(handle)
+
+    def read(
+        self,
+        handle: AudioHandle,
+        offset: int,
+        frames: int,
+    ) -> np.ndarray:
+        """Read frames from a handle and prefetch the following chunk.
+
+        Parameters
+        ----------
+        handle
+            A handle obtained with `acquire`.
+        offset
+            First frame to read.
+        frames
+            Number of frames to read.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape `(frames, channels)`.
+        """
+        data = self._take_prefetched(handle, offset, frames)
+        if data is None:
+            data = handle.read(offset, frames)
+
+        next_offset = offset + frames
+        if (
+            self.submit is not None
+            and frames > 0
+            and next_offset < handle.frames
+        ):
+            self._schedule_prefetch(handle, next_offset, frames)
+
+        return data
+
+    def evict_idle(self) -> int:
+        """Close handles that have been unused for longer than the timeout.
+
+        Returns
+        -------
+        int
+            Number of closed handles.
+        """
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            expired = [
+                handle
+                for handle in self._handles.values()
+                if handle.users == 0 and handle.last_used < deadline
+            ]
+            for handle in expired:
+                del self._handles[handle.key]
+
+        self._close(expired)
+        return len(expired)
+
+    def clear(self) -> None:
+        """Close all handles that are not in use."""
+        with self._lock:
+            idle = [h for h in self._handles.values() if h.users == 0]
+            for handle in idle:
+                del self._handles[handle.key]
+
+        self._close(idle)
+
+    def _checkout(
+        self,
+        key: Hashable,
+        opener: Callable[[], AbstractContextManager[sf.SoundFile]],
+    ) -> AudioHandle:
+        self.evict_idle()
+
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                self._handles.move_to_end(key)
+                handle.users += 1
+                self.stats.hits += 1
+                return handle
+
+        # NOTE: Opening the file may be slow (e.g. for files in object
+        # storage) so it is done without holding the pool lock.
+        handle = AudioHandle(key, opener)
+        self.stats.misses += 1
+        evicted = []
+
+        with self._lock:
+            existing = self._handles.get(key)
+            if existing is not None:
+                # Another request of the same stream opened it first.
+                existing.users += 1
+                self._handles.move_to_end(key)
+            else:
+                handle.users += 1
+                self._handles[key] = handle
+                evicted = self._evict_overflow()
+
+        if existing is not None:
+            handle.close()
+            return existing
+
+        self._close(evicted)
+        return handle
+
+    def _checkin(self, handle: AudioHandle) -> None:
+        with self._lock:
+            handle.users -= 1
+            handle.last_used = time.monotonic()
+
+            if handle.users > 0 or self._handles.get(handle.key) is handle:
+                return
+
+        # The handle was removed while in use, e.g. by `clear`.
+        self._close([handle])
+
+    def _evict_overflow(self) -> list[AudioHandle]:
+        evicted = []
+        for handle in list(self._handles.values()):
+            if len(self._handles) <= self.max_handles:
+                break
+
+            if handle.users == 0:
+                del self._handles[handle.key]
+                evicted.append(handle)
+
+        return evicted
+
+    def _close(self, handles: list[AudioHandle]) -> None:
+        for handle in handles:
+            logger.debug("Closing audio handle %s", handle.key)
+            self.stats.evictions += 1
+            try:
+                handle.close()
+            except Exception:
+                logger.warning("Could not close %s", handle.key, exc_info=True)
+
+    def _take_prefetched(
+        self,
+        handle: AudioHandle,
+        offset: int,
+        frames: int,
+    ) -> np.ndarray | None:
+        prefetch = handle._prefetch
+        handle._prefetch = None
+
+        if (
+            prefetch is None
+            or prefetch.offset != offset
+            or prefetch.frames != frames
+        ):
+            return None
+
+        try:
+            data = prefetch.future.result()
+        except Exception:
+            logger.debug("Prefetch of %s failed", handle.key, exc_info=True)
+            return None
+
+        self.prefetch_hits += 1
+        return data
+
+    def _schedule_prefetch(
+        self,
+        handle: AudioHandle,
+        offset: int,
+        frames: int,
+    ) -> None:
+        assert self.submit is not None
+
+        # The prefetch holds the handle so it is not closed while reading.
+        with self._lock:
+            handle.users += 1
+
+        def prefetch() -> np.ndarray:
+            try:
+                return handle.read(offset, frames)
+            finally:
+                self._checkin(handle)
+
+        try:
+            future = self.submit(prefetch)
+        except RuntimeError:
+            # The executor is shutting down.
+            self._checkin(handle)
+            return
+
+        handle._prefetch = _Prefetch(offset, frames, future)
@@ -1,6 +1,11 @@
 """Functions to handle images."""
 
+import json
+import struct
+from collections.abc import Sequence
+from functools import lru_cache
 from io import BytesIO
+from typing import Any
 
 import numpy as np
 from matplotlib import colormaps
@@ -8,10 +13,36 @@ from PIL import Image as img
 from PIL.Image import Image
 
 __all__ = [
+    "MEDIA_TYPES",
     "array_to_image",
+    "encode_image",
+    "get_colormap_lut",
     "image_to_buffer",
+    "pack_images",
+    "unpack_images",
 ]
 
+MEDIA_TYPES: dict[str, str] = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+"""Media type of each supported image format."""
+
+
+@lru_cache
+def get_colormap_lut(cmap: str) -> np.ndarray:
+    """Return a 256 entry RGB lookup table for a matplotlib colormap.
+
+    Returns
+    -------
+    np.ndarray
+        A uint8 array of shape `(256, 3)`.
+    """
+    colormap = colormaps.get_cmap(cmap).resampled(256)
+    lut = colormap(np.arange(256))[:, :3]
+    return (lut * 255).astype(np.uint8)
+
 
 def array_to_image(array: np.ndarray, cmap: str) -> Image:
     """Convert a numpy array to a PIL image.
@@ -24,27 +55,124 @@ def array_to_image(array: np.ndarray, cmap: str) -> Image:
     Returns
     -------
     Image
-        A Pillow Image object.
+        A Pillow RGB Image object.
 
     Notes
     -----
-    The array values must be between 0 and 1.
+    The array values must be between 0 and 1. Values are quantized to 256
+    levels and mapped to colors with a precomputed lookup table, which
+    avoids building a float RGBA copy of the array.
     """
     if array.ndim != 2:
         raise ValueError("The array must be 2D.")
 
-    # Get the colormap
-    colormap = colormaps.get_cmap(cmap)
+    # Quantize to 8 bits in the same way as matplotlib colormaps, which
+    # map [0, 1] onto 256 bins and clamp values outside of that range.
+    scaled = np.flipud(array) * 256.0
+    np.nan_to_num(scaled, copy=False)
+    np.clip(scaled, 0, 255, out=scaled)
+    indices = scaled.astype(np.uint8)
 
-    # Flip the array vertically
-    array = np.flipud(array)
+    return img.fromarray(get_colormap_lut(cmap)[indices], mode="RGB")
 
-    return img.fromarray(np.uint8(colormap(array) * 255))
 
+def image_to_buffer(
+    image: Image,
+    fmt: str = "png",
+    quality: int | None = None,
+    compress_level: int | None = None,
+) -> BytesIO:
+    """Convert a PIL image to a BytesIO buffer.
+
+    Parameters
+    ----------
+    image
+        The image to encode.
+    fmt
+        The image format, e.g. "png", "webp" or "jpeg".
+    quality
+        Quality of lossy formats, from 0 to 100.
+    compress_level
+        Compression level of PNG images, from 0 (fastest) to 9 (smallest).
+    """
+    options = {}
+
+    if quality is not None and fmt != "png":
+        options["quality"] = quality
+
+    if compress_level is not None and fmt == "png":
+        options["compress_level"] = compress_level
 
-def image_to_buffer(image: Image, fmt: str = "png") -> BytesIO:
-    """Convert a PIL image to a BytesIO buffer."""
     buffer = BytesIO()
-    image.save(buffer, format=fmt)
+    image.save(buffer, format=fmt, **options)
     buffer.seek(0)
     return buffer
+
+
+def encode_image(
+    array: np.ndarray,
+    cmap: str,
+    fmt: str = "png",
+    quality: int | None = None,
+    compress_level: int | None = None,
+) -> bytes:
+    """Colormap a 2D array with values in [0, 1] and encode it as an image."""
+    image = array_to_image(array, cmap=cmap)
+    return image_to_buffer(
+        image,
+        fmt=fmt,
+        quality=quality,
+        compress_level=compress_level,
+    ).read()
+
+
+def pack_images(
+    images: Sequence[bytes],
+    metadata: Sequence[dict[str, Any]],
+    media_type: str = "image/png",
+) -> bytes:
+    """Pack several encoded images into a single binary bundle.
+
+    The bundle starts with the length of a JSON index as a little endian
+    uint32, followed by the index and the concatenated images. The index
+    has the form::
+
+        {
+            "media_type": "image/png",
+            "images": [{"offset": 0, "length": 1024, ...}, ...]
+        }
+
+    where offsets are relative to the end of the index and every entry
+    includes the corresponding `metadata` fields.
+    """
+    entries = []
+    offset = 0
+    for content, meta in zip(images, metadata, strict=True):
+        entries.append({**meta, "offset": offset, "length": len(content)})
+        offset += len(content)
+
+    index = json.dumps(
+        {"media_type": media_type, "images": entries},
+        default=str,
+    ).encode()
+
+    return b"".join([struct.pack("<I", len(index)), index, *images])
+
+
+def unpack_images(content: bytes) -> tuple[dict[str, Any], list[bytes]]:
+    """Unpack a bundle created with `pack_images`.
+
+    Returns
+    -------
+    index
+        The JSON index of the bundle.
+    images
+        The encoded images.
+    """
+    (length,) = struct.unpack_from("<I", content)
+    index = json.loads(content[4 : 4 + length])
+    data = content[4 + length :]
+    return index, [
+        data[entry["offset"] : entry["offset"] + entry["length"]]
+        for entry in index["images"]
+    ]
@@ -0,0 +1,133 @@
+"""Manifests of the files in a dataset directory.
+
+Checking whether the recordings of a dataset are still up to date does
+not require reading the files. Listing a directory, or an S3 prefix,
+already gives the size and modification time of every file, and S3 also
+gives its ETag. A manifest stores these values for every file of a
+dataset as they were when the dataset was last scanned.
+
+Comparing a new listing with the manifest tells which files were added,
+changed or removed since the last scan, so only those need to be hashed
+and probed again.
+"""
+
+from collections.abc import AsyncIterable, Iterable, Mapping
+from dataclasses import dataclass, field
+
+__all__ = [
+    "FileStat",
+    "ManifestDiff",
+    "diff_manifest",
+    "diff_manifest_stream",
+]
+
+
+@dataclass(frozen=True)
+class FileStat:
+    """Listing information of a file."""
+
+    path: str
+    """Path of the file relative to the dataset directory."""
+
+    size: int
+    """Size of the file in bytes."""
+
+    mtime: float | None = None
+    """Modification time of the file as a POSIX timestamp."""
+
+    etag: str | None = None
+    """ETag of the object, for files stored in S3."""
+
+    def matches(self, other: "FileStat") -> bool:
+        """Check whether two listings describe the same content.
+
+        ETags are compared when both listings have one, as they change
+        whenever an S3 object is written. Otherwise the size and the
+        modification time are compared.
+        """
+        if self.size != other.size:
+            return False
+
+        if self.etag is not None and other.etag is not None:
+            return self.etag == other.etag
+
+        return self.mtime == other.mtime
+
+
+@dataclass
+class ManifestDiff:
+    """Differences between a manifest and a new listing."""
+
+    added: list[FileStat] = field(default_factory=list)
+    """Files that are not in the manifest."""
+
+    changed: list[FileStat] = field(default_factory=list)
+    """Files whose size, modification time or ETag changed."""
+
+    removed: list[str] = field(default_factory=list)
+    """Paths of files in the manifest that are no longer listed."""
+
+    unchanged: int = 0
+    """Number of files that did not change."""
+
+
+def diff_manifest(
+    manifest: Mapping[str, FileStat],
+    listing: Iterable[FileStat],
+) -> ManifestDiff:
+    """Compare a manifest with a new listing of the files.
+
+    Parameters
+    ----------
+    manifest
+        Listing information of the files at the last scan, by path.
+    listing
+        Listing information of the files now.
+
+    Returns
+    -------
+    ManifestDiff
+        The files that were added, changed and removed.
+    """
+    diff = ManifestDiff()
+    seen = set()
+
+    for stat in listing:
+        seen.add(stat.path)
+        _classify(diff, manifest.get(stat.path), stat)
+
+    diff.removed = [path for path in manifest if path not in seen]
+    return diff
+
+
+async def diff_manifest_stream(
+    manifest: Mapping[str, FileStat],
+    listing: AsyncIterable[FileStat],
+) -> ManifestDiff:
+    """Compare a manifest with a listing that is still being produced.
+
+    Works like `diff_manifest`, but consumes the listing as it arrives.
+    Only the paths of the unchanged files are kept, not their listings.
+    """
+    diff = ManifestDiff()
+    seen = set()
+
+    async for stat in listing:
+        seen.add(stat.path)
+        _classify(diff, manifest.get(stat.path), stat)
+
+    diff.removed = [path for path in manifest if path not in seen]
+    return diff
+
+
+def _classify(
+    diff: ManifestDiff,
+    previous: FileStat | None,
+    stat: FileStat,
+) -> None:
+    if previous is None:
+        diff.added.append(stat)
+    elif not previous.matches(stat):
+        diff.changed.append(stat)
+    else:
+        diff.unchanged += 1
@@ -0,0 +1,287 @@
+"""Multi-resolution spectrogram tile pyramids.
+
+Rendering a zoomed out view of a long recording requires computing the
+spectrogram of the whole visible window, most of which is then discarded
+when the image is downsampled for display. A tile pyramid avoids this by
+precomputing the spectrogram once at full resolution (level 0) and
+storing successively coarser versions of it, where each column of level
+`n + 1` pools two columns of level `n`.
+
+Every level is split into tiles of a fixed number of columns. Serving a
+tile only reads those columns from a memory mapped file, so the cost of a
+request does not depend on the length of the recording or the zoom level.
+
+Levels are stored in decibels as float16 `.npy` files, together with a
+`pyramid.json` file describing them. The pyramid is first written to a
+temporary directory and then moved into place, so a directory containing
+`pyramid.json` is always complete.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+import soundfile as sf
+
+from whombat.core.spectrograms import StreamingSTFT, pool_time
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "PyramidInfo",
+    "SpectrogramPyramid",
+    "build_spectrogram_pyramid",
+]
+
+METADATA_FILE = "pyramid.json"
+
+AMIN = 1e-10
+"""Smallest power value, used to avoid taking the logarithm of zero."""
+
+
+@dataclass
+class PyramidInfo:
+    """Description of a spectrogram tile pyramid."""
+
+    samplerate: int
+    """Sample rate of the audio in Hz."""
+
+    nperseg: int
+    """STFT window size in samples."""
+
+    hop: int
+    """STFT hop size in samples, at level 0."""
+
+    tile_width: int
+    """Number of columns in each tile."""
+
+    columns: list[int]
+    """Number of columns of each level, from finest to coarsest."""
+
+    pooling: Literal["max", "mean"] = "max"
+    """How columns are combined when going up one level."""
+
+    @property
+    def levels(self) -> int:
+        """Number of levels in the pyramid."""
+        return len(self.columns)
+
+    @property
+    def frequency_bins(self) -> int:
+        """Number of frequency bins in every tile."""
+        return self.nperseg // 2 + 1
+
+    def column_duration(self, level: int) -> float:
+        """Duration in seconds covered by a column of a level."""
+        return self.hop * 2**level / self.samplerate
+
+    def tiles(self, level: int) -> int:
+        """Number of tiles in a level."""
+        return -(-self.columns[level] // self.tile_width)
+
+
+class SpectrogramPyramid:
+    """A spectrogram tile pyramid stored in a directory.
+
+    Parameters
+    ----------
+    directory
+        Directory where the pyramid is stored.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._info: PyramidInfo | None = None
+
+    @property
+    def exists(self) -> bool:
+        """Whether the pyramid has been built."""
+        return (self.directory / METADATA_FILE).exists()
+
+    @property
+    def info(self) -> PyramidInfo:
+        """Description of the pyramid."""
+        if self._info is None:
+            content = json.loads((self.directory / METADATA_FILE).read_text())
+            self._info = PyramidInfo(**content)
+        return self._info
+
+    def level(self, level: int) -> np.ndarray:
+        """Return a memory mapped array with the columns of a level."""
+        return np.load(self.directory / f"level_{level}.npy", mmap_mode="r")
+
+    def tile(self, level: int, index: int) -> np.ndarray:
+        """Return the spectrogram of a tile in decibels.
+
+        Parameters
+        ----------
+        level
+            Pyramid level, 0 being the finest resolution.
+        index
+            Index of the tile within the level.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape `(frequency, time)`. The last tile of a level
+            may have fewer than `tile_width` columns.
+
+        Raises
+        ------
+        IndexError
+            If the level or tile do not exist.
+        """
+        info = self.info
+
+        if not 0 <= level < info.levels:
+            raise IndexError(f"Level {level} is not in the pyramid.")
+
+        if not 0 <= index < info.tiles(level):
+            raise IndexError(f"Tile {index} is not in level {level}.")
+
+        start = index * info.tile_width
+        end = start + info.tile_width
+        return np.asarray(self.level(level)[:, start:end], dtype=np.float32)
+
+    def tile_bounds(self, level: int, index: int) -> tuple[float, float]:
+        """Return the start and end time in seconds of a tile."""
+        info = self.info
+        duration = info.column_duration(level)
+        start = index * info.tile_width
+        end = min(start + info.tile_width, info.columns[level])
+        return start * duration, end * duration
+
+
+def build_spectrogram_pyramid(
+    directory: Path,
+    source: sf.SoundFile,
+    nperseg: int,
+    hop: int,
+    window: str = "hann",
+    channel: int = 0,
+    tile_width: int = 512,
+    pooling: Literal["max", "mean"] = "max",
+    block_columns: int = 8192,
+) -> SpectrogramPyramid:
+    """Build a spectrogram tile pyramid from an audio file.
+
+    The audio is processed in blocks of `block_columns` spectrogram
+    columns, so memory usage does not depend on the recording length.
+
+    Parameters
+    ----------
+    directory
+        Directory where the pyramid will be stored. It must not exist.
+    source
+        Open audio file.
+    nperseg
+        STFT window size in samples.
+    hop
+        STFT hop size in samples.
+    window
+        Window function name.
+    channel
+        Channel of the audio to use.
+    tile_width
+        Number of columns in each tile.
+    pooling
+        How columns are combined when going up one level.
+    block_columns
+        Number of columns computed at a time.
+
+    Returns
+    -------
+    SpectrogramPyramid
+        The built pyramid.
+    """
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    samplerate = source.samplerate
+    columns = max(1 + (source.frames - nperseg) // hop, 1)
+
+    # Keep the number of columns per block even so that pooled blocks
+    # line up with the columns of the coarser level.
+    block_columns = max(block_columns - block_columns % 2, 2)
+
+    tmp = Path(tempfile.mkdtemp(dir=directory.parent, prefix=".tmp-"))
+    try:
+        level = np.lib.format.open_memmap(
+            tmp / "level_0.npy",
+            mode="w+",
+            dtype=np.float16,
+            shape=(nperseg // 2 + 1, columns),
+        )
+
+        # NOTE: The STFT keeps the samples shared by consecutive blocks,
+        # so the file is read sequentially and every sample only once.
+        stft = StreamingSTFT(samplerate, nperseg, hop, window=window)
+        remaining = (columns - 1) * hop + nperseg
+        start = 0
+        source.seek(0)
+        while start < columns:
+            size = min(block_columns * hop, remaining)
+            remaining -= size
+            wav = source.read(
+                size,
+                always_2d=True,
+                dtype="float32",
+                fill_value=0,
+            )
+
+            psd = stft.push(wav[:, channel])
+            end = start + psd.shape[1]
+            level[:, start:end] = 10 * np.log10(np.maximum(psd, AMIN))
+            start = end
+
+        level.flush()
+        sizes = [columns]
+
+        while sizes[-1] > tile_width:
+            previous = level
+            size = -(-sizes[-1] // 2)
+            level = np.lib.format.open_memmap(
+                tmp / f"level_{len(sizes)}.npy",
+                mode="w+",
+                dtype=np.float16,
+                shape=(previous.shape[0], size),
+            )
+
+            for start in range(0, sizes[-1], block_columns):
+                block = previous[:, start : start + block_columns]
+                pooled = pool_time(block, factor=2, method=pooling)
+                level[:, start // 2 : start // 2 + pooled.shape[1]] = pooled
+
+            level.flush()
+            sizes.append(size)
+
+        info = PyramidInfo(
+            samplerate=samplerate,
+            nperseg=nperseg,
+            hop=hop,
+            tile_width=tile_width,
+            columns=sizes,
+            pooling=pooling,
+        )
+        (tmp / METADATA_FILE).write_text(json.dumps(asdict(info)))
+
+        try:
+            os.replace(tmp, directory)
+        except OSError:
+            # Another process finished building the same pyramid first.
+            logger.debug("Pyramid %s already exists", directory)
+
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    logger.info(
+        "Built spectrogram pyramid with %d levels in %s",
+        len(sizes),
+        directory,
+    )
+    return SpectrogramPyramid(directory)
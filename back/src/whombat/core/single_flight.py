@@ -0,0 +1,177 @@
+"""Coalescing of identical concurrent calls.
+
+When several clients ask for the same spectrogram or audio at the same
+time, for example because multiple annotators open the same task or the
+frontend retries a slow request, every request would otherwise download
+and compute the same result independently.
+
+A single flight group runs at most one call per key at a time. Callers
+that arrive while a call with the same key is running wait for it and
+share its result, or its error, instead of starting their own.
+`SingleFlight` coalesces coroutines within an event loop and
+`ThreadSingleFlight` coalesces blocking calls made from several threads.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from typing import Any, Generic, TypeVar
+
+__all__ = [
+    "FlightStats",
+    "SingleFlight",
+    "ThreadSingleFlight",
+]
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+@dataclass
+class FlightStats:
+    """Counters describing the calls made through a single flight group."""
+
+    calls: int = 0
+    """Total number of calls."""
+
+    executions: int = 0
+    """Calls that ran the function."""
+
+    shared: int = 0
+    """Calls that waited for the result of a call already running."""
+
+    failed: int = 0
+    """Executions that raised an error or were cancelled."""
+
+    max_waiters: int = 0
+    """Largest number of calls seen waiting on a single execution."""
+
+
+class _FlightGroup(Generic[K]):
+    def __init__(self, name: str):
+        self.name = name
+        self.stats = FlightStats()
+        self._waiters: dict[K, int] = {}
+
+    def in_flight(self) -> dict[K, int]:
+        """Number of calls waiting on each running execution, by key."""
+        return dict(self._waiters)
+
+    def status(self) -> dict[str, Any]:
+        """Return the counters and in-flight keys of the group."""
+        return {
+            "name": self.name,
+            "in_flight": len(self._waiters),
+            "keys": {
+                str(key): count for key, count in self.in_flight().items()
+            },
+            **asdict(self.stats),
+        }
+
+    def _join(self, key: K, leader: bool) -> None:
+        self.stats.calls += 1
+        if leader:
+            self.stats.executions += 1
+            self._waiters[key] = 0
+        else:
+            self.stats.shared += 1
+
+        waiters = self._waiters[key] + 1
+        self._waiters[key] = waiters
+        self.stats.max_waiters = max(self.stats.max_waiters, waiters)
+
+
+class SingleFlight(_FlightGroup[K]):
+    """Coalesce concurrent coroutines with the same key.
+
+    Calls must be made from the same event loop.
+
+    Parameters
+    ----------
+    name
+        Name used in metrics.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._tasks: dict[K, asyncio.Future] = {}
+
+    async def run(self, key: K, func: Callable[[], Awaitable[T]]) -> T:
+        """Await `func()`, or the running call with the same key.
+
+        The running call is shielded from cancellation, so a caller that
+        goes away, e.g. because the client disconnected, does not cancel
+        the work the other callers are waiting for.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda task: self._finish(key, task))
+            self._join(key, leader=True)
+        else:
+            self._join(key, leader=False)
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: K, task: asyncio.Future) -> None:
+        self._tasks.pop(key, None)
+        self._waiters.pop(key, None)
+
+        # NOTE: Retrieve the error so it is not reported as unhandled when
+        # every caller was cancelled.
+        if task.cancelled() or task.exception() is not None:
+            self.stats.failed += 1
+
+
+class ThreadSingleFlight(_FlightGroup[K]):
+    """Coalesce concurrent blocking calls with the same key.
+
+    The first caller runs the function in its own thread. Callers from
+    other threads block until it finishes.
+
+    Parameters
+    ----------
+    name
+        Name used in metrics.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._futures: dict[K, Future] = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> dict[K, int]:
+        """Number of calls waiting on each running execution, by key."""
+        with self._lock:
+            return super().in_flight()
+
+    def run(self, key: K, func: Callable[[], T]) -> T:
+        """Call `func()`, or wait for the running call with the same key."""
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if future is None:
+                future = self._futures[key] = Future()
+            self._join(key, leader=leader)
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as error:
+            future.set_exception(error)
+            with self._lock:
+                self.stats.failed += 1
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._futures.pop(key, None)
+                self._waiters.pop(key, None)
+
+        return result
@@ -1,12 +1,414 @@
 """Functions for spectrogram manipulation."""
 
+import struct
+from collections.abc import Iterable
+from typing import Literal, NamedTuple
+
+import numpy as np
 import xarray as xr
+from scipy import signal
 
 __all__ = [
+    "RawSpectrogram",
+    "StreamingSTFT",
+    "compute_normalized_spectrogram",
+    "compute_normalized_spectrogram_blocks",
+    "decode_raw_spectrogram",
+    "encode_raw_spectrogram",
     "normalize_spectrogram",
+    "pool_time",
+    "power_spectrogram",
+    "stft_frame_sizes",
 ]
 
 
+def compute_normalized_spectrogram(
+    samples: np.ndarray,
+    samplerate: float,
+    window_size: float,
+    overlap: float,
+    window: str = "hann",
+    pcen: bool = True,
+    min_db: float = -100,
+    max_db: float = 0,
+) -> np.ndarray:
+    """Compute a spectrogram of a 1D signal normalized to [0, 1].
+
+    This is a numpy version of the xarray pipeline used by
+    `whombat.api.compute_spectrogram` (`soundevent.audio.compute_spectrogram`,
+    `soundevent.audio.pcen`, `soundevent.arrays.to_db` and
+    `normalize_spectrogram`) and gives the same output. It avoids the
+    labelled intermediate arrays of that pipeline by transforming a single
+    buffer in place.
+
+    Parameters
+    ----------
+    samples
+        Audio samples.
+    samplerate
+        Sample rate of the audio in Hz.
+    window_size
+        Size of the STFT window in seconds.
+    overlap
+        Window overlap as a fraction of the window size.
+    window
+        Window function name.
+    pcen
+        Whether to apply PCEN with the default parameters of
+        `soundevent.audio.pcen`.
+    min_db, max_db
+        Range in dB the spectrogram is clamped to before normalizing.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape `(frequency, time)` with values in [0, 1].
+    """
+    hop_size = (1 - overlap) * window_size
+    nperseg = int(window_size * samplerate)
+    noverlap = int((window_size - hop_size) * samplerate)
+
+    _, _, stft = signal.stft(
+        samples,
+        fs=samplerate,
+        window=window,
+        nperseg=nperseg,
+        noverlap=noverlap,
+        return_onesided=True,
+        detrend=False,
+        padded=True,
+        boundary="zeros",
+        scaling="psd",
+    )
+
+    # Power spectral density.
+    data = np.abs(stft)
+    del stft
+    np.square(data, out=data)
+
+    if pcen:
+        _pcen_inplace(data)
+
+    _to_db_inplace(data, min_db, max_db)
+    _normalize_inplace(data)
+    return data
+
+
+def compute_normalized_spectrogram_blocks(
+    blocks: Iterable[np.ndarray],
+    frames: int,
+    samplerate: float,
+    window_size: float,
+    overlap: float,
+    window: str = "hann",
+    pcen: bool = True,
+    min_db: float = -100,
+    max_db: float = 0,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Compute a normalized spectrogram of a signal given in blocks.
+
+    Gives the same output as `compute_normalized_spectrogram` on the
+    concatenated blocks, but only one block of the signal and of its
+    STFT is held in memory at a time. The window overlap and the PCEN
+    filter state are carried from one block to the next, and the columns
+    are written into a single output array.
+
+    Parameters
+    ----------
+    blocks
+        Consecutive blocks of audio samples.
+    frames
+        Total number of samples in the blocks. It must not be smaller
+        than the STFT window.
+    samplerate
+        Sample rate of the audio in Hz.
+    window_size
+        Size of the STFT window in seconds.
+    overlap
+        Window overlap as a fraction of the window size.
+    window
+        Window function name.
+    pcen
+        Whether to apply PCEN with the default parameters of
+        `soundevent.audio.pcen`.
+    min_db, max_db
+        Range in dB the spectrogram is clamped to before normalizing.
+    out
+        Array of shape `(frequency, time)` to write the spectrogram into.
+        One is allocated if not given.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape `(frequency, time)` with values in [0, 1].
+    """
+    nperseg, hop = stft_frame_sizes(samplerate, window_size, overlap)
+    if frames < nperseg:
+        raise ValueError(
+            f"Cannot compute the spectrogram of {frames} samples with a "
+            f"window of {nperseg} samples."
+        )
+
+    # NOTE: Pad the signal as `scipy.signal.stft` does with
+    # `boundary="zeros"` and `padded=True`.
+    padding = nperseg // 2
+    length = frames + 2 * padding
+    length += (-(length - nperseg) % hop) % nperseg
+    shape = (nperseg // 2 + 1, (length - nperseg) // hop + 1)
+
+    if out is None:
+        out = np.empty(shape, dtype=np.float64)
+
+    if out.shape != shape:
+        raise ValueError(f"Expected an output of shape {shape}.")
+
+    stft = StreamingSTFT(samplerate, nperseg, hop, window=window)
+    state = np.zeros((shape[0], 1)) if pcen else None
+    column = 0
+
+    def write(samples: np.ndarray) -> None:
+        nonlocal column, state
+        data = stft.push(samples)
+        if data.shape[1] == 0:
+            return
+        if state is not None:
+            state = _pcen_inplace(data, state)
+        _to_db_inplace(data, min_db, max_db)
+        out[:, column : column + data.shape[1]] = data
+        column += data.shape[1]
+
+    write(np.zeros(padding))
+    for block in blocks:
+        write(block)
+    write(np.zeros(length - frames - padding))
+
+    if column != shape[1]:
+        raise ValueError(f"Expected {frames} samples in the blocks.")
+
+    _normalize_inplace(out)
+    return out
+
+
+class StreamingSTFT:
+    """Power spectrogram of a signal given in consecutive blocks.
+
+    Frame `i` covers samples `[i * hop, i * hop + nperseg)` of the
+    concatenated blocks. The samples of the last block that are shared
+    with frames that are not complete yet are kept until the next block
+    arrives, so every sample is only read once. Columns have the same
+    scaling as `scipy.signal.stft` with `scaling="psd"`, squared.
+    """
+
+    def __init__(
+        self,
+        samplerate: float,
+        nperseg: int,
+        hop: int,
+        window: str = "hann",
+    ):
+        self.samplerate = samplerate
+        self.nperseg = nperseg
+        self.hop = hop
+        self.window = window
+        self._buffer: np.ndarray | None = None
+
+    def push(self, samples: np.ndarray) -> np.ndarray:
+        """Add samples and compute the frames that are now complete.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape `(nperseg // 2 + 1, frames)` with the power of
+            the completed frames.
+        """
+        if self._buffer is not None and len(self._buffer):
+            samples = np.concatenate([self._buffer, samples])
+
+        columns = 0
+        if len(samples) >= self.nperseg:
+            columns = (len(samples) - self.nperseg) // self.hop + 1
+
+        self._buffer = samples[columns * self.hop :].copy()
+        if columns == 0:
+            return np.zeros((self.nperseg // 2 + 1, 0), dtype=np.float64)
+
+        _, _, stft = signal.stft(
+            samples[: (columns - 1) * self.hop + self.nperseg],
+            fs=self.samplerate,
+            window=self.window,
+            nperseg=self.nperseg,
+            noverlap=self.nperseg - self.hop,
+            return_onesided=True,
+            detrend=False,
+            padded=False,
+            boundary=None,
+            scaling="psd",
+        )
+
+        data = np.abs(stft)
+        del stft
+        np.square(data, out=data)
+        return data
+
+
+def _to_db_inplace(data: np.ndarray, min_db: float, max_db: float) -> None:
+    """Convert power to dB, as `soundevent.arrays.to_db` with ref=1."""
+    np.maximum(data, 1e-10, out=data)
+    np.log10(data, out=data)
+    np.multiply(data, 10.0, out=data)
+    np.maximum(data, min_db, out=data)
+    np.minimum(data, max_db, out=data)
+
+
+def _normalize_inplace(data: np.ndarray) -> None:
+    data_min = data.min()
+    data_range = data.max() - data_min
+    if data_range == 0:
+        data.fill(0)
+        return
+
+    np.subtract(data, data_min, out=data)
+    np.divide(data, data_range, out=data)
+
+
+def _pcen_inplace(
+    data: np.ndarray,
+    state: np.ndarray | None = None,
+    smooth: float = 0.025,
+    gain: float = 0.98,
+    bias: float = 2,
+    power: float = 0.5,
+    eps: float = 1e-6,
+) -> np.ndarray:
+    """Apply PCEN along the last axis, as `soundevent.audio.pcen` does.
+
+    Returns the state of the smoothing filter, which can be given as
+    `state` to continue with the next columns of the spectrogram.
+    """
+    if state is None:
+        state = np.zeros((*data.shape[:-1], 1))
+
+    smoothed, state = signal.lfilter(
+        [smooth],
+        [1, smooth - 1],
+        data,
+        axis=-1,
+        zi=state,
+    )
+
+    np.divide(smoothed, eps, out=smoothed)
+    np.log1p(smoothed, out=smoothed)
+    np.add(np.log(eps), smoothed, out=smoothed)
+    np.multiply(-gain, smoothed, out=smoothed)
+    np.exp(smoothed, out=smoothed)
+
+    np.multiply(data, smoothed, out=data)
+    del smoothed
+    np.divide(data, bias, out=data)
+    np.log1p(data, out=data)
+    np.multiply(power, data, out=data)
+    np.expm1(data, out=data)
+    np.multiply(bias**power, data, out=data)
+    return state
+
+
+def stft_frame_sizes(
+    samplerate: int,
+    window_size: float,
+    overlap: float,
+) -> tuple[int, int]:
+    """Return the STFT window and hop sizes in samples.
+
+    The sizes are rounded in the same way as in
+    `soundevent.audio.compute_spectrogram`.
+    """
+    hop_size = (1 - overlap) * window_size
+    nperseg = max(int(window_size * samplerate), 1)
+    noverlap = int((window_size - hop_size) * samplerate)
+    return nperseg, max(nperseg - noverlap, 1)
+
+
+def power_spectrogram(
+    samples: np.ndarray,
+    samplerate: int,
+    nperseg: int,
+    hop: int,
+    window: str = "hann",
+) -> np.ndarray:
+    """Compute a power spectral density spectrogram of a 1D signal.
+
+    Frame `i` covers samples `[i * hop, i * hop + nperseg)`, so a long
+    signal can be processed in consecutive blocks and the resulting
+    spectrograms concatenated. The signal is not padded: only complete
+    frames are computed.
+
+    Parameters
+    ----------
+    samples
+        Audio samples.
+    samplerate
+        Sample rate of the audio in Hz.
+    nperseg
+        Window size in samples.
+    hop
+        Hop size in samples.
+    window
+        Window function name, as accepted by `scipy.signal.get_window`.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape `(nperseg // 2 + 1, frames)` with the same scaling
+        as `soundevent.audio.compute_spectrogram`.
+    """
+    if len(samples) < nperseg:
+        return np.zeros((nperseg // 2 + 1, 0), dtype=np.float32)
+
+    win = signal.get_window(window, nperseg).astype(np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, nperseg)[::hop]
+    spectrum = np.fft.rfft(frames * win, axis=-1)
+    scale = 1 / (samplerate * (win**2).sum())
+    psd = (np.abs(spectrum) ** 2) * scale
+    return psd.T.astype(np.float32)
+
+
+def pool_time(
+    array: np.ndarray,
+    factor: int = 2,
+    method: Literal["max", "mean"] = "max",
+) -> np.ndarray:
+    """Downsample a spectrogram along the time axis.
+
+    Groups of `factor` consecutive columns are combined into a single
+    column. The last group may contain fewer columns.
+
+    Parameters
+    ----------
+    array
+        Array of shape `(frequency, time)`.
+    factor
+        Number of columns combined into one.
+    method
+        Whether to keep the maximum or the mean of each group. Max pooling
+        keeps short, loud events visible at coarse resolutions.
+    """
+    columns = array.shape[1]
+    pooled = -(-columns // factor)
+    missing = pooled * factor - columns
+
+    if missing:
+        pad = np.repeat(array[:, -1:], missing, axis=1)
+        array = np.concatenate([array, pad], axis=1)
+
+    groups = array.reshape(array.shape[0], pooled, factor)
+
+    if method == "max":
+        return groups.max(axis=2)
+
+    return groups.mean(axis=2, dtype=np.float32).astype(array.dtype)
+
+
 def normalize_spectrogram(
     spectrogram: xr.DataArray,
     relative: bool = False,
@@ -46,3 +448,146 @@ def normalize_spectrogram(
         return spectrogram * 0
 
     return (spectrogram - min_val) / array_range
+
+
+RAW_MAGIC = b"WSPC"
+RAW_VERSION = 1
+RAW_HEADER_FORMAT = "<4sBBHIIddddff"
+"""Layout of the header of raw spectrograms.
+
+All fields are little endian:
+
+1. Magic bytes `WSPC`.
+2. Format version (uint8).
+3. Data type code (uint8): 0 for uint8, 1 for float16.
+4. Reserved (uint16).
+5. Number of frequency bins, i.e. rows (uint32).
+6. Number of time frames, i.e. columns (uint32).
+7. Time in seconds of the first column (float64).
+8. Time step between columns in seconds (float64).
+9. Frequency in Hz of the first row (float64).
+10. Frequency step between rows in Hz (float64).
+11. Value in dB mapped to 0 (float32).
+12. Value in dB mapped to 1, or 255 for uint8 data (float32).
+
+The header is followed by the data in row major order, the first row
+being the lowest frequency.
+"""
+
+RAW_HEADER_SIZE = struct.calcsize(RAW_HEADER_FORMAT)
+
+RAW_DTYPES: dict[str, int] = {"uint8": 0, "float16": 1}
+
+
+class RawSpectrogram(NamedTuple):
+    """A decoded raw spectrogram."""
+
+    data: np.ndarray
+    start_time: float
+    time_step: float
+    min_freq: float
+    freq_step: float
+    min_db: float
+    max_db: float
+
+
+def encode_raw_spectrogram(
+    array: np.ndarray,
+    dtype: Literal["uint8", "float16"] = "uint8",
+    start_time: float = 0,
+    time_step: float = 0,
+    min_freq: float = 0,
+    freq_step: float = 0,
+    min_db: float = 0,
+    max_db: float = 0,
+) -> bytes:
+    """Encode a normalized spectrogram as raw bytes with a small header.
+
+    Parameters
+    ----------
+    array
+        Spectrogram of shape `(frequency, time)` with values in [0, 1].
+    dtype
+        Data type of the encoded values. uint8 values are quantized to 256
+        levels, float16 values are kept in [0, 1].
+    start_time, time_step
+        Time axis of the columns, in seconds.
+    min_freq, freq_step
+        Frequency axis of the rows, in Hz.
+    min_db, max_db
+        Range in dB that was mapped to [0, 1].
+
+    Returns
+    -------
+    bytes
+        The header followed by the data. See `RAW_HEADER_FORMAT`.
+    """
+    if array.ndim != 2:
+        raise ValueError("The array must be 2D.")
+
+    if dtype not in RAW_DTYPES:
+        raise ValueError(f"Unsupported dtype: {dtype}")
+
+    values = np.nan_to_num(np.clip(array, 0, 1))
+    if dtype == "uint8":
+        values = np.round(values * 255)
+
+    header = struct.pack(
+        RAW_HEADER_FORMAT,
+        RAW_MAGIC,
+        RAW_VERSION,
+        RAW_DTYPES[dtype],
+        0,
+        array.shape[0],
+        array.shape[1],
+        start_time,
+        time_step,
+        min_freq,
+        freq_step,
+        min_db,
+        max_db,
+    )
+    data = np.ascontiguousarray(
+        values,
+        dtype=np.dtype(dtype).newbyteorder("<"),
+    )
+    return header + data.tobytes()
+
+
+def decode_raw_spectrogram(content: bytes) -> RawSpectrogram:
+    """Decode a raw spectrogram encoded with `encode_raw_spectrogram`."""
+    (
+        magic,
+        version,
+        dtype_code,
+        _,
+        rows,
+        columns,
+        start_time,
+        time_step,
+        min_freq,
+        freq_step,
+        min_db,
+        max_db,
+    ) = struct.unpack_from(RAW_HEADER_FORMAT, content)
+
+    if magic != RAW_MAGIC or version != RAW_VERSION:
+        raise ValueError("Not a raw spectrogram.")
+
+    dtype = {code: name for name, code in RAW_DTYPES.items()}[dtype_code]
+    data = np.frombuffer(
+        content,
+        dtype=np.dtype(dtype).newbyteorder("<"),
+        offset=RAW_HEADER_SIZE,
+        count=rows * columns,
+    ).reshape(rows, columns)
+
+    return RawSpectrogram(
+        data=data,
+        start_time=start_time,
+        time_step=time_step,
+        min_freq=min_freq,
+        freq_step=freq_step,
+        min_db=min_db,
+        max_db=max_db,
+    )
@@ -0,0 +1,103 @@
+"""Two-tier cache for rendered tiles.
+
+Rendered tiles (e.g. spectrogram images) are fully determined by the
+recording content and the rendering parameters, so they can be cached
+indefinitely. Recently used tiles are kept in memory, and all tiles are
+stored on disk so they survive restarts and are shared between worker
+processes.
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+
+from cachetools import LRUCache
+
+from whombat.core.file_cache import CacheStats, FileCache
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "TileCache",
+]
+
+
+class TileCache:
+    """In-memory LRU cache of tiles in front of an on-disk store.
+
+    Parameters
+    ----------
+    memory_size
+        Maximum total size in bytes of the tiles kept in memory.
+    disk
+        On-disk store of tiles. If None, tiles are only cached in memory.
+    """
+
+    def __init__(self, memory_size: int, disk: FileCache | None = None):
+        self.memory_size = memory_size
+        self.memory: LRUCache[str, bytes] = LRUCache(
+            maxsize=memory_size,
+            getsizeof=len,
+        )
+        self.disk = disk
+        self.stats = CacheStats()
+        """Statistics of the in-memory tier."""
+
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        """Return the tile stored under a key, or None if missing."""
+        with self._lock:
+            content = self.memory.get(key)
+
+        if content is not None:
+            self.stats.hits += 1
+            return content
+
+        self.stats.misses += 1
+
+        if self.disk is None:
+            return None
+
+        content = self.disk.read_bytes(key)
+        if content is not None:
+            self._remember(key, content)
+
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        """Store a tile in memory and on disk."""
+        self._remember(key, content)
+
+        if self.disk is not None:
+            self.disk.put_bytes(key, content)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], bytes],
+    ) -> bytes:
+        """Return the tile stored under a key, computing it if missing."""
+        content = self.get(key)
+        if content is not None:
+            return content
+
+        logger.debug("Tile cache miss for %s", key)
+        content = compute()
+        self.put(key, content)
+        return content
+
+    def clear(self) -> None:
+        """Remove all tiles from memory and disk."""
+        with self._lock:
+            self.memory.clear()
+
+        if self.disk is not None:
+            self.disk.clear()
+
+    def _remember(self, key: str, content: bytes) -> None:
+        if len(content) > self.memory_size:
+            return
+
+        with self._lock:
+            self.memory[key] = content
@@ -0,0 +1,282 @@
+"""Zero-copy reads of uncompressed WAV files.
+
+Decoding a window of a WAV file with soundfile converts every channel of
+every frame in the window to float. For multichannel or high sample rate
+recordings most of that work is wasted when only one channel is needed,
+for example to compute a spectrogram.
+
+The samples of PCM and IEEE float WAV files are stored as a plain array,
+so the data chunk can be memory mapped with numpy. Slicing the mapped
+array selects the requested frames and channel without copying or
+decoding anything, and only the selected samples are converted to float.
+
+Samples are scaled in the same way as soundfile, so the results are
+identical to reading the file with `soundfile.read`.
+"""
+
+import io
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+__all__ = [
+    "WavLayout",
+    "parse_wav_header",
+    "read_wav_frames",
+    "read_wav_layout",
+]
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_SUPPORTED = {
+    (WAVE_FORMAT_PCM, 8): "u1",
+    (WAVE_FORMAT_PCM, 16): "<i2",
+    (WAVE_FORMAT_PCM, 24): "u1",
+    (WAVE_FORMAT_PCM, 32): "<i4",
+    (WAVE_FORMAT_IEEE_FLOAT, 32): "<f4",
+    (WAVE_FORMAT_IEEE_FLOAT, 64): "<f8",
+}
+
+
+@dataclass(frozen=True)
+class WavLayout:
+    """Location and format of the samples of a WAV file."""
+
+    samplerate: int
+    """Sample rate in Hz."""
+
+    channels: int
+    """Number of channels."""
+
+    frames: int
+    """Number of frames in the data chunk."""
+
+    bits_per_sample: int
+    """Size of a sample in bits."""
+
+    format: int
+    """WAV format tag, either PCM or IEEE float."""
+
+    data_offset: int
+    """Offset in bytes of the first sample in the file."""
+
+    extensible: bool = False
+    """Whether the format is given as a WAVE_FORMAT_EXTENSIBLE header."""
+
+    @property
+    def block_align(self) -> int:
+        """Size of a frame in bytes."""
+        return self.channels * self.bits_per_sample // 8
+
+
+def read_wav_layout(path: Path | str) -> WavLayout | None:
+    """Find the samples of a WAV file.
+
+    Parameters
+    ----------
+    path
+        Path of the file.
+
+    Returns
+    -------
+    WavLayout | None
+        The layout of the samples, or None if the file is not a PCM or
+        IEEE float WAV file that can be memory mapped.
+    """
+    size = os.path.getsize(path)
+
+    with open(path, "rb") as fp:
+        return _find_layout(fp, size)
+
+
+def parse_wav_header(header: bytes, size: int) -> WavLayout | None:
+    """Find the samples of a WAV file from its first bytes.
+
+    Parameters
+    ----------
+    header
+        The first bytes of the file. They must include the fmt chunk and
+        the start of the data chunk.
+    size
+        Size of the whole file in bytes.
+
+    Returns
+    -------
+    WavLayout | None
+        The layout of the samples, or None if the file is not a PCM or
+        IEEE float WAV file, or its data chunk starts after the given
+        bytes.
+    """
+    return _find_layout(io.BytesIO(header), size)
+
+
+def _find_layout(fp: BinaryIO, size: int) -> WavLayout | None:
+    header = fp.read(12)
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    position = 12
+    while position + 8 <= size:
+        fp.seek(position)
+        chunk_header = fp.read(8)
+        if len(chunk_header) < 8:
+            return None
+
+        chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+        body = position + 8
+
+        if chunk_id == b"fmt ":
+            fmt = _parse_fmt(fp.read(min(chunk_size, 40)))
+
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+
+            fmt_tag, channels, samplerate, bits, extensible = fmt
+            if (fmt_tag, bits) not in _SUPPORTED or channels < 1:
+                return None
+
+            # NOTE: Files that were not closed properly while being
+            # recorded may have a wrong data chunk size.
+            available = size - body
+            if chunk_size == 0 or chunk_size > available:
+                chunk_size = available
+
+            block_align = channels * bits // 8
+            return WavLayout(
+                samplerate=samplerate,
+                channels=channels,
+                frames=chunk_size // block_align,
+                bits_per_sample=bits,
+                format=fmt_tag,
+                data_offset=body,
+                extensible=extensible,
+            )
+
+        # Chunks are padded to an even number of bytes.
+        position = body + chunk_size + (chunk_size % 2)
+
+    return None
+
+
+def _parse_fmt(
+    content: bytes,
+) -> tuple[int, int, int, int, bool] | None:
+    if len(content) < 16:
+        return None
+
+    fmt_tag, channels, samplerate, _, _, bits = struct.unpack(
+        "<HHIIHH",
+        content[:16],
+    )
+
+    extensible = fmt_tag == WAVE_FORMAT_EXTENSIBLE
+    if extensible:
+        if len(content) < 26:
+            return None
+        # The format tag is stored in the first bytes of the sub-format
+        # GUID.
+        (fmt_tag,) = struct.unpack("<H", content[24:26])
+
+    return fmt_tag, channels, samplerate, bits, extensible
+
+
+def read_wav_frames(
+    path: Path | str,
+    start: int,
+    frames: int,
+    channel: int | None = None,
+    layout: WavLayout | None = None,
+) -> np.ndarray:
+    """Read frames of a WAV file through a memory map.
+
+    Parameters
+    ----------
+    path
+        Path of the file.
+    start
+        First frame to read. May be negative.
+    frames
+        Number of frames to read.
+    channel
+        Channel to read. If None all channels are read.
+    layout
+        Layout of the file, as returned by `read_wav_layout`.
+
+    Returns
+    -------
+    np.ndarray
+        A float64 array of shape `(frames, channels)`, or `(frames,)` if a
+        channel was given, with values scaled as done by soundfile. Frames
+        outside of the file are zero.
+
+    Raises
+    ------
+    ValueError
+        If the file can not be memory mapped.
+    """
+    if layout is None:
+        layout = read_wav_layout(path)
+
+    if layout is None:
+        raise ValueError(f"Cannot memory map {path}.")
+
+    shape: tuple[int, ...] = (frames, layout.channels)
+    if channel is not None:
+        shape = (frames,)
+
+    result = np.zeros(shape, dtype=np.float64)
+
+    first = max(start, 0)
+    last = min(start + frames, layout.frames)
+    if last <= first:
+        return result
+
+    # NOTE: 24 bit samples have no numpy type, so they are mapped as
+    # triplets of bytes.
+    mapped_shape: tuple[int, ...] = (last - first, layout.channels)
+    if layout.bits_per_sample == 24:
+        mapped_shape = (last - first, layout.channels, 3)
+
+    samples = np.memmap(
+        path,
+        dtype=_SUPPORTED[(layout.format, layout.bits_per_sample)],
+        mode="r",
+        offset=layout.data_offset + first * layout.block_align,
+        shape=mapped_shape,
+    )
+
+    if channel is not None:
+        samples = samples[:, channel]
+
+    result[first - start : last - start] = _to_float(samples, layout)
+    return result
+
+
+def _to_float(samples: np.ndarray, layout: WavLayout) -> np.ndarray:
+    bits = layout.bits_per_sample
+
+    if layout.format == WAVE_FORMAT_IEEE_FLOAT:
+        return samples
+
+    if bits == 8:
+        return (samples.astype(np.float64) - 128) / 128
+
+    if bits == 24:
+        # Assemble the little endian bytes in the top of an int32 so the
+        # sign is kept, then shift them down.
+        value = (
+            (samples[..., 2].astype(np.int32) << 24)
+            | (samples[..., 1].astype(np.int32) << 16)
+            | (samples[..., 0].astype(np.int32) << 8)
+        ) >> 8
+        return value / 2.0**23
+
+    return samples / 2.0 ** (bits - 1)
@@ -0,0 +1,303 @@
+"""Waveform envelope pyramids.
+
+Drawing the waveform of a long recording at a few thousand pixels wide
+only needs, for each pixel, the minimum, maximum and RMS amplitude of the
+samples it covers. An envelope pyramid stores these values for bins of
+`bin_size` samples (level 0) and for successively coarser levels, where
+each bin of level `n + 1` combines two bins of level `n`.
+
+Any time range can then be drawn at any width by reading a few thousand
+bins of the right level, without touching the audio file.
+
+All levels are stored one after the other in a single float16 `.npy`
+file of shape `(bins, channels, 3)`, next to a `.json` file describing
+them. The JSON file is written last, so an existing JSON file means the
+pyramid is complete.
+"""
+
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+__all__ = [
+    "WaveformEnvelope",
+    "WaveformInfo",
+    "WaveformPyramid",
+    "build_waveform_pyramid",
+]
+
+
+@dataclass
+class WaveformInfo:
+    """Description of a waveform envelope pyramid."""
+
+    samplerate: int
+    """Sample rate of the audio file in Hz."""
+
+    frames: int
+    """Number of frames of the audio file."""
+
+    channels: int
+    """Number of channels of the audio file."""
+
+    bin_size: int
+    """Number of samples summarized by each bin of level 0."""
+
+    columns: list[int]
+    """Number of bins of each level, from finest to coarsest."""
+
+    @property
+    def levels(self) -> int:
+        """Number of levels in the pyramid."""
+        return len(self.columns)
+
+    @property
+    def offsets(self) -> list[int]:
+        """Index of the first bin of each level in the stored array."""
+        return [0, *np.cumsum(self.columns[:-1]).tolist()]
+
+    def bin_frames(self, level: int) -> int:
+        """Number of frames summarized by a bin of a level."""
+        return self.bin_size * 2**level
+
+
+@dataclass
+class WaveformEnvelope:
+    """Amplitude envelope of a range of frames."""
+
+    min: np.ndarray
+    """Minimum amplitude of each column, of shape `(channels, width)`."""
+
+    max: np.ndarray
+    """Maximum amplitude of each column, of shape `(channels, width)`."""
+
+    rms: np.ndarray
+    """Root mean square amplitude of each column."""
+
+
+class WaveformPyramid:
+    """A waveform envelope pyramid stored on disk.
+
+    Parameters
+    ----------
+    path
+        Path of the pyramid without suffix. The data is stored in
+        `path.npy` and its description in `path.json`.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._info: WaveformInfo | None = None
+        self._data: np.ndarray | None = None
+
+    @property
+    def data_path(self) -> Path:
+        """Path of the file with the envelope bins."""
+        return self.path.with_suffix(".npy")
+
+    @property
+    def info_path(self) -> Path:
+        """Path of the file describing the pyramid."""
+        return self.path.with_suffix(".json")
+
+    @property
+    def exists(self) -> bool:
+        """Whether the pyramid has been built."""
+        return self.info_path.exists()
+
+    @property
+    def info(self) -> WaveformInfo:
+        """Description of the pyramid."""
+        if self._info is None:
+            content = json.loads(self.info_path.read_text())
+            self._info = WaveformInfo(**content)
+        return self._info
+
+    def level(self, level: int) -> np.ndarray:
+        """Return a memory mapped array with the bins of a level.
+
+        The array has shape `(bins, channels, 3)` where the last axis
+        holds the minimum, maximum and RMS amplitude.
+        """
+        info = self.info
+        if self._data is None:
+            self._data = np.load(self.data_path, mmap_mode="r")
+
+        start = info.offsets[level]
+        return self._data[start : start + info.columns[level]]
+
+    def envelope(
+        self,
+        start_frame: int,
+        end_frame: int,
+        width: int,
+    ) -> WaveformEnvelope:
+        """Return the envelope of a range of frames at a given width.
+
+        Parameters
+        ----------
+        start_frame
+            First frame of the range.
+        end_frame
+            Frame after the end of the range.
+        width
+            Number of columns to return.
+
+        Returns
+        -------
+        WaveformEnvelope
+            The envelope. Columns outside of the audio file are zero.
+        """
+        if end_frame <= start_frame or width <= 0:
+            raise ValueError("The range and width must not be empty.")
+
+        info = self.info
+
+        # Use the coarsest level that still has at least one bin per
+        # column, so no column is drawn from a single, wider bin.
+        frames_per_column = (end_frame - start_frame) / width
+        level = int(np.log2(max(frames_per_column / info.bin_size, 1)))
+        level = min(level, info.levels - 1)
+        size = info.bin_frames(level)
+
+        edges = start_frame + np.arange(width + 1) * frames_per_column
+        bins = np.floor(edges / size).astype(np.int64)
+        valid = (bins[:-1] >= 0) & (bins[:-1] < info.columns[level])
+
+        shape = (info.channels, width)
+        result = WaveformEnvelope(
+            min=np.zeros(shape, dtype=np.float32),
+            max=np.zeros(shape, dtype=np.float32),
+            rms=np.zeros(shape, dtype=np.float32),
+        )
+
+        if not valid.any():
+            return result
+
+        first = int(bins[:-1][valid][0])
+        last = int(min(bins[-1] + 1, info.columns[level]))
+        data = np.asarray(self.level(level)[first:last], dtype=np.float32)
+
+        # Every column covers the bins from its first bin up to, but
+        # excluding, the first bin of the next column, and at least one
+        # bin.
+        indices = np.clip(bins[:-1][valid] - first, 0, len(data) - 1)
+        ends = np.clip(bins[1:][valid] - first, indices + 1, len(data))
+        counts = ends - indices
+        data = data[: ends[-1]]
+
+        result.min[:, valid] = np.minimum.reduceat(data[..., 0], indices).T
+        result.max[:, valid] = np.maximum.reduceat(data[..., 1], indices).T
+
+        # Combine the RMS of several bins through the mean power.
+        power = np.cumsum(data[..., 2] ** 2, axis=0)
+        power = np.concatenate([np.zeros_like(power[:1]), power])
+        mean = (power[ends] - power[indices]) / counts[:, None]
+        result.rms[:, valid] = np.sqrt(np.maximum(mean, 0)).T
+
+        return result
+
+
+def build_waveform_pyramid(
+    path: Path,
+    source: sf.SoundFile,
+    bin_size: int = 256,
+    block_bins: int = 4096,
+) -> WaveformPyramid:
+    """Build a waveform envelope pyramid from an audio file.
+
+    The audio is read in blocks of `block_bins` bins, so memory usage
+    does not depend on the recording length.
+
+    Parameters
+    ----------
+    path
+        Path of the pyramid without suffix.
+    source
+        Open audio file.
+    bin_size
+        Number of samples summarized by each bin of level 0.
+    block_bins
+        Number of bins computed at a time.
+
+    Returns
+    -------
+    WaveformPyramid
+        The built pyramid.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    channels = source.channels
+    frames = source.frames
+
+    columns = [max(-(-frames // bin_size), 1)]
+    while columns[-1] > 1:
+        columns.append(-(-columns[-1] // 2))
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    os.close(fd)
+
+    try:
+        data = np.lib.format.open_memmap(
+            tmp,
+            mode="w+",
+            dtype=np.float16,
+            shape=(sum(columns), channels, 3),
+        )
+
+        source.seek(0)
+        for start in range(0, columns[0], block_bins):
+            bins = min(block_bins, columns[0] - start)
+            wav = source.read(
+                bins * bin_size,
+                dtype="float32",
+                always_2d=True,
+                fill_value=0,
+            )
+            wav = wav.reshape(bins, bin_size, channels)
+            block = data[start : start + bins]
+            block[..., 0] = wav.min(axis=1)
+            block[..., 1] = wav.max(axis=1)
+            block[..., 2] = np.sqrt(np.mean(wav**2, axis=1))
+
+        offset = 0
+        for previous, size in zip(columns[:-1], columns[1:]):
+            finer = np.asarray(
+                data[offset : offset + previous],
+                dtype=np.float32,
+            )
+            if previous % 2:
+                # Repeat the last bin so that bins can be paired up.
+                finer = np.concatenate([finer, finer[-1:]])
+
+            pairs = finer.reshape(size, 2, channels, 3)
+            coarser = data[offset + previous : offset + previous + size]
+            coarser[..., 0] = pairs[..., 0].min(axis=1)
+            coarser[..., 1] = pairs[..., 1].max(axis=1)
+            coarser[..., 2] = np.sqrt(np.mean(pairs[..., 2] ** 2, axis=1))
+            offset += previous
+
+        data.flush()
+        del data
+
+        info = WaveformInfo(
+            samplerate=source.samplerate,
+            frames=frames,
+            channels=channels,
+            bin_size=bin_size,
+            columns=columns,
+        )
+        pyramid = WaveformPyramid(path)
+        os.replace(tmp, pyramid.data_path)
+
+        Path(tmp).write_text(json.dumps(asdict(info)))
+        os.replace(tmp, pyramid.info_path)
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+
+    return pyramid
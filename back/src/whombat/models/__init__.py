@@ -24,7 +24,11 @@ from whombat.models.clip_annotation import (
 )
 from whombat.models.clip_evaluation import ClipEvaluation, ClipEvaluationMetric
 from whombat.models.clip_prediction import ClipPrediction, ClipPredictionTag
-from whombat.models.dataset import Dataset, DatasetRecording
+from whombat.models.dataset import (
+    Dataset,
+    DatasetManifestEntry,
+    DatasetRecording,
+)
 from whombat.models.evaluation import Evaluation, EvaluationMetric
 from whombat.models.evaluation_set import (
     EvaluationSet,
@@ -34,6 +38,7 @@ from whombat.models.evaluation_set import (
     EvaluationSetUserRun,
 )
 from whombat.models.feature import FeatureName
+from whombat.models.job import Job
 from whombat.models.model_run import (
     ModelRun,
     ModelRunEvaluation,
@@ -87,6 +92,7 @@ __all__ = [
     "ClipPrediction",
     "ClipPredictionTag",
     "Dataset",
+    "DatasetManifestEntry",
     "DatasetRecording",
     "Evaluation",
     "EvaluationMetric",
@@ -96,6 +102,7 @@ __all__ = [
     "EvaluationSetTag",
     "EvaluationSetUserRun",
     "FeatureName",
+    "Job",
     "ModelRun",
     "ModelRunEvaluation",
     "ModelRunPrediction",
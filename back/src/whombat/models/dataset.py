@@ -18,13 +18,21 @@ from pathlib import Path
 from uuid import UUID, uuid4
 
 import sqlalchemy.orm as orm
-from sqlalchemy import ForeignKey, UniqueConstraint, func, inspect, select
+from sqlalchemy import (
+    BigInteger,
+    ForeignKey,
+    UniqueConstraint,
+    func,
+    inspect,
+    select,
+)
 
 from whombat.models.base import Base
 from whombat.models.recording import Recording
 
 __all__ = [
     "Dataset",
+    "DatasetManifestEntry",
     "DatasetRecording",
 ]
 
@@ -83,6 +91,16 @@ class Dataset(Base):
         )
     )
 
+    manifest_entries: orm.Mapped[list["DatasetManifestEntry"]] = (
+        orm.relationship(
+            "DatasetManifestEntry",
+            init=False,
+            repr=False,
+            cascade="all, delete-orphan",
+            default_factory=list,
+        )
+    )
+
 
 class DatasetRecording(Base):
     """Dataset Recording Model.
@@ -137,6 +155,42 @@ class DatasetRecording(Base):
     )
 
 
+class DatasetManifestEntry(Base):
+    """Dataset Manifest Entry Model.
+
+    Listing information of a file in the dataset directory, as it was when
+    the dataset was last scanned.
+
+    Notes
+    -----
+    The manifest is used to find the files that were added, changed or
+    removed since the last scan without reading them. Files that could not
+    be registered as recordings are also kept in the manifest, so they are
+    only tried again if they change.
+    """
+
+    __tablename__ = "dataset_manifest_entry"
+
+    dataset_id: orm.Mapped[int] = orm.mapped_column(
+        ForeignKey("dataset.id"),
+        nullable=False,
+        primary_key=True,
+    )
+    """The id of the dataset."""
+
+    path: orm.Mapped[str] = orm.mapped_column(primary_key=True)
+    """The path of the file relative to the dataset directory."""
+
+    size: orm.Mapped[int] = orm.mapped_column(BigInteger)
+    """The size of the file in bytes."""
+
+    mtime: orm.Mapped[float | None] = orm.mapped_column(default=None)
+    """The modification time of the file as a POSIX timestamp."""
+
+    etag: orm.Mapped[str | None] = orm.mapped_column(default=None)
+    """The ETag of the file, if stored in S3."""
+
+
 # Add a property to the Dataset model that returns the number of recordings
 # associated with the dataset.
 inspect(Dataset).add_property(
@@ -0,0 +1,96 @@
+"""Job model.
+
+Jobs are operations that take too long to run inside an HTTP request,
+such as registering the recordings of a large dataset or importing an
+annotation project. The request only enqueues the job and returns. The
+job is then run in the background by a worker of the job runner, which
+stores its progress in the database so it can be polled.
+"""
+
+import datetime
+from typing import Any
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+import sqlalchemy.orm as orm
+
+from whombat.models.base import Base
+
+__all__ = [
+    "Job",
+]
+
+
+class Job(Base):
+    """Job model."""
+
+    __tablename__ = "job"
+
+    id: orm.Mapped[int] = orm.mapped_column(primary_key=True, init=False)
+    """The database id of the job."""
+
+    uuid: orm.Mapped[UUID] = orm.mapped_column(
+        default_factory=uuid4,
+        kw_only=True,
+        unique=True,
+    )
+    """The UUID of the job."""
+
+    kind: orm.Mapped[str] = orm.mapped_column(nullable=False)
+    """The operation the job runs, e.g. `create_dataset`."""
+
+    parameters: orm.Mapped[dict[str, Any]] = orm.mapped_column(
+        sa.JSON,
+        nullable=False,
+        default_factory=dict,
+    )
+    """The arguments of the operation."""
+
+    status: orm.Mapped[str] = orm.mapped_column(
+        nullable=False,
+        index=True,
+        default="queued",
+    )
+    """The status of the job."""
+
+    progress: orm.Mapped[float] = orm.mapped_column(
+        nullable=False,
+        default=0,
+    )
+    """Percentage of the work done, from 0 to 100."""
+
+    message: orm.Mapped[str | None] = orm.mapped_column(default=None)
+    """A description of what the job is currently doing."""
+
+    cancel_requested: orm.Mapped[bool] = orm.mapped_column(
+        nullable=False,
+        default=False,
+    )
+    """Whether the job was asked to stop."""
+
+    owner: orm.Mapped[str | None] = orm.mapped_column(default=None)
+    """The job runner that claimed the job."""
+
+    result_type: orm.Mapped[str | None] = orm.mapped_column(default=None)
+    """The type of the object created by the job, e.g. `dataset`."""
+
+    result_uuid: orm.Mapped[UUID | None] = orm.mapped_column(default=None)
+    """The UUID of the object created by the job."""
+
+    error: orm.Mapped[str | None] = orm.mapped_column(default=None)
+    """The error that made the job fail."""
+
+    started_on: orm.Mapped[datetime.datetime | None] = orm.mapped_column(
+        default=None,
+    )
+    """When a worker started the job."""
+
+    heartbeat_on: orm.Mapped[datetime.datetime | None] = orm.mapped_column(
+        default=None,
+    )
+    """When the runner of the job last reported that it was alive."""
+
+    finished_on: orm.Mapped[datetime.datetime | None] = orm.mapped_column(
+        default=None,
+    )
+    """When the job succeeded, failed or was cancelled."""
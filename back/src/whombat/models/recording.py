@@ -78,7 +78,7 @@ class Recording(Base):
     """The unique identifier of the recording."""
 
     hash: orm.Mapped[str] = orm.mapped_column(unique=True, index=True)
-    """The md5 hash of the recording."""
+    """The hash of the recording."""
 
     path: orm.Mapped[Path] = orm.mapped_column(unique=True, index=True)
     """The path to the recording file relative to the base audio directory."""
@@ -110,6 +110,12 @@ class Recording(Base):
     rights: orm.Mapped[str | None] = orm.mapped_column(default=None)
     """A string describing the usage rights of the recording."""
 
+    hash_algorithm: orm.Mapped[str] = orm.mapped_column(
+        default="md5",
+        server_default="md5",
+    )
+    """The algorithm used to compute the hash, e.g. `md5`."""
+
     # Relationships
     notes: orm.Mapped[list[Note]] = orm.relationship(
         Note,
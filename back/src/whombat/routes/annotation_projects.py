@@ -214,3 +214,23 @@ async def import_annotation_project(
     await session.commit()
     await session.refresh(db_project)
     return schemas.AnnotationProject.model_validate(db_project)
+
+
+@annotation_projects_router.post(
+    "/import/background/",
+    response_model=schemas.Job,
+    status_code=202,
+)
+async def import_annotation_project_in_background(
+    settings: WhombatSettings,
+    session: Session,
+    annotation_project: UploadFile,
+):
+    """Import an annotation project in a background job."""
+    path = await api.save_job_file(annotation_project.file)
+    return await api.jobs.enqueue(
+        session,
+        "import_annotation_project",
+        path=str(path),
+        audio_dir=str(settings.audio_dir),
+    )
@@ -1,16 +1,33 @@
 """REST API routes for audio."""
 
-from io import BytesIO
+from functools import partial
 from typing import Annotated
 from uuid import UUID
 
-import soundfile as sf
-from fastapi import APIRouter, Depends, Header, Response
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from fastapi.responses import StreamingResponse
 
 from whombat import api, schemas
+from whombat.core.audio_encoding import CODECS
 from whombat.routes.dependencies import Session, WhombatSettings
+from whombat.routes.http_caching import (
+    caching_headers,
+    if_range_matches,
+    make_etag,
+    none_match,
+    not_modified,
+)
 from whombat.system import get_settings
+from whombat.system.executors import run_in_thread
 
 __all__ = ["audio_router"]
 
@@ -20,31 +37,63 @@ CHUNK_SIZE = 1024 * 256
 
 use_s3 = get_settings().use_s3
 
+
+def get_client_id(request: Request) -> str:
+    """Identify the client that made a request."""
+    if request.client is None:
+        return "unknown"
+    return request.client.host
+
+
 @audio_router.get("/stream/")
 async def stream_recording_audio(
+    request: Request,
     session: Session,
     settings: WhombatSettings,
     recording_uuid: UUID,
     start_time: float | None = None,
     end_time: float | None = None,
     speed: float = 1,
-    range: str = Header(None),
+    stream_id: str | None = None,
+    codec: schemas.AudioCodec = "wav",
+    range: str | None = Header(None),
+    if_range: str | None = Header(None),
+    if_none_match: str | None = Header(None),
 ) -> Response:
     """Stream the audio of a recording.
 
     Parameters
     ----------
+    request
+        The incoming request.
     session
         Database session.
     settings
         Whombat settings.
     recording_uuid
         The ID of the recording.
+    stream_id
+        Identifies the player making the request. Consecutive requests
+        of the same stream reuse the open audio file. Defaults to the
+        client address.
+    codec
+        Codec used to encode the audio. Compressed codecs use less
+        bandwidth, but the whole clip is encoded before the first range
+        is served.
+    range
+        Byte range requested. Only the start of the range is used, the
+        response holds the next chunk of audio.
+    if_range
+        ETag the range is conditional on. If it does not match, the
+        whole clip is sent.
+    if_none_match
+        ETags the client already has.
 
     Returns
     -------
     Response
-        The audio file.
+        A chunk of the audio file, the whole file if no range was
+        requested, or an empty 304 response if the client has it.
     """
     audio_dir = settings.audio_dir
     recording = await api.recordings.get(
@@ -52,8 +101,17 @@ async def stream_recording_audio(
         recording_uuid,
     )
 
-    start, _ = range.replace("bytes=", "").split("-")
-    start = int(start)
+    etag = make_etag(
+        recording.hash,
+        "stream",
+        recording.time_expansion,
+        codec,
+        speed,
+        start_time,
+        end_time,
+    )
+    if not none_match(if_none_match, etag):
+        return not_modified(etag)
 
     if start_time is not None:
         start_time = start_time * recording.time_expansion
@@ -70,27 +128,140 @@ async def stream_recording_audio(
     else:
         audio_path = audio_dir / recording.path
                 
-    data, start, end, filesize = api.load_clip_bytes(
-        path=audio_path, 
-        start=start,
-        frames=CHUNK_SIZE,
-        speed=speed * recording.time_expansion,
-        start_time=start_time,
-        end_time=end_time,
-    )  
-    
+    if codec == "wav":
+        load = partial(
+            run_in_thread,
+            api.load_clip_bytes,
+            path=audio_path,
+            frames=CHUNK_SIZE,
+            speed=speed * recording.time_expansion,
+            start_time=start_time,
+            end_time=end_time,
+            recording_hash=recording.hash,
+            stream=stream_id or get_client_id(request),
+        )
+    else:
+        load = partial(
+            run_in_thread,
+            api.load_encoded_clip_bytes,
+            path=audio_path,
+            codec=codec,
+            size=CHUNK_SIZE,
+            speed=speed * recording.time_expansion,
+            start_time=start_time,
+            end_time=end_time,
+            recording_hash=recording.hash,
+        )
+
+    if range is None or not if_range_matches(if_range, etag):
+        # NOTE: Send the whole clip, chunk by chunk.
+        async def read_all():
+            position = 0
+            while True:
+                data, _, position, filesize = await load(start=position)
+                yield data
+                if not data or position >= filesize:
+                    break
+
+        return StreamingResponse(
+            content=read_all(),
+            media_type=CODECS[codec].media_type,
+            headers={"Accept-Ranges": "bytes", **caching_headers(etag)},
+        )
+
+    start, _ = range.replace("bytes=", "").split("-")
+    start = int(start)
+
+    # NOTE: Identical requests, e.g. retries or several annotators
+    # playing the same clip, share a single read.
+    data, start, end, filesize = await api.get_audio_flights().run(
+        (etag, start),
+        partial(load, start=start),
+    )
+
     headers = {
-        "Content-Range": f"bytes {start}-{end}/{filesize}",
+        "Content-Range": f"bytes {start}-{end - 1}/{filesize}",
         "Content-Length": f"{len(data)}",
         "Accept-Ranges": "bytes",
+        **caching_headers(etag),
     }
     return Response(
         content=data,
         status_code=206,
-        media_type="audio/wav",
+        media_type=CODECS[codec].media_type,
         headers=headers,
     )
 
+
+@audio_router.get("/waveform/", response_model=schemas.Waveform)
+async def get_recording_waveform(
+    session: Session,
+    settings: WhombatSettings,
+    recording_uuid: UUID,
+    start_time: float = 0,
+    end_time: float | None = None,
+    width: int = Query(default=1000, ge=1, le=20_000),
+) -> schemas.Waveform | Response:
+    """Get the waveform envelope of a window of a recording.
+
+    The envelope is read from the precomputed waveform pyramid of the
+    recording, so the audio file is not read. If the pyramid has not been
+    built yet, it is built in the background and a 202 response with no
+    content is returned.
+
+    Parameters
+    ----------
+    session
+        Database session.
+    settings
+        Whombat settings.
+    recording_uuid
+        The UUID of the recording.
+    start_time
+        Start time in seconds.
+    end_time
+        End time in seconds. Defaults to the end of the recording.
+    width
+        Number of columns of the envelope.
+
+    Returns
+    -------
+    schemas.Waveform | Response
+        The envelope, or an empty 202 response if the pyramid is still
+        being built.
+    """
+    recording = await api.recordings.get(session, recording_uuid)
+
+    if end_time is None:
+        end_time = recording.duration
+
+    if end_time <= start_time:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="end_time must be greater than start_time.",
+        )
+
+    pyramid = await api.request_waveform_pyramid(
+        recording,
+        audio_dir=settings.audio_dir,
+    )
+
+    if pyramid is None:
+        return Response(
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Retry-After": "1"},
+        )
+
+    return await run_in_thread(
+        api.get_waveform,
+        pyramid,
+        recording,
+        start_time=start_time,
+        end_time=end_time,
+        width=width,
+    )
+
+
 @audio_router.get("/download/")
 async def download_recording_audio(
     session: Session,
@@ -102,7 +273,9 @@ async def download_recording_audio(
     ],
     start_time: float | None = None,
     end_time: float | None = None,
-) -> StreamingResponse:
+    codec: schemas.AudioCodec = "wav",
+    if_none_match: str | None = Header(None),
+) -> Response:
     """Get audio for a recording.
 
     Parameters
@@ -122,34 +295,47 @@ async def download_recording_audio(
     audio_parameters
         Audio parameters to use when processing the audio. Includes
         resampling and filtering parameters.
+    codec
+        Codec used to encode the audio.
+    if_none_match
+        ETags the client already has.
 
     Returns
     -------
     Response
-        The audio file.
+        The audio file, or an empty 304 response if the client has it.
     """
     recording = await api.recordings.get(session, recording_uuid)
 
-    audio = api.load_audio(
-        recording,
-        start_time=start_time,
-        end_time=end_time,
-        audio_parameters=audio_parameters,
-        audio_dir=settings.audio_dir,
+    etag = make_etag(
+        recording.hash,
+        "download",
+        recording.time_expansion,
+        audio_parameters.model_dump(mode="json"),
+        codec,
+        start_time,
+        end_time,
     )
+    if not none_match(if_none_match, etag):
+        return not_modified(etag)
 
-    # Get the samplerate and recording ID.
-    samplerate = int(1 / audio.time.attrs["step"])
-    id = audio.attrs["recording_id"]
-
-    # Write the audio to a buffer.
-    buffer = BytesIO()
-    sf.write(buffer, audio.data, samplerate, format="WAV")
-    buffer.seek(0)
-
-    # Return the audio.
+    # NOTE: The audio is read, processed and encoded in blocks while it
+    # is sent, so long downloads do not need to fit in memory.
+    info = CODECS[codec]
     return StreamingResponse(
-        content=buffer,
-        media_type="audio/wav",
-        headers={"Content-Disposition": f"attachment; filename={id}.wav"},
+        content=api.stream_audio(
+            recording,
+            start_time=start_time,
+            end_time=end_time,
+            audio_parameters=audio_parameters,
+            audio_dir=settings.audio_dir,
+            codec=codec,
+        ),
+        media_type=info.media_type,
+        headers={
+            "Content-Disposition": (
+                f"attachment; filename={recording.uuid}.{info.extension}"
+            ),
+            **caching_headers(etag),
+        },
     )
\ No newline at end of file
@@ -6,7 +6,7 @@ from io import StringIO
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Body, Depends, UploadFile
+from fastapi import APIRouter, Body, Depends, HTTPException, UploadFile
 from fastapi.responses import Response, StreamingResponse
 from pydantic import DirectoryPath
 from soundevent.io.aoef import DatasetObject, to_aeof
@@ -86,6 +86,38 @@ async def create_dataset(
     return created
 
 
+@dataset_router.post(
+    "/background/",
+    response_model=schemas.Job,
+    status_code=202,
+)
+async def create_dataset_in_background(
+    settings: WhombatSettings,
+    session: Session,
+    dataset: schemas.DatasetCreate,
+):
+    """Create a new dataset in a background job.
+
+    Use this for large datasets: registering their recordings can take
+    longer than a request is allowed to last. Poll the returned job to
+    follow the progress.
+    """
+    if await api.datasets.get_by_name(session, dataset.name):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dataset with the name '{dataset.name}' already exists.",
+        )
+
+    return await api.jobs.enqueue(
+        session,
+        "create_dataset",
+        name=dataset.name,
+        description=dataset.description,
+        dataset_dir=str(dataset.audio_dir),
+        audio_dir=str(settings.audio_dir),
+    )
+
+
 @dataset_router.patch(
     "/detail/",
     response_model=schemas.Dataset,
@@ -115,6 +147,31 @@ async def get_file_state(
     return await api.datasets.get_state(session, dataset)
 
 
+@dataset_router.post(
+    "/detail/sync/",
+    response_model=schemas.Job,
+    status_code=202,
+)
+async def sync_dataset(
+    settings: WhombatSettings,
+    session: Session,
+    dataset_uuid: UUID,
+):
+    """Register new and changed files of a dataset directory in a job.
+
+    Only files that were added or changed since the last sync are read.
+    Poll the returned job to follow the progress. Its message summarises
+    the changes once it has finished.
+    """
+    dataset = await api.datasets.get(session, dataset_uuid)
+    return await api.jobs.enqueue(
+        session,
+        "sync_dataset",
+        dataset_uuid=str(dataset.uuid),
+        audio_dir=str(settings.audio_dir),
+    )
+
+
 @dataset_router.delete(
     "/detail/",
     response_model=schemas.Dataset,
@@ -196,3 +253,25 @@ async def import_dataset(
     await session.commit()
     await session.refresh(db_dataset)
     return schemas.Dataset.model_validate(db_dataset)
+
+
+@dataset_router.post(
+    "/import/background/",
+    response_model=schemas.Job,
+    status_code=202,
+)
+async def import_dataset_in_background(
+    settings: WhombatSettings,
+    session: Session,
+    dataset: UploadFile,
+    audio_dir: Annotated[DirectoryPath, Body()],
+):
+    """Import a dataset in a background job."""
+    path = await api.save_job_file(dataset.file)
+    return await api.jobs.enqueue(
+        session,
+        "import_dataset",
+        path=str(path),
+        dataset_dir=str(audio_dir),
+        audio_dir=str(settings.audio_dir),
+    )
@@ -297,3 +297,25 @@ async def import_evaluation_set(
     await session.commit()
     await session.refresh(db_dataset)
     return schemas.EvaluationSet.model_validate(db_dataset)
+
+
+@evaluation_sets_router.post(
+    "/import/background/",
+    response_model=schemas.Job,
+    status_code=202,
+)
+async def import_evaluation_set_in_background(
+    settings: WhombatSettings,
+    session: Session,
+    evaluation_set: UploadFile,
+    task: Annotated[str, Body()],
+):
+    """Import an evaluation set in a background job."""
+    path = await api.save_job_file(evaluation_set.file)
+    return await api.jobs.enqueue(
+        session,
+        "import_evaluation_set",
+        path=str(path),
+        task=task,
+        audio_dir=str(settings.audio_dir),
+    )
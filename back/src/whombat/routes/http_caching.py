@@ -0,0 +1,105 @@
+"""HTTP caching of responses derived from the content of recordings.
+
+Audio and spectrogram responses are fully determined by the content hash
+of the recording, its time expansion and the request parameters. They are
+sent with a strong ETag computed from these values.
+
+The URLs only identify the recording by UUID, and the file or the time
+expansion of a recording can change, so responses are not immutable.
+Browsers and proxies may store them but must revalidate them on every
+use. Conditional requests are answered before any audio is read: a request
+whose `If-None-Match` header matches the ETag gets an empty 304 response.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Response, status
+
+__all__ = [
+    "REVALIDATE",
+    "caching_headers",
+    "if_range_matches",
+    "make_etag",
+    "none_match",
+    "not_modified",
+]
+
+REVALIDATE = "no-cache"
+"""Cache-Control value of responses that must be revalidated before use."""
+
+
+def make_etag(recording_hash: str, *parameters: Any) -> str:
+    """Compute a strong ETag from a recording hash and request parameters.
+
+    Parameters must be JSON serializable. Pydantic models should be
+    dumped first.
+    """
+    payload = json.dumps(
+        [recording_hash, *parameters],
+        sort_keys=True,
+        default=str,
+    )
+    return f'"{hashlib.sha256(payload.encode()).hexdigest()[:32]}"'
+
+
+def caching_headers(etag: str) -> dict[str, str]:
+    """Headers of a response identified by the given ETag."""
+    return {"ETag": etag, "Cache-Control": REVALIDATE}
+
+
+def none_match(if_none_match: str | None, etag: str) -> bool:
+    """Check whether a response must be sent in full.
+
+    Implements the `If-None-Match` precondition. It uses the weak
+    comparison, so weak versions of the ETag also match.
+
+    Returns
+    -------
+    bool
+        False if the client already has the current representation and
+        a 304 response should be sent instead.
+    """
+    if if_none_match is None:
+        return True
+
+    if if_none_match.strip() == "*":
+        return False
+
+    candidates = {
+        candidate.strip().removeprefix("W/")
+        for candidate in if_none_match.split(",")
+    }
+    return etag.removeprefix("W/") not in candidates
+
+
+def if_range_matches(if_range: str | None, etag: str) -> bool:
+    """Check whether the Range header of a request should be honoured.
+
+    Implements the `If-Range` precondition. ETags are compared with the
+    strong comparison. Dates never match, as no Last-Modified header is
+    sent.
+
+    Returns
+    -------
+    bool
+        True if there is no If-Range header or it matches the ETag. If
+        False the whole representation must be sent instead of a range.
+    """
+    if if_range is None:
+        return True
+
+    if_range = if_range.strip()
+    if if_range.startswith("W/"):
+        return False
+
+    return if_range == etag
+
+
+def not_modified(etag: str) -> Response:
+    """Build the response to a request whose If-None-Match matched."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=caching_headers(etag),
+    )
@@ -0,0 +1,60 @@
+"""REST API routes for background jobs."""
+
+from uuid import UUID
+
+from fastapi import APIRouter
+
+from whombat import api, models, schemas
+from whombat.routes.dependencies import Session
+from whombat.routes.types import Limit, Offset
+
+__all__ = [
+    "jobs_router",
+]
+
+jobs_router = APIRouter()
+
+
+@jobs_router.get("/", response_model=schemas.Page[schemas.Job])
+async def get_jobs(
+    session: Session,
+    status: schemas.JobStatus | None = None,
+    limit: Limit = 100,
+    offset: Offset = 0,
+) -> schemas.Page[schemas.Job]:
+    """Get list of jobs, most recent first."""
+    filters = []
+    if status is not None:
+        filters.append(models.Job.status == status.value)
+
+    jobs, total = await api.jobs.get_many(
+        session,
+        limit=limit,
+        offset=offset,
+        filters=filters,
+    )
+    return schemas.Page(
+        items=jobs,
+        total=total,
+        offset=offset,
+        limit=limit,
+    )
+
+
+@jobs_router.get("/detail/", response_model=schemas.Job)
+async def get_job(
+    session: Session,
+    job_uuid: UUID,
+) -> schemas.Job:
+    """Get a job, to follow its progress."""
+    return await api.jobs.get(session, job_uuid)
+
+
+@jobs_router.post("/detail/cancel/", response_model=schemas.Job)
+async def cancel_job(
+    session: Session,
+    job_uuid: UUID,
+) -> schemas.Job:
+    """Cancel a job."""
+    job = await api.jobs.get(session, job_uuid)
+    return await api.jobs.cancel(session, job)
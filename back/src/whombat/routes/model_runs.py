@@ -112,6 +112,31 @@ async def evaluate_model_run(
     return evaluation
 
 
+@model_runs_router.post(
+    "/detail/evaluate/background/",
+    response_model=schemas.Job,
+    status_code=202,
+)
+async def evaluate_model_run_in_background(
+    session: Session,
+    model_run_uuid: UUID,
+    evaluation_set_uuid: UUID,
+    settings: WhombatSettings,
+) -> schemas.Job:
+    """Evaluate a model run in a background job."""
+    model_run = await api.model_runs.get(session, model_run_uuid)
+    evaluation_set = await api.evaluation_sets.get(
+        session, evaluation_set_uuid
+    )
+    return await api.jobs.enqueue(
+        session,
+        "evaluate_model_run",
+        model_run_uuid=str(model_run.uuid),
+        evaluation_set_uuid=str(evaluation_set.uuid),
+        audio_dir=str(settings.audio_dir),
+    )
+
+
 @model_runs_router.delete("/detail/", response_model=schemas.ModelRun)
 async def delete_model_run(
     session: Session,
@@ -155,3 +180,29 @@ async def import_model_run(
     )
     await session.commit()
     return data
+
+
+@model_runs_router.post(
+    "/import/background/",
+    response_model=schemas.Job,
+    status_code=202,
+)
+async def import_model_run_in_background(
+    session: Session,
+    model_run: UploadFile,
+    evaluation_set_uuid: Annotated[UUID, Body()],
+    settings: WhombatSettings,
+) -> schemas.Job:
+    """Import model run in a background job."""
+    evaluation_set = await api.evaluation_sets.get(
+        session,
+        evaluation_set_uuid,
+    )
+    path = await api.save_job_file(model_run.file)
+    return await api.jobs.enqueue(
+        session,
+        "import_model_run",
+        path=str(path),
+        evaluation_set_uuid=str(evaluation_set.uuid),
+        audio_dir=str(settings.audio_dir),
+    )
@@ -1,13 +1,19 @@
 """REST API routes for spectrograms."""
 
-from typing import Annotated
+from typing import Annotated, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Response
+from fastapi import APIRouter, Depends, Header, Response
 
-from whombat import api, schemas
-from whombat.core import images
+from whombat import api, exceptions, models, schemas
+from whombat.core.images import MEDIA_TYPES, pack_images
 from whombat.routes.dependencies import Session, WhombatSettings
+from whombat.routes.http_caching import (
+    caching_headers,
+    make_etag,
+    none_match,
+    not_modified,
+)
 
 __all__ = ["spectrograms_router"]
 
@@ -30,6 +36,11 @@ async def get_spectrogram(
         schemas.SpectrogramParameters,
         Depends(schemas.SpectrogramParameters),
     ],
+    image_parameters: Annotated[
+        schemas.ImageParameters,
+        Depends(schemas.ImageParameters),
+    ],
+    if_none_match: str | None = Header(None),
 ) -> Response:
     """Get a spectrogram for a recording.
 
@@ -45,41 +56,320 @@ async def get_spectrogram(
         End time in seconds.
     parameters : SpectrogramParameters
         Spectrogram parameters.
+    image_parameters : ImageParameters
+        Image format and compression options.
+    if_none_match : str, optional
+        ETags the client already has.
 
     Returns
     -------
     Response
-        Spectrogram image.
+        Spectrogram image, or an empty 304 response if the client has it.
+
+    """
+    recording = await api.recordings.get(session, recording_uuid)
+
+    etag = make_etag(
+        recording.hash,
+        "spectrogram",
+        recording.time_expansion,
+        start_time,
+        end_time,
+        audio_parameters.model_dump(mode="json"),
+        spectrogram_parameters.model_dump(mode="json"),
+        image_parameters.model_dump(mode="json"),
+    )
+    if not none_match(if_none_match, etag):
+        return not_modified(etag)
+
+    content = await api.get_spectrogram_image(
+        recording,
+        start_time,
+        end_time,
+        audio_parameters,
+        spectrogram_parameters,
+        audio_dir=settings.audio_dir,
+        image_parameters=image_parameters,
+    )
+
+    return Response(
+        content=content,
+        media_type=MEDIA_TYPES[image_parameters.format],
+        headers=caching_headers(etag),
+    )
+
+
+@spectrograms_router.post(
+    "/batch/",
+)
+async def get_spectrogram_batch(
+    session: Session,
+    settings: WhombatSettings,
+    batch: schemas.SpectrogramBatch,
+) -> Response:
+    """Get the spectrograms of many windows in a single request.
+
+    All recordings are fetched in one query and windows of the same
+    recording are computed together, opening each audio file once.
+
+    Parameters
+    ----------
+    session
+        SQLAlchemy session.
+    settings
+        Whombat settings.
+    batch
+        The windows and the parameters shared by all of them.
+
+    Returns
+    -------
+    Response
+        A bundle with a JSON index followed by the images, in the order
+        of the requested windows. See `whombat.core.images.pack_images`.
+    """
+    uuids = {window.recording_uuid for window in batch.windows}
+    recordings, _ = await api.recordings.get_many(
+        session,
+        limit=None,
+        filters=[models.Recording.uuid.in_(uuids)],
+    )
+    by_uuid = {recording.uuid: recording for recording in recordings}
+
+    missing = uuids - by_uuid.keys()
+    if missing:
+        raise exceptions.NotFoundError(
+            f"Recordings not found: {', '.join(map(str, missing))}"
+        )
+
+    contents = await api.get_spectrogram_images(
+        [
+            (
+                by_uuid[window.recording_uuid],
+                window.start_time,
+                window.end_time,
+            )
+            for window in batch.windows
+        ],
+        batch.audio_parameters,
+        batch.spectrogram_parameters,
+        audio_dir=settings.audio_dir,
+        image_parameters=batch.image_parameters,
+    )
+
+    return Response(
+        content=pack_images(
+            contents,
+            [window.model_dump(mode="json") for window in batch.windows],
+            media_type=MEDIA_TYPES[batch.image_parameters.format],
+        ),
+        media_type="application/octet-stream",
+    )
+
+
+@spectrograms_router.get(
+    "/raw/",
+)
+async def get_raw_spectrogram(
+    session: Session,
+    settings: WhombatSettings,
+    recording_uuid: UUID,
+    start_time: float,
+    end_time: float,
+    audio_parameters: Annotated[
+        schemas.AudioParameters, Depends(schemas.AudioParameters)
+    ],
+    spectrogram_parameters: Annotated[
+        schemas.SpectrogramParameters,
+        Depends(schemas.SpectrogramParameters),
+    ],
+    dtype: Literal["uint8", "float16"] = "uint8",
+    if_none_match: str | None = Header(None),
+) -> Response:
+    """Get the normalized values of a spectrogram for a recording.
+
+    The response body is a small binary header with the shape, time and
+    frequency axes and dB range of the spectrogram, followed by its
+    values. Clients can colormap the values themselves, which avoids
+    encoding an image and makes colormap and contrast changes free.
+
+    Parameters
+    ----------
+    session
+        SQLAlchemy session.
+    settings
+        Whombat settings.
+    recording_uuid
+        The UUID of the recording.
+    start_time
+        Start time in seconds.
+    end_time
+        End time in seconds.
+    audio_parameters
+        Audio parameters.
+    spectrogram_parameters
+        Spectrogram parameters.
+    dtype
+        Data type of the values, uint8 or float16.
+    if_none_match
+        ETags the client already has.
 
+    Returns
+    -------
+    Response
+        The encoded spectrogram, or an empty 304 response if the client
+        has it.
     """
     recording = await api.recordings.get(session, recording_uuid)
 
-    data = api.compute_spectrogram(
+    etag = make_etag(
+        recording.hash,
+        "raw",
+        recording.time_expansion,
+        start_time,
+        end_time,
+        audio_parameters.model_dump(mode="json"),
+        spectrogram_parameters.model_dump(mode="json"),
+        dtype,
+    )
+    if not none_match(if_none_match, etag):
+        return not_modified(etag)
+
+    content = await api.get_raw_spectrogram(
         recording,
         start_time,
         end_time,
         audio_parameters,
         spectrogram_parameters,
         audio_dir=settings.audio_dir,
+        dtype=dtype,
+    )
+
+    return Response(
+        content=content,
+        media_type="application/octet-stream",
+        headers=caching_headers(etag),
+    )
+
+
+@spectrograms_router.get(
+    "/pyramid/",
+    response_model=schemas.SpectrogramPyramidInfo,
+)
+async def get_spectrogram_pyramid(
+    session: Session,
+    settings: WhombatSettings,
+    recording_uuid: UUID,
+    spectrogram_parameters: Annotated[
+        schemas.SpectrogramParameters,
+        Depends(schemas.SpectrogramParameters),
+    ],
+    response: Response,
+) -> schemas.SpectrogramPyramidInfo:
+    """Get the layout of the spectrogram tile pyramid of a recording.
+
+    If the pyramid has not been built yet, it is built in the background
+    and a 202 response is returned.
+    """
+    recording = await api.recordings.get(session, recording_uuid)
+
+    pyramid = await api.request_spectrogram_pyramid(
+        recording,
+        spectrogram_parameters,
+        audio_dir=settings.audio_dir,
     )
 
-    # Normalize.
-    if spectrogram_parameters.normalize:
-        data_min = data.min()
-        data_max = data.max()
-        data = data - data_min
-        data_range = data_max - data_min
-        if data_range > 0:
-            data = data / data_range
-
-    image = images.array_to_image(
-        data,
-        cmap=spectrogram_parameters.cmap,
+    if pyramid is None:
+        response.status_code = 202
+        return schemas.SpectrogramPyramidInfo(ready=False)
+
+    info = pyramid.info
+    return schemas.SpectrogramPyramidInfo(
+        ready=True,
+        tile_width=info.tile_width,
+        levels=info.levels,
+        tiles=[info.tiles(level) for level in range(info.levels)],
+        column_durations=[
+            info.column_duration(level) for level in range(info.levels)
+        ],
+        max_frequency=info.samplerate / 2,
+    )
+
+
+@spectrograms_router.get(
+    "/tiles/",
+)
+async def get_spectrogram_tile(
+    session: Session,
+    settings: WhombatSettings,
+    recording_uuid: UUID,
+    level: int,
+    index: int,
+    spectrogram_parameters: Annotated[
+        schemas.SpectrogramParameters,
+        Depends(schemas.SpectrogramParameters),
+    ],
+    image_parameters: Annotated[
+        schemas.ImageParameters,
+        Depends(schemas.ImageParameters),
+    ],
+    if_none_match: str | None = Header(None),
+) -> Response:
+    """Get a tile of the spectrogram pyramid of a recording.
+
+    Parameters
+    ----------
+    session
+        SQLAlchemy session.
+    settings
+        Whombat settings.
+    recording_uuid
+        The UUID of the recording.
+    level
+        Pyramid level, 0 being the finest resolution.
+    index
+        Index of the tile within the level.
+    spectrogram_parameters
+        Spectrogram parameters.
+    image_parameters
+        Image format and compression options.
+    if_none_match
+        ETags the client already has.
+
+    Returns
+    -------
+    Response
+        Tile image, an empty 202 response if the pyramid is still being
+        built, or an empty 304 response if the client has the tile.
+    """
+    recording = await api.recordings.get(session, recording_uuid)
+
+    etag = make_etag(
+        recording.hash,
+        "tile",
+        level,
+        index,
+        spectrogram_parameters.model_dump(mode="json"),
+        image_parameters.model_dump(mode="json"),
+        settings.spectrogram_tile_width,
+        settings.spectrogram_pyramid_pooling,
+    )
+    if not none_match(if_none_match, etag):
+        return not_modified(etag)
+
+    content = await api.get_spectrogram_tile(
+        recording,
+        level,
+        index,
+        spectrogram_parameters,
+        audio_dir=settings.audio_dir,
+        image_parameters=image_parameters,
     )
 
-    buffer = images.image_to_buffer(image)
+    if content is None:
+        return Response(status_code=202, headers={"Retry-After": "1"})
 
     return Response(
-        content=buffer.read(),
-        media_type="image/png",
+        content=content,
+        media_type=MEDIA_TYPES[image_parameters.format],
+        headers=caching_headers(etag),
     )
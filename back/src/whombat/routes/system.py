@@ -0,0 +1,114 @@
+"""REST API routes for system status."""
+
+from fastapi import APIRouter
+
+from whombat import api, schemas
+from whombat.routes.dependencies import WhombatSettings
+from whombat.system.database import get_async_db_engine, get_pool_status
+from whombat.system.executors import get_executor_status
+
+__all__ = [
+    "system_router",
+]
+
+system_router = APIRouter()
+
+
+@system_router.get(
+    "/database/pool/",
+    response_model=schemas.DatabasePoolStatus,
+)
+async def get_database_pool_status(settings: WhombatSettings):
+    """Get the usage of the database connection pool."""
+    engine = get_async_db_engine(settings)
+    return schemas.DatabasePoolStatus(**get_pool_status(engine))
+
+
+@system_router.get(
+    "/caches/",
+    response_model=list[schemas.CacheStatus],
+)
+async def get_cache_status():
+    """Get the usage of the local caches."""
+    caches = []
+
+    audio_cache = api.get_audio_cache()
+    if audio_cache is not None:
+        caches.append(
+            schemas.CacheStatus(
+                name="audio",
+                hits=audio_cache.stats.hits,
+                misses=audio_cache.stats.misses,
+                evictions=audio_cache.stats.evictions,
+                entries=audio_cache.entries(),
+                size=audio_cache.size(),
+                max_size=audio_cache.max_size,
+            )
+        )
+
+    handle_pool = api.get_audio_handle_pool()
+    if handle_pool is not None:
+        caches.append(
+            schemas.CacheStatus(
+                name="audio_handles",
+                hits=handle_pool.stats.hits,
+                misses=handle_pool.stats.misses,
+                evictions=handle_pool.stats.evictions,
+                entries=len(handle_pool),
+            )
+        )
+
+    spectrogram_cache = api.get_spectrogram_cache()
+    caches.append(
+        schemas.CacheStatus(
+            name="spectrograms_memory",
+            hits=spectrogram_cache.stats.hits,
+            misses=spectrogram_cache.stats.misses,
+            entries=len(spectrogram_cache.memory),
+            size=int(spectrogram_cache.memory.currsize),
+            max_size=spectrogram_cache.memory_size,
+        )
+    )
+
+    disk = spectrogram_cache.disk
+    if disk is not None:
+        caches.append(
+            schemas.CacheStatus(
+                name="spectrograms_disk",
+                hits=disk.stats.hits,
+                misses=disk.stats.misses,
+                evictions=disk.stats.evictions,
+                entries=disk.entries(),
+                size=disk.size(),
+                max_size=disk.max_size,
+            )
+        )
+
+    return caches
+
+
+@system_router.get(
+    "/executors/",
+    response_model=list[schemas.ExecutorStatus],
+)
+async def get_executors_status():
+    """Get the queue depth of the executors for blocking work."""
+    return [
+        schemas.ExecutorStatus(**status) for status in get_executor_status()
+    ]
+
+
+@system_router.get(
+    "/flights/",
+    response_model=list[schemas.FlightStatus],
+)
+async def get_flights_status():
+    """Get the coalescing of identical concurrent requests."""
+    return [
+        schemas.FlightStatus(**flights.status())
+        for flights in (
+            api.get_spectrogram_flights(),
+            api.get_audio_flights(),
+            api.get_s3_flights(),
+        )
+    ]
@@ -25,7 +25,7 @@ from whombat.schemas.annotation_tasks import (
     AnnotationTaskNote,
     AnnotationTaskUpdate,
 )
-from whombat.schemas.audio import AudioParameters
+from whombat.schemas.audio import AudioCodec, AudioParameters, Waveform
 from whombat.schemas.base import BaseSchema, Page
 from whombat.schemas.clip_annotations import (
     ClipAnnotation,
@@ -52,6 +52,7 @@ from whombat.schemas.datasets import (
     DatasetFile,
     DatasetRecording,
     DatasetRecordingCreate,
+    DatasetSync,
     DatasetUpdate,
     FileState,
 )
@@ -71,6 +72,7 @@ from whombat.schemas.features import (
     FeatureNameCreate,
     FeatureNameUpdate,
 )
+from whombat.schemas.jobs import Job, JobCreate, JobStatus, JobUpdate
 from whombat.schemas.model_runs import ModelRun, ModelRunCreate, ModelRunUpdate
 from whombat.schemas.notes import Note, NoteCreate, NoteUpdate
 from whombat.schemas.plugin import PluginInfo
@@ -106,11 +108,22 @@ from whombat.schemas.sound_events import (
 )
 from whombat.schemas.spectrograms import (
     AmplitudeParameters,
+    ImageFormat,
+    ImageParameters,
     Scale,
+    SpectrogramBatch,
     SpectrogramParameters,
+    SpectrogramPyramidInfo,
+    SpectrogramWindow,
     STFTParameters,
     Window,
 )
+from whombat.schemas.system import (
+    CacheStatus,
+    DatabasePoolStatus,
+    ExecutorStatus,
+    FlightStatus,
+)
 from whombat.schemas.tags import (
     PredictedTag,
     Tag,
@@ -132,8 +145,10 @@ __all__ = [
     "AnnotationTaskCreate",
     "AnnotationTaskNote",
     "AnnotationTaskUpdate",
+    "AudioCodec",
     "AudioParameters",
     "BaseSchema",
+    "CacheStatus",
     "Clip",
     "ClipAnnotation",
     "ClipAnnotationCreate",
@@ -149,11 +164,13 @@ __all__ = [
     "ClipPredictionTag",
     "ClipPredictionUpdate",
     "ClipUpdate",
+    "DatabasePoolStatus",
     "Dataset",
     "DatasetCreate",
     "DatasetFile",
     "DatasetRecording",
     "DatasetRecordingCreate",
+    "DatasetSync",
     "DatasetUpdate",
     "Evaluation",
     "EvaluationCreate",
@@ -161,11 +178,19 @@ __all__ = [
     "EvaluationSetCreate",
     "EvaluationSetUpdate",
     "EvaluationUpdate",
+    "ExecutorStatus",
     "Feature",
     "FeatureName",
     "FeatureNameCreate",
     "FeatureNameUpdate",
     "FileState",
+    "FlightStatus",
+    "ImageFormat",
+    "ImageParameters",
+    "Job",
+    "JobCreate",
+    "JobStatus",
+    "JobUpdate",
     "ModelRun",
     "ModelRunCreate",
     "ModelRunUpdate",
@@ -199,7 +224,10 @@ __all__ = [
     "SoundEventPredictionTag",
     "SoundEventPredictionUpdate",
     "SoundEventUpdate",
+    "SpectrogramBatch",
     "SpectrogramParameters",
+    "SpectrogramPyramidInfo",
+    "SpectrogramWindow",
     "Tag",
     "TagCount",
     "TagCreate",
@@ -210,5 +238,6 @@ __all__ = [
     "UserRunCreate",
     "UserRunUpdate",
     "UserUpdate",
+    "Waveform",
     "Window",
 ]
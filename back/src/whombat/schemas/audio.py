@@ -1,11 +1,22 @@
 """Schemas for spectrograms."""
 
+from typing import Literal
+
 from pydantic import BaseModel
 
 __all__ = [
+    "AudioCodec",
     "AudioParameters",
+    "Waveform",
 ]
 
+AudioCodec = Literal["wav", "flac", "vorbis", "opus"]
+"""Codecs that audio can be streamed and downloaded with.
+
+WAV and FLAC are lossless. Vorbis and Opus are lossy, much smaller, and
+resampled to at most 48 kHz.
+"""
+
 
 class ResamplingParameters(BaseModel):
     """Parameters for resampling."""
@@ -40,3 +51,22 @@ class AudioParameters(
     FilteringParameters,
 ):
     """Parameters for audio loading."""
+
+
+class Waveform(BaseModel):
+    """Amplitude envelope of a window of a recording."""
+
+    start_time: float
+    """Start time in seconds."""
+
+    end_time: float
+    """End time in seconds."""
+
+    min: list[list[float]]
+    """Minimum amplitude of each column, by channel."""
+
+    max: list[list[float]]
+    """Maximum amplitude of each column, by channel."""
+
+    rms: list[list[float]]
+    """Root mean square amplitude of each column, by channel."""
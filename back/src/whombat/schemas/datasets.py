@@ -16,6 +16,7 @@ __all__ = [
     "DatasetCreate",
     "DatasetUpdate",
     "DatasetRecordingCreate",
+    "DatasetSync",
     "FileState",
 ]
 
@@ -40,7 +41,8 @@ class DatasetCreate(BaseModel):
             if not isinstance(v, str):
                 raise ValueError("audio_dir must be a string when use_s3 is enabled.")
         else:
-            if not isinstance(v, DirectoryPath):
+            v = Path(v)
+            if not v.is_dir():
                 raise ValueError("audio_dir must be a valid local directory.")
         return v
 
@@ -98,6 +100,9 @@ class FileState(Enum):
 
     - ``unregistered``: The file is not registered in the database but is
         present in the dataset directory.
+
+    - ``modified``: The file is registered in the database and is present,
+        but has changed since the dataset was last synced.
     """
 
     MISSING = "missing"
@@ -109,6 +114,9 @@ class FileState(Enum):
     UNREGISTERED = "unregistered"
     """If the recording is not registered but the file is present."""
 
+    MODIFIED = "modified"
+    """If the recording is registered but the file has changed."""
+
 
 class DatasetFile(BaseModel):
     """Schema for DatasetFile objects returned to the user."""
@@ -120,6 +128,31 @@ class DatasetFile(BaseModel):
     """The state of the file."""
 
 
+class DatasetSync(BaseModel):
+    """Summary of the synchronisation of a dataset with its directory."""
+
+    new_files: int
+    """Number of files that were not seen in the last sync."""
+
+    changed_files: int
+    """Number of files whose size, modification time or ETag changed."""
+
+    unchanged_files: int
+    """Number of files that did not change and were not read."""
+
+    removed_files: list[Path]
+    """Files that were seen in the last sync but no longer exist."""
+
+    added_recordings: int
+    """Number of recordings added to the dataset."""
+
+    updated_recordings: int
+    """Number of recordings whose content was updated."""
+
+    failed_files: int
+    """Number of new files that could not be registered."""
+
+
 class DatasetRecordingCreate(BaseModel):
     """Schema for DatasetRecording objects created by the user."""
 
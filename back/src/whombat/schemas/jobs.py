@@ -0,0 +1,112 @@
+"""Schemas for handling background jobs."""
+
+import datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from pydantic import Field
+
+from whombat.schemas.base import BaseSchema
+
+__all__ = [
+    "Job",
+    "JobCreate",
+    "JobStatus",
+    "JobUpdate",
+]
+
+
+class JobStatus(str, Enum):
+    """The status of a job.
+
+    - ``queued``: The job is waiting for a worker.
+
+    - ``running``: A worker is running the job.
+
+    - ``succeeded``: The job finished. Its result can be fetched.
+
+    - ``failed``: The job raised an error or was interrupted.
+
+    - ``cancelled``: The job was cancelled before it finished.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job will not change anymore."""
+        return self not in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+class JobCreate(BaseSchema):
+    """Schema for enqueueing a job."""
+
+    kind: str
+    """The operation to run."""
+
+    parameters: dict[str, Any] = Field(default_factory=dict)
+    """The arguments of the operation. Must be JSON serializable."""
+
+
+class Job(JobCreate):
+    """Schema for a job as returned to the user."""
+
+    uuid: UUID
+    """The unique identifier of the job."""
+
+    id: int = Field(..., exclude=True)
+    """The database identifier of the job."""
+
+    status: JobStatus
+    """The status of the job."""
+
+    progress: float = 0
+    """Percentage of the work done, from 0 to 100."""
+
+    message: str | None = None
+    """A description of what the job is currently doing."""
+
+    cancel_requested: bool = False
+    """Whether the job was asked to stop."""
+
+    owner: str | None = None
+    """The job runner that claimed the job."""
+
+    result_type: str | None = None
+    """The type of the object created by the job, e.g. `dataset`."""
+
+    result_uuid: UUID | None = None
+    """The UUID of the object created by the job."""
+
+    error: str | None = None
+    """The error that made the job fail."""
+
+    started_on: datetime.datetime | None = None
+    """When a worker started the job."""
+
+    heartbeat_on: datetime.datetime | None = None
+    """When the runner of the job last reported that it was alive."""
+
+    finished_on: datetime.datetime | None = None
+    """When the job succeeded, failed or was cancelled."""
+
+
+class JobUpdate(BaseSchema):
+    """Schema for updating a job."""
+
+    status: JobStatus | None = None
+    progress: float | None = None
+    message: str | None = None
+    cancel_requested: bool | None = None
+    owner: str | None = None
+    result_type: str | None = None
+    result_uuid: UUID | None = None
+    error: str | None = None
+    started_on: datetime.datetime | None = None
+    heartbeat_on: datetime.datetime | None = None
+    finished_on: datetime.datetime | None = None
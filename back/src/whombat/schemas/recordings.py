@@ -63,7 +63,8 @@ class RecordingCreate(BaseModel):
                 raise ValueError("S3 file path does not point to a valid .wav audio file.")
         else:
             # For local file paths, check if the file exists and is an audio file
-            if not isinstance(v, FilePath):
+            v = Path(v)
+            if not v.is_file():
                 raise ValueError("Path must be a valid local file path.")
             if not files.is_audio_file(v):
                 raise ValueError("Local file path does not point to a valid audio file.")
@@ -98,7 +99,10 @@ class Recording(BaseSchema):
     """The time expansion factor of the recording."""
 
     hash: str
-    """The md5 hash of the audio file."""
+    """The hash of the audio file."""
+
+    hash_algorithm: str = "md5"
+    """The algorithm used to compute the hash."""
 
     duration: float
     """The duration of the audio file in seconds.
@@ -1,11 +1,19 @@
 """Schemas for spectrograms."""
 
 from typing import Literal
+from uuid import UUID
 
 from pydantic import BaseModel, Field, field_validator, model_validator
 
+from whombat.schemas.audio import AudioParameters
+
 __all__ = [
+    "ImageFormat",
+    "ImageParameters",
+    "SpectrogramBatch",
     "SpectrogramParameters",
+    "SpectrogramPyramidInfo",
+    "SpectrogramWindow",
     "STFTParameters",
     "AmplitudeParameters",
     "Scale",
@@ -114,3 +122,80 @@ class SpectrogramParameters(STFTParameters, AmplitudeParameters):
 
     cmap: str = "gray"
     """Colormap to use for spectrogram."""
+
+
+ImageFormat = Literal["png", "webp", "jpeg"]
+
+
+class ImageParameters(BaseModel):
+    """Parameters for encoding spectrogram images."""
+
+    format: ImageFormat = "png"
+    """Image format.
+
+    PNG is lossless. WebP and JPEG are lossy but produce much smaller
+    images, and JPEG is the fastest to encode.
+    """
+
+    compress_level: int = Field(default=6, ge=0, le=9)
+    """PNG compression level, from 0 (fastest) to 9 (smallest)."""
+
+    quality: int = Field(default=85, ge=1, le=100)
+    """Quality of WebP and JPEG images."""
+
+
+class SpectrogramPyramidInfo(BaseModel):
+    """Description of the spectrogram tile pyramid of a recording."""
+
+    ready: bool
+    """Whether the pyramid has been built.
+
+    If False the pyramid is being built and the remaining fields are
+    empty.
+    """
+
+    tile_width: int | None = None
+    """Number of spectrogram columns in each tile."""
+
+    levels: int = 0
+    """Number of levels, 0 being the finest resolution."""
+
+    tiles: list[int] = Field(default_factory=list)
+    """Number of tiles in each level."""
+
+    column_durations: list[float] = Field(default_factory=list)
+    """Duration in seconds of a spectrogram column in each level."""
+
+    max_frequency: float | None = None
+    """Frequency in Hz of the top row of every tile."""
+
+
+class SpectrogramWindow(BaseModel):
+    """A window of a recording."""
+
+    recording_uuid: UUID
+    """UUID of the recording."""
+
+    start_time: float
+    """Start time in seconds."""
+
+    end_time: float
+    """End time in seconds."""
+
+
+class SpectrogramBatch(BaseModel):
+    """Request for the spectrograms of many windows at once."""
+
+    windows: list[SpectrogramWindow] = Field(..., max_length=500)
+    """Windows to compute spectrograms for."""
+
+    audio_parameters: AudioParameters = Field(default_factory=AudioParameters)
+    """Audio parameters shared by all windows."""
+
+    spectrogram_parameters: SpectrogramParameters = Field(
+        default_factory=SpectrogramParameters
+    )
+    """Spectrogram parameters shared by all windows."""
+
+    image_parameters: ImageParameters = Field(default_factory=ImageParameters)
+    """Image format and compression options."""
@@ -0,0 +1,113 @@
+"""Schemas for system status information."""
+
+from pydantic import BaseModel, Field
+
+__all__ = [
+    "CacheStatus",
+    "DatabasePoolStatus",
+    "ExecutorStatus",
+    "FlightStatus",
+]
+
+
+class DatabasePoolStatus(BaseModel):
+    """Usage of the database connection pool.
+
+    Fields are None when the underlying pool does not keep track of
+    them, as is the case for SQLite databases.
+    """
+
+    size: int | None = Field(
+        default=None,
+        description="Number of connections the pool keeps open.",
+    )
+    checked_in: int | None = Field(
+        default=None,
+        description="Idle connections available in the pool.",
+    )
+    checked_out: int | None = Field(
+        default=None,
+        description="Connections currently in use.",
+    )
+    overflow: int | None = Field(
+        default=None,
+        description="Connections opened above the pool size.",
+    )
+
+
+class CacheStatus(BaseModel):
+    """Usage of a cache in the current worker process."""
+
+    name: str = Field(..., description="Cache name.")
+    hits: int = Field(default=0, description="Number of cache hits.")
+    misses: int = Field(default=0, description="Number of cache misses.")
+    evictions: int = Field(
+        default=0,
+        description="Number of entries evicted to stay within budget.",
+    )
+    entries: int = Field(default=0, description="Number of cached entries.")
+    size: int = Field(default=0, description="Size of the cache in bytes.")
+    max_size: int = Field(
+        default=0,
+        description="Maximum size of the cache in bytes.",
+    )
+
+
+class ExecutorStatus(BaseModel):
+    """Usage of an executor for blocking work in the current worker."""
+
+    name: str = Field(..., description="Executor name.")
+    kind: str = Field(
+        ...,
+        description="Whether work runs in processes or threads.",
+    )
+    max_workers: int = Field(..., description="Number of workers.")
+    active: int = Field(
+        default=0,
+        description="Tasks currently being run by a worker.",
+    )
+    queued: int = Field(
+        default=0,
+        description="Tasks waiting for a free worker.",
+    )
+    submitted: int = Field(default=0, description="Tasks submitted.")
+    completed: int = Field(default=0, description="Tasks completed.")
+    failed: int = Field(
+        default=0,
+        description="Tasks that raised an error or were cancelled.",
+    )
+    max_in_flight: int = Field(
+        default=0,
+        description="Largest number of unfinished tasks seen at once.",
+    )
+
+
+class FlightStatus(BaseModel):
+    """Coalescing of identical concurrent requests in the current worker."""
+
+    name: str = Field(..., description="Name of the single flight group.")
+    calls: int = Field(default=0, description="Total number of calls.")
+    executions: int = Field(
+        default=0,
+        description="Calls that did the work themselves.",
+    )
+    shared: int = Field(
+        default=0,
+        description="Calls that waited for an identical call in flight.",
+    )
+    failed: int = Field(
+        default=0,
+        description="Executions that raised an error or were cancelled.",
+    )
+    max_waiters: int = Field(
+        default=0,
+        description="Largest number of calls seen sharing one execution.",
+    )
+    in_flight: int = Field(
+        default=0,
+        description="Executions currently running.",
+    )
+    keys: dict[str, int] = Field(
+        default_factory=dict,
+        description="Number of calls waiting on each running execution.",
+    )
@@ -12,6 +12,14 @@ from fastapi.staticfiles import StaticFiles
 from whombat import exceptions
 from whombat.plugins import add_plugin_pages, add_plugin_routes, load_plugins
 from whombat.system.boot import whombat_init
+from whombat.system.database import (
+    dispose_async_db_engines,
+    get_async_db_engine,
+)
+from whombat.system.executors import (
+    configure_executors,
+    shutdown_executors,
+)
 from whombat.system.settings import Settings
 
 ROOT_DIR = Path(__file__).parent.parent
@@ -22,8 +30,25 @@ async def lifespan(settings: Settings, _: FastAPI):
     """Context manager to run startup and shutdown events."""
     await whombat_init(settings)
 
+    # Worker processes do not share the settings given to the app.
+    configure_executors(settings)
+
+    # Create the shared database engine up front so that all requests
+    # draw connections from the same pool.
+    get_async_db_engine(settings)
+
+    # NOTE: Import the job runner here to avoid circular imports
+    from whombat.api.jobs import get_job_runner
+
+    job_runner = get_job_runner()
+    await job_runner.start(settings)
+
     yield
 
+    await job_runner.stop()
+    shutdown_executors()
+    await dispose_async_db_engines()
+
 
 def create_app(settings: Settings) -> FastAPI:
     # NOTE: Import the routes here to avoid circular imports
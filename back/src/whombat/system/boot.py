@@ -3,7 +3,7 @@ import webbrowser
 from colorama import Fore, Style, just_fix_windows_console
 
 from whombat.system.database import (
-    create_async_db_engine,
+    get_async_db_engine,
     get_async_session,
     get_database_url,
     init_database,
@@ -48,8 +48,7 @@ def print_first_run_message(settings: Settings):
 
 async def is_first_run(settings: Settings) -> bool:
     """Check if this is the first time the application is run."""
-    db_url = get_database_url(settings)
-    engine = create_async_db_engine(db_url)
+    engine = get_async_db_engine(settings)
     async with get_async_session(engine) as session:
         is_first_run = await is_first_user(session)
 
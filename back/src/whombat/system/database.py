@@ -10,7 +10,7 @@ from alembic import script
 from alembic.command import stamp, upgrade
 from alembic.config import Config
 from alembic.runtime import migration
-from sqlalchemy import Connection, Engine, create_engine
+from sqlalchemy import Connection, Engine, create_engine, event
 from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -30,8 +30,11 @@ __all__ = [
     "create_or_update_db",
     "create_async_db_engine",
     "create_sync_db_engine",
+    "dispose_async_db_engines",
+    "get_async_db_engine",
     "get_database_url",
     "get_db_state",
+    "get_pool_status",
     "init_database",
     "get_async_session",
     "models",
@@ -128,7 +131,14 @@ def get_database_url(
     return validate_database_url(url, is_async=is_async)
 
 
-def create_async_db_engine(database_url: str | URL) -> AsyncEngine:
+def create_async_db_engine(
+    database_url: str | URL,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    pool_timeout: float | None = None,
+    pool_pre_ping: bool = False,
+    pool_recycle: int = -1,
+) -> AsyncEngine:
     """Create the database engine.
 
     Parameters
@@ -137,6 +147,20 @@ def create_async_db_engine(database_url: str | URL) -> AsyncEngine:
         The url to the database. Defaults to `sqlite+aiosqlite://`. See
         https://docs.sqlalchemy.org/en/14/core/engines.html#database-urls for
         more information on the format.
+    pool_size : int, optional
+        Number of connections to keep open in the pool. Only used for
+        databases with a queue pool (i.e. not SQLite).
+    max_overflow : int, optional
+        Number of connections allowed above `pool_size`. Only used for
+        databases with a queue pool (i.e. not SQLite).
+    pool_timeout : float, optional
+        Seconds to wait for a connection before raising an error. Only used
+        for databases with a queue pool (i.e. not SQLite).
+    pool_pre_ping : bool
+        Whether to test connections for liveness on checkout.
+    pool_recycle : int
+        Seconds after which a connection is recycled. Defaults to -1, which
+        means connections are never recycled.
 
     Notes
     -----
@@ -152,7 +176,110 @@ def create_async_db_engine(database_url: str | URL) -> AsyncEngine:
         database_url = make_url(database_url)
 
     database_url = validate_database_url(database_url, is_async=True)
-    return create_async_engine(database_url)
+
+    kwargs: dict = dict(
+        pool_pre_ping=pool_pre_ping,
+        pool_recycle=pool_recycle,
+    )
+
+    # NOTE: SQLite uses a static or single connection pool depending on
+    # the database location, neither of which accept sizing arguments.
+    if database_url.get_backend_name() != "sqlite":
+        if pool_size is not None:
+            kwargs["pool_size"] = pool_size
+        if max_overflow is not None:
+            kwargs["max_overflow"] = max_overflow
+        if pool_timeout is not None:
+            kwargs["pool_timeout"] = pool_timeout
+
+    engine = create_async_engine(database_url, **kwargs)
+    event.listen(engine.sync_engine, "connect", _log_new_connection)
+    return engine
+
+
+_ENGINES: dict[str, AsyncEngine] = {}
+"""Process-wide database engines indexed by database url."""
+
+
+def get_async_db_engine(settings: Settings) -> AsyncEngine:
+    """Get the shared database engine for the given settings.
+
+    The engine, and hence its connection pool, is created once per process
+    and database url and reused on every subsequent call. This avoids
+    paying the connection handshake on every request.
+
+    Parameters
+    ----------
+    settings : Settings
+        The settings for the application.
+
+    Returns
+    -------
+    AsyncEngine
+        The shared database engine.
+    """
+    db_url = get_database_url(settings)
+    key = db_url.render_as_string(hide_password=False)
+
+    engine = _ENGINES.get(key)
+    if engine is None:
+        engine = create_async_db_engine(
+            db_url,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            pool_recycle=settings.db_pool_recycle,
+        )
+        _ENGINES[key] = engine
+
+    return engine
+
+
+async def dispose_async_db_engines() -> None:
+    """Close all connections of the shared database engines."""
+    engines = list(_ENGINES.values())
+    _ENGINES.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
+def get_pool_status(engine: AsyncEngine) -> dict[str, int | None]:
+    """Get the current usage of the engine connection pool.
+
+    Parameters
+    ----------
+    engine : AsyncEngine
+        The database engine.
+
+    Returns
+    -------
+    dict
+        The pool size, the number of idle (checked in) and in use (checked
+        out) connections, and the current overflow. Values are None if the
+        pool does not keep track of them (e.g. SQLite static pools).
+    """
+    pool = engine.sync_engine.pool
+
+    def _get(name: str) -> int | None:
+        method = getattr(pool, name, None)
+        if method is None:
+            return None
+        return method()
+
+    return dict(
+        size=_get("size"),
+        checked_in=_get("checkedin"),
+        checked_out=_get("checkedout"),
+        overflow=_get("overflow"),
+    )
+
+
+def _log_new_connection(_, connection_record) -> None:
+    logger.debug(
+        "Opened new database connection %s",
+        id(connection_record),
+    )
 
 
 def create_sync_db_engine(database_url: str | URL) -> Engine:
@@ -272,3 +399,5 @@ async def init_database(settings: Settings) -> None:
     async with engine.begin() as conn:
         cfg = create_alembic_config(db_url, is_async=False)
         await conn.run_sync(create_or_update_db, cfg)
+
+    await engine.dispose()
@@ -0,0 +1,340 @@
+"""Executors for blocking work.
+
+Decoding audio, computing spectrograms and encoding images are blocking
+operations. Running them directly inside an `async def` route stalls the
+event loop, and with it every other request handled by the worker.
+
+This module provides two size-bounded executors that routes can hand this
+work to:
+
+* A CPU executor, backed by a process pool, for CPU-bound work such as
+  computing STFTs. Using processes sidesteps the GIL so rendering a
+  spectrogram does not slow down request handling in the main process.
+* An I/O executor, backed by a thread pool, for work that mostly waits on
+  the disk or the network, such as reading audio files.
+
+Both executors keep track of the number of in-flight tasks so queue depth
+can be monitored.
+
+Worker processes are spawned, so they do not share the memory of the
+server. `configure_executors` gives them the settings the server was
+started with, instead of those in the settings file and the environment.
+"""
+
+import asyncio
+import functools
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from collections.abc import AsyncIterator, Callable, Iterable
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import asdict, dataclass
+from typing import Any, Literal, ParamSpec, TypeVar
+
+from whombat.system.settings import Settings, get_settings, set_settings
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "ExecutorStats",
+    "WorkExecutor",
+    "configure_executors",
+    "get_cpu_executor",
+    "get_executor_status",
+    "get_io_executor",
+    "run_in_process",
+    "run_in_thread",
+    "shutdown_executors",
+]
+
+A = TypeVar("A")
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+@dataclass
+class ExecutorStats:
+    """Counters describing the work handled by an executor."""
+
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    max_in_flight: int = 0
+
+
+class WorkExecutor:
+    """Size-bounded executor that records queue depth.
+
+    Parameters
+    ----------
+    name
+        Name used in logs and metrics.
+    kind
+        Whether work runs in a pool of processes or threads.
+    max_workers
+        Maximum number of tasks that run at the same time. Tasks submitted
+        while all workers are busy wait in the queue.
+    settings
+        Settings of the worker processes. If None, workers load the
+        settings from the settings file and the environment.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: Literal["process", "thread"],
+        max_workers: int,
+        settings: Settings | None = None,
+    ):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.settings = settings
+        self.stats = ExecutorStats()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._executor: Executor | None = None
+
+    @property
+    def in_flight(self) -> int:
+        """Number of tasks that were submitted and have not finished."""
+        return self._in_flight
+
+    @property
+    def active(self) -> int:
+        """Number of tasks currently being run by a worker."""
+        return min(self._in_flight, self.max_workers)
+
+    @property
+    def queued(self) -> int:
+        """Number of tasks waiting for a free worker."""
+        return max(self._in_flight - self.max_workers, 0)
+
+    def submit(
+        self,
+        func: Callable[P, T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> Future[T]:
+        """Schedule a function to run in the executor."""
+        future = self._get_executor().submit(func, *args, **kwargs)
+
+        with self._lock:
+            self._in_flight += 1
+            self.stats.submitted += 1
+            self.stats.max_in_flight = max(
+                self.stats.max_in_flight,
+                self._in_flight,
+            )
+
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(
+        self,
+        func: Callable[P, T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """Run a function in the executor and wait for its result."""
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    async def map_unordered(
+        self,
+        func: Callable[[A], T],
+        items: Iterable[A],
+        max_in_flight: int | None = None,
+    ) -> AsyncIterator[T]:
+        """Apply a function to every item and yield results as they finish.
+
+        Works like `multiprocessing.Pool.imap_unordered`, but without
+        blocking the event loop. Items are consumed lazily and at most
+        `max_in_flight` of them are submitted at any time, so memory usage
+        does not grow with the number of items.
+
+        Parameters
+        ----------
+        func
+            Function to apply. It must be picklable when the executor uses
+            processes.
+        items
+            Arguments of each call.
+        max_in_flight
+            Maximum number of submitted calls whose result has not been
+            yielded yet. Defaults to twice the number of workers.
+
+        Yields
+        ------
+        T
+            The result of each call, in completion order. If a call raises
+            an error, the error is raised and pending calls are cancelled.
+        """
+        if max_in_flight is None:
+            max_in_flight = 2 * self.max_workers
+
+        items = iter(items)
+        pending: set[asyncio.Future[T]] = set()
+
+        def fill() -> None:
+            missing = max_in_flight - len(pending)
+            for item in itertools.islice(items, max(missing, 0)):
+                pending.add(asyncio.wrap_future(self.submit(func, item)))
+
+        try:
+            fill()
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                # NOTE: Results are handed over before new calls are
+                # submitted, so finished results count towards the limit.
+                for future in done:
+                    yield future.result()
+                fill()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers.
+
+        The executor can still be used afterwards, in which case a new
+        pool of workers is started.
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def status(self) -> dict[str, Any]:
+        """Return the current usage of the executor."""
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "active": self.active,
+            "queued": self.queued,
+            **asdict(self.stats),
+        }
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def _create_executor(self) -> Executor:
+        logger.debug(
+            "Starting %s executor with %d %s workers",
+            self.name,
+            self.max_workers,
+            self.kind,
+        )
+
+        if self.kind == "process":
+            initializer = None
+            initargs: tuple = ()
+            if self.settings is not None:
+                initializer, initargs = set_settings, (self.settings,)
+
+            # NOTE: Forking a process that runs an event loop and several
+            # threads can deadlock, so workers are always spawned.
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=initializer,
+                initargs=initargs,
+            )
+
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"whombat-{self.name}",
+        )
+
+    def _on_done(self, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+            if future.cancelled() or future.exception() is not None:
+                self.stats.failed += 1
+            else:
+                self.stats.completed += 1
+
+
+@functools.lru_cache
+def get_cpu_executor() -> WorkExecutor:
+    """Get the executor for CPU-bound work."""
+    settings = get_settings()
+    return WorkExecutor(
+        "cpu",
+        kind=settings.cpu_executor,
+        max_workers=settings.cpu_workers or os.cpu_count() or 1,
+    )
+
+
+@functools.lru_cache
+def get_io_executor() -> WorkExecutor:
+    """Get the executor for blocking disk and network work."""
+    settings = get_settings()
+    return WorkExecutor(
+        "io",
+        kind="thread",
+        max_workers=settings.io_workers,
+    )
+
+
+async def run_in_process(
+    func: Callable[P, T],
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> T:
+    """Run a CPU-bound function in the CPU executor.
+
+    When the CPU executor uses processes, the function and its arguments
+    must be picklable.
+    """
+    return await get_cpu_executor().run(func, *args, **kwargs)
+
+
+async def run_in_thread(
+    func: Callable[P, T],
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> T:
+    """Run a blocking I/O function in the I/O executor."""
+    return await get_io_executor().run(func, *args, **kwargs)
+
+
+def configure_executors(settings: Settings) -> None:
+    """Run the worker processes with the given settings.
+
+    Workers that are already running are stopped, new workers are started
+    with the settings when work is next submitted.
+    """
+    executor = get_cpu_executor()
+    executor.settings = settings
+    executor.shutdown()
+
+
+def get_executor_status() -> list[dict[str, Any]]:
+    """Return the usage of all executors."""
+    return [
+        get_cpu_executor().status(),
+        get_io_executor().status(),
+    ]
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Stop the workers of all executors."""
+    get_cpu_executor().shutdown(wait=wait)
+    get_io_executor().shutdown(wait=wait)
@@ -6,7 +6,7 @@ We are using pydantic to define our settings.
 import warnings
 from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, Type
+from typing import Literal, Tuple, Type
 
 from pydantic import ValidationError
 from pydantic_settings import (
@@ -26,6 +26,7 @@ import os
 
 __all__ = [
     "get_settings",
+    "set_settings",
     "Settings",
 ]
 
@@ -82,6 +83,33 @@ class Settings(BaseSettings):
     outside of the audio directory.
     """
 
+    db_pool_size: int = 10
+    """Number of connections kept open in the database connection pool.
+
+    Ignored for SQLite databases.
+    """
+
+    db_max_overflow: int = 20
+    """Number of connections allowed above `db_pool_size` under load.
+
+    Ignored for SQLite databases.
+    """
+
+    db_pool_timeout: float = 30
+    """Seconds to wait for a free connection before giving up.
+
+    Ignored for SQLite databases.
+    """
+
+    db_pool_pre_ping: bool = True
+    """Test connections for liveness before handing them out."""
+
+    db_pool_recycle: int = 1800
+    """Seconds after which a pooled connection is replaced.
+
+    Set to -1 to never recycle connections.
+    """
+
     host: str = "localhost"
     """Host on which the backend is running."""
 
@@ -125,6 +153,194 @@ class Settings(BaseSettings):
     aws_bucket_name: Optional[str] = Field(default="whombat-staging", env='AWS_BUCKET_NAME')
     s3_endpoint_url: Optional[str] = Field(default=None, env='S3_ENDPOINT_URL')  # For non-AWS S3-compatible services
 
+    audio_cache_dir: Optional[Path] = None
+    """Directory where audio files fetched from S3 are cached.
+
+    Defaults to an `audio_cache` folder in the application data directory.
+    """
+
+    audio_cache_size: int = 5 * 1024**3
+    """Maximum size of the local audio cache in bytes.
+
+    Least recently used files are removed when the cache grows beyond this
+    size. Set to 0 to disable the cache.
+    """
+
+    audio_cache_max_file_size: int = 512 * 1024**2
+    """Largest file in bytes that will be stored in the audio cache.
+
+    Larger files are always read directly from S3 with ranged requests.
+    """
+
+    encoded_audio_cache_size: int = 256 * 1024**2
+    """Maximum size in bytes of the encoded clips kept without audio cache.
+
+    Compressed clips are encoded whole and served in ranges. When the audio
+    cache is disabled, encoded clips are kept in a temporary directory
+    instead, so a clip is not encoded again for every range.
+    """
+
+    audio_handle_pool_size: int = 64
+    """Maximum number of audio files kept open between stream requests.
+
+    Set to 0 to open the file on every request.
+    """
+
+    audio_handle_idle_timeout: float = 30
+    """Seconds after which an unused open audio file is closed."""
+
+    audio_prefetch: bool = True
+    """Decode the next chunk of a stream before it is requested."""
+
+    spectrogram_cache_dir: Optional[Path] = None
+    """Directory where rendered spectrogram tiles are stored.
+
+    Defaults to a `spectrogram_cache` folder in the application data
+    directory.
+    """
+
+    spectrogram_cache_size: int = 1024**3
+    """Maximum size of the on-disk spectrogram cache in bytes.
+
+    Set to 0 to only cache spectrograms in memory.
+    """
+
+    spectrogram_cache_memory_size: int = 64 * 1024**2
+    """Maximum size of the in-memory spectrogram cache in bytes.
+
+    Set to 0 to disable the in-memory cache.
+    """
+
+    spectrogram_pyramid_dir: Optional[Path] = None
+    """Directory where spectrogram tile pyramids are stored.
+
+    Defaults to a `spectrogram_pyramids` folder in the application data
+    directory.
+    """
+
+    spectrogram_tile_width: int = 512
+    """Number of spectrogram columns in each pyramid tile."""
+
+    spectrogram_pyramid_pooling: Literal["max", "mean"] = "max"
+    """How columns are combined in the coarser levels of a pyramid."""
+
+    spectrogram_block_size: int = 2**20
+    """Number of samples above which spectrograms are computed in blocks.
+
+    Longer windows are read and transformed in blocks of this many
+    samples, so their memory usage stays bounded.
+    """
+
+    waveform_dir: Optional[Path] = None
+    """Directory where waveform envelope pyramids are stored.
+
+    Defaults to a `waveforms` folder in the application data directory.
+    """
+
+    waveform_bin_size: int = 256
+    """Number of samples summarized by each bin of a waveform pyramid."""
+
+    hash_algorithm: Literal["md5", "blake2b", "xxh3_128"] = "md5"
+    """Algorithm used to hash new recordings.
+
+    MD5 is compatible with hashes computed by other tools. BLAKE2b and
+    xxHash are faster. xxHash requires the `xxhash` package.
+    """
+
+    quick_hash: bool = False
+    """Hash only a sample of each file when registering recordings.
+
+    Speeds up the ingestion of very large archives, at the cost of
+    treating files that only differ outside the sampled blocks as
+    duplicates.
+    """
+
+    s3_max_connections: int = 64
+    """Size of the connection pool of the S3 client."""
+
+    s3_max_concurrency: int = 32
+    """Maximum number of S3 requests made at the same time from async code.
+
+    Further requests wait for one of them to finish.
+    """
+
+    s3_retry_mode: Literal["legacy", "standard", "adaptive"] = "standard"
+    """Retry policy of the S3 client.
+
+    All modes retry throttling and transient errors with exponential
+    backoff. The adaptive mode also limits the request rate on the client
+    side when S3 throttles it.
+    """
+
+    s3_max_attempts: int = 5
+    """Maximum number of attempts of each S3 request, including retries."""
+
+    s3_connect_timeout: float = 5
+    """Seconds to wait for a connection to S3 to be established."""
+
+    s3_read_timeout: float = 60
+    """Seconds to wait for data from S3 before retrying a request."""
+
+    s3_list_concurrency: int = 8
+    """Maximum number of S3 listing requests made at the same time.
+
+    Sub-prefixes of a dataset are listed in parallel.
+    """
+
+    s3_full_hash: bool = False
+    """Hash the whole content of S3 objects when registering recordings.
+
+    By default only the header of each object is downloaded and the hash
+    is taken from the ETag or the checksum metadata of the object. Enable
+    to hash S3 objects with the configured hash algorithm, e.g. to detect
+    duplicates of local files.
+    """
+
+    ingestion_batch_size: int = 1000
+    """Number of recordings inserted and committed at a time on ingestion.
+
+    Recordings of a batch that was committed are kept if ingestion is
+    interrupted, and are skipped when it is run again.
+    """
+
+    cpu_workers: Optional[int] = None
+    """Number of workers used for CPU-bound work such as spectrograms.
+
+    Defaults to the number of CPUs.
+    """
+
+    cpu_executor: Literal["process", "thread"] = "process"
+    """Whether CPU-bound work runs in a pool of processes or threads."""
+
+    io_workers: int = 16
+    """Number of threads used for blocking disk and network work."""
+
+    job_workers: int = 2
+    """Number of background jobs that run at the same time.
+
+    Further jobs wait in the queue, so long operations such as dataset
+    imports cannot take over the server.
+    """
+
+    job_poll_interval: float = 5
+    """Seconds between checks for jobs enqueued by other processes."""
+
+    job_progress_interval: float = 1
+    """Seconds between updates of the progress of running jobs."""
+
+    job_heartbeat_timeout: float = 60
+    """Seconds without progress updates after which a job is considered dead.
+
+    On startup, running jobs whose runner has not saved their progress for
+    this long are marked as failed. Must be well above
+    `job_progress_interval`.
+    """
+
+    job_files_dir: Optional[Path] = None
+    """Directory where files uploaded for background jobs are kept.
+
+    Defaults to a `jobs` folder in the application data directory.
+    """
 
     @classmethod
     def settings_customise_sources(
@@ -143,12 +359,35 @@ class Settings(BaseSettings):
         )
 
 
+_settings: Settings | None = None
+"""Settings given with `set_settings`."""
+
+
 @lru_cache()
 def get_settings() -> Settings:
-    """Get the application settings."""
+    """Get the application settings.
+
+    The settings are loaded from the settings file, unless they were given
+    with `set_settings`.
+    """
+    if _settings is not None:
+        return _settings
+
     return load_settings_from_file()
 
 
+def set_settings(settings: Settings) -> None:
+    """Use the given settings instead of loading them from the file.
+
+    Worker processes call this on startup to use the settings of the
+    server that started them. It must be called before the settings are
+    read, as some modules read them on import.
+    """
+    global _settings
+    _settings = settings
+    get_settings.cache_clear()
+
+
 def load_settings_from_file() -> Settings:
     """Load the application settings from a file."""
     settings_file = get_whombat_settings_file()
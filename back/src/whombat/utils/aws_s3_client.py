@@ -1,47 +1,188 @@
+"""Client for the S3 bucket holding the recordings.
+
+A single boto3 client is shared by the whole process. It is configured
+with a connection pool large enough for concurrent requests, an
+exponential backoff retry policy and timeouts, all set in the settings.
+boto3 clients are thread safe, so the same client is used by the threads
+that read audio with ranged requests.
+
+Async code must not call boto3 directly, as every call blocks until S3
+answers. The async methods of `S3Client` run the calls in the I/O executor
+instead, and a semaphore bounds how many of them are in flight at the same
+time so that a burst of requests queues instead of exhausting the pool.
+"""
+
+import asyncio
 import boto3
 import logging
+import weakref
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from fastapi import HTTPException
 from whombat.system import get_settings
+from whombat.system.executors import run_in_thread
+from whombat.utils.s3_reader import DEFAULT_READAHEAD, S3RangeReader
 
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+
+def create_boto3_client():
+    """Create a boto3 S3 client configured from the settings."""
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.aws_access_key_id,
+        aws_secret_access_key=settings.aws_secret_access_key,
+        region_name=settings.aws_region,
+        endpoint_url=settings.s3_endpoint_url,
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=settings.s3_max_connections,
+            connect_timeout=settings.s3_connect_timeout,
+            read_timeout=settings.s3_read_timeout,
+            retries={
+                "mode": settings.s3_retry_mode,
+                "total_max_attempts": settings.s3_max_attempts,
+            },
+        ),
+    )
+
+
 class S3Client:
     _s3_client = None 
 
+    _semaphores = weakref.WeakKeyDictionary()
+
     def __init__(self):
         """Initialize the S3 client if not already initialized."""
         if not S3Client._s3_client:
-            S3Client._s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.aws_access_key_id,
-                aws_secret_access_key=settings.aws_secret_access_key,
-                region_name=settings.aws_region,
-            )
+            S3Client._s3_client = create_boto3_client()
 
     def get_client(self):
         """Return the initialized S3 client."""
         return S3Client._s3_client
 
-    def list_files(self, bucket_name, prefix):
-        """List files in the S3 bucket under the specified prefix."""
+    async def head_object(self, bucket_name, key):
+        """Get the metadata of an object."""
+        return await self._call(
+            self.get_client().head_object,
+            Bucket=bucket_name,
+            Key=key,
+        )
+
+    async def read_object(self, bucket_name, key):
+        """Download the content of an object into memory."""
+        return await self._call(self._read_object, bucket_name, key)
+
+    async def put_object(self, bucket_name, key, data):
+        """Upload the content of an object."""
+        return await self._call(
+            self.get_client().put_object,
+            Bucket=bucket_name,
+            Key=key,
+            Body=data,
+        )
+
+    async def delete_object(self, bucket_name, key):
+        """Delete an object."""
+        return await self._call(
+            self.get_client().delete_object,
+            Bucket=bucket_name,
+            Key=key,
+        )
+
+    async def iter_objects(self, bucket_name, prefix="", max_concurrency=None):
+        """List the objects under the specified prefix as they are found.
+
+        Listings are paginated, so there is no limit on the number of
+        objects. The prefix is listed one level at a time, using `/` as
+        delimiter, and the pages of the sub-prefixes found are requested in
+        parallel, with at most `max_concurrency` requests at a time. Pages
+        are only requested as objects are consumed, so memory usage does
+        not grow with the number of objects.
+
+        Objects are yielded in no particular order. Each object is a dict
+        with at least the `Key`, `Size`, `LastModified` and `ETag` of the
+        object.
+        """
+        if max_concurrency is None:
+            max_concurrency = settings.s3_list_concurrency
+
+        pending = [(prefix, None)]
+        in_flight = set()
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < max_concurrency:
+                    page_prefix, token = pending.pop()
+                    in_flight.add(
+                        asyncio.ensure_future(
+                            self._call(
+                                self._list_page,
+                                bucket_name,
+                                page_prefix,
+                                token,
+                            )
+                        )
+                    )
+
+                done, in_flight = await asyncio.wait(
+                    in_flight,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for future in done:
+                    page_prefix, response = future.result()
+                    if response.get("IsTruncated"):
+                        pending.append(
+                            (page_prefix, response["NextContinuationToken"])
+                        )
+                    pending.extend(
+                        (common_prefix["Prefix"], None)
+                        for common_prefix in response.get("CommonPrefixes", [])
+                    )
+                    for item in response.get("Contents", []):
+                        yield item
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _list_page(self, bucket_name, prefix, continuation_token=None):
+        """Request one page of the listing of a prefix."""
         s3 = self.get_client()
+        kwargs = dict(Bucket=bucket_name, Prefix=prefix, Delimiter="/")
+        if continuation_token is not None:
+            kwargs["ContinuationToken"] = continuation_token
+
         try:
-            response = s3.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
-            if 'Contents' not in response:
-                logger.warning(f"No files found in S3 bucket with prefix {prefix}")
-                return []
-            file_keys = [obj['Key'] for obj in response['Contents']]
-            return file_keys
+            return prefix, s3.list_objects_v2(**kwargs)
         except ClientError as e:
             logger.error(f"Error accessing S3 bucket: {e}")
             raise HTTPException(status_code=500, detail=f"Error accessing S3 bucket: {str(e)}")
 
-        
+    async def _call(self, func, *args, **kwargs):
+        """Run a blocking S3 call in the I/O executor."""
+        async with self._get_semaphore():
+            return await run_in_thread(func, *args, **kwargs)
+
+    def _get_semaphore(self):
+        # NOTE: Asyncio semaphores can only be used in the event loop they
+        # were first used in, so there is one per loop.
+        loop = asyncio.get_running_loop()
+        semaphore = S3Client._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.s3_max_concurrency)
+            S3Client._semaphores[loop] = semaphore
+        return semaphore
+
+    def _read_object(self, bucket_name, key):
+        response = self.get_client().get_object(Bucket=bucket_name, Key=key)
+        return response["Body"].read()
+
     def download_file(self, bucket_name, key, download_path):
-        """Download a file from S3 to the specified local path."""
+        """Download a file from S3 to the specified local path.
+
+        Blocks until the download finishes. Use only in worker threads.
+        """
         s3 = self.get_client()
         try:
             s3.download_file(bucket_name, key, download_path)
@@ -49,4 +190,16 @@ class S3Client:
             return download_path
         except ClientError as e:
             logger.error(f"Failed to download file from S3 bucket", exc_info=e)
-            raise e    
\ No newline at end of file
+            raise e
+
+    def open_file(self, bucket_name, key, readahead=DEFAULT_READAHEAD):
+        """Open a file in the S3 bucket for seekable, ranged reading.
+
+        Reads block until S3 answers. Use only in worker threads.
+        """
+        return S3RangeReader(
+            self.get_client(),
+            bucket_name,
+            key,
+            readahead=readahead,
+        )
@@ -0,0 +1,172 @@
+"""Information about audio files stored in S3.
+
+Registering a recording stored in S3 does not require downloading it. Its
+media information is parsed from the first bytes of the object, fetched
+with a single ranged request, and its hash is taken from the metadata
+returned by `HeadObject`:
+
+- An `md5` entry in the user metadata of the object.
+- The ETag, which is the MD5 of the content for objects uploaded in a
+  single part without KMS or customer-provided keys.
+- A full-object SHA-256 checksum, if one was stored on upload.
+- Otherwise the ETag itself, stored under the `etag` algorithm. It
+  identifies the content of the object but cannot be compared with hashes
+  of local files.
+
+Hashes that need the whole content, e.g. to match the hash algorithm used
+for local files, can still be computed by streaming the object.
+"""
+
+import base64
+import logging
+import re
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from whombat.core.files import (
+    BLOCK_SIZE,
+    ETAG_HASH_ALGORITHM,
+    FileInfo,
+    HashAlgorithm,
+    get_hash_name,
+    hash_file_object,
+    read_media_info,
+)
+from whombat.utils.s3_reader import S3RangeReader
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "ETAG_HASH_ALGORITHM",
+    "get_object_hash",
+    "get_s3_file_info",
+]
+
+FULL_HASH_READAHEAD = 8 * 1024 * 1024
+"""Number of bytes fetched per request when hashing a whole object."""
+
+_MD5_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+_KMS_ENCRYPTION = {"aws:kms", "aws:kms:dsse"}
+
+
+def get_object_hash(head: Mapping[str, Any]) -> tuple[str, str] | None:
+    """Get the hash of an S3 object from its metadata.
+
+    Parameters
+    ----------
+    head
+        The response of a `HeadObject` request. Checksums are only
+        included if the request was made with `ChecksumMode="ENABLED"`.
+
+    Returns
+    -------
+    hash : tuple[str, str] | None
+        The hash and the name of its algorithm, or None if the metadata
+        has no usable hash.
+    """
+    metadata = {
+        key.lower(): value for key, value in head.get("Metadata", {}).items()
+    }
+    md5 = metadata.get("md5", "").lower()
+    if _MD5_PATTERN.match(md5):
+        return md5, "md5"
+
+    etag = head.get("ETag", "").strip('"').lower()
+    if (
+        _MD5_PATTERN.match(etag)
+        and head.get("ServerSideEncryption") not in _KMS_ENCRYPTION
+        and "SSECustomerAlgorithm" not in head
+    ):
+        return etag, "md5"
+
+    checksum = head.get("ChecksumSHA256")
+    if checksum and head.get("ChecksumType", "FULL_OBJECT") == "FULL_OBJECT":
+        try:
+            return base64.b64decode(checksum, validate=True).hex(), "sha256"
+        except ValueError:
+            logger.debug(f"Invalid SHA-256 checksum: {checksum}")
+
+    if etag:
+        return etag, ETAG_HASH_ALGORITHM
+
+    return None
+
+
+def get_s3_file_info(
+    client: Any,
+    bucket: str,
+    key: str,
+    algorithm: HashAlgorithm = "md5",
+    quick: bool = False,
+    full_hash: bool = False,
+) -> FileInfo:
+    """Get information about an audio file stored in S3.
+
+    Only the first block of the object is downloaded, unless the header
+    cannot be parsed from it or the full hash is requested.
+
+    Parameters
+    ----------
+    client
+        A boto3 S3 client, or any object exposing compatible
+        `head_object` and `get_object` methods.
+    bucket
+        Name of the bucket holding the object.
+    key
+        Key of the object.
+    algorithm
+        The hash algorithm to use if the hash is computed from the
+        content. By default "md5".
+    quick
+        If True, a computed hash only covers a sample of the object. By
+        default False.
+    full_hash
+        If True, the hash is always computed from the content of the
+        object, streaming it in large ranged requests. By default the
+        hash is taken from the metadata of the object.
+
+    Returns
+    -------
+    file_info : FileInfo
+        Information about the file. Its path is the key of the object.
+    """
+    head = client.head_object(Bucket=bucket, Key=key, ChecksumMode="ENABLED")
+    size = int(head["ContentLength"])
+
+    object_hash = None if full_hash else get_object_hash(head)
+
+    # Hashing the whole object reads it sequentially, so it is fetched in
+    # large ranges. Otherwise only a few blocks are read.
+    readahead = BLOCK_SIZE
+    if object_hash is None and not quick:
+        readahead = FULL_HASH_READAHEAD
+
+    reader = S3RangeReader(client, bucket, key, readahead=readahead, size=size)
+    with reader:
+        fp: Any = reader
+        media_info = read_media_info(fp, size)
+
+        if object_hash is None:
+            object_hash = (
+                hash_file_object(fp, size, algorithm, quick=quick),
+                get_hash_name(algorithm, quick),
+            )
+
+    logger.debug(
+        "Read %d of %d bytes of s3://%s/%s",
+        reader.bytes_fetched,
+        size,
+        bucket,
+        key,
+    )
+    hash, hash_algorithm = object_hash
+    return FileInfo(
+        path=Path(key),
+        exists=True,
+        is_audio=True,
+        hash=hash,
+        hash_algorithm=hash_algorithm,
+        media_info=media_info,
+    )
@@ -0,0 +1,155 @@
+"""Seekable file-like access to S3 objects using ranged reads.
+
+Audio libraries such as `soundfile` only need to read the header and the
+frames they are asked for. Wrapping an S3 object in a seekable reader lets
+them do exactly that, issuing HTTP Range requests for the bytes that are
+actually read instead of downloading the whole object first.
+"""
+
+import io
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "DEFAULT_READAHEAD",
+    "S3RangeReader",
+]
+
+DEFAULT_READAHEAD = 256 * 1024
+"""Minimum number of bytes fetched on every request to S3."""
+
+
+class S3RangeReader(io.RawIOBase):
+    """Read-only, seekable file object backed by S3 Range requests.
+
+    Every read that cannot be served from the internal buffer issues a
+    single ranged `GetObject` request of at least `readahead` bytes.
+    Consecutive small reads, which are typical when decoding audio frame
+    by frame, are therefore served from memory.
+
+    Parameters
+    ----------
+    client
+        A boto3 S3 client, or any object exposing compatible
+        `head_object` and `get_object` methods.
+    bucket
+        Name of the bucket holding the object.
+    key
+        Key of the object.
+    readahead
+        Minimum number of bytes to request from S3 at a time.
+    size
+        Size of the object in bytes. If not given it is retrieved with a
+        `HeadObject` request.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        key: str,
+        readahead: int = DEFAULT_READAHEAD,
+        size: int | None = None,
+    ):
+        super().__init__()
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.readahead = readahead
+
+        if size is None:
+            response = client.head_object(Bucket=bucket, Key=key)
+            size = int(response["ContentLength"])
+
+        self.size = size
+        self.requests = 0
+        """Number of ranged requests issued so far."""
+
+        self.bytes_fetched = 0
+        """Number of bytes downloaded from S3 so far."""
+
+        self._position = 0
+        self._buffer = b""
+        self._buffer_start = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence value: {whence}")
+
+        if position < 0:
+            raise ValueError(f"Negative seek position: {position}")
+
+        self._position = position
+        return position
+
+    def read(self, size: int = -1) -> bytes:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+
+        if size is None or size < 0:
+            size = self.size - self._position
+
+        size = min(size, self.size - self._position)
+        if size <= 0:
+            return b""
+
+        start = self._position
+        end = start + size
+        buffer_end = self._buffer_start + len(self._buffer)
+
+        if not (self._buffer_start <= start and end <= buffer_end):
+            self._fill_buffer(start, max(size, self.readahead))
+
+        offset = start - self._buffer_start
+        data = self._buffer[offset : offset + size]
+        self._position += len(data)
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        read = len(data)
+        memoryview(b).cast("B")[:read] = data
+        return read
+
+    def readall(self) -> bytes:
+        return self.read(-1)
+
+    def close(self) -> None:
+        self._buffer = b""
+        super().close()
+
+    def _fill_buffer(self, start: int, length: int) -> None:
+        end = min(start + length, self.size) - 1
+        response = self.client.get_object(
+            Bucket=self.bucket,
+            Key=self.key,
+            Range=f"bytes={start}-{end}",
+        )
+        self._buffer = response["Body"].read()
+        self._buffer_start = start
+        self.requests += 1
+        self.bytes_fetched += len(self._buffer)
+        logger.debug(
+            "Fetched bytes %d-%d of s3://%s/%s",
+            start,
+            end,
+            self.bucket,
+            self.key,
+        )
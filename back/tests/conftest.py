@@ -1,11 +1,14 @@
 """Common fixtures for Whombat tests."""
 
+import datetime
+import hashlib
 import logging
 import os
 import random
 import shutil
 import string
 from collections.abc import Awaitable, Callable
+from io import BytesIO
 from pathlib import Path
 from typing import AsyncGenerator, Optional
 
@@ -478,3 +481,117 @@ async def evaluation_set(
         name="test_evaluation_set",
         description="test_description",
     )
+
+
+class LocalS3Client:
+    """Stand-in for a boto3 S3 client that serves files from a directory.
+
+    Objects are stored at `root / bucket / key`. All ranged reads are
+    recorded in `ranges` so tests can check what was downloaded.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.ranges: list[tuple[str, str, str | None]] = []
+        self.heads: dict[tuple[str, str], dict] = {}
+        self.page_size = 1000
+        self.list_requests = 0
+
+    def _path(self, bucket: str, key: str) -> Path:
+        return self.root / bucket / key
+
+    def put_object(
+        self,
+        Bucket: str,
+        Key: str,
+        Body: bytes,
+        Metadata: dict[str, str] | None = None,
+    ) -> dict:
+        path = self._path(Bucket, Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(Body)
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        self.heads[(Bucket, Key)] = {"ETag": etag, "Metadata": Metadata or {}}
+        return {"ETag": etag}
+
+    def head_object(
+        self,
+        Bucket: str,
+        Key: str,
+        ChecksumMode: str | None = None,
+    ) -> dict:
+        path = self._path(Bucket, Key)
+        return {
+            **self.heads.get((Bucket, Key), {}),
+            "ContentLength": path.stat().st_size,
+        }
+
+    def list_objects_v2(
+        self,
+        Bucket: str,
+        Prefix: str = "",
+        Delimiter: str | None = None,
+        ContinuationToken: str | None = None,
+    ) -> dict:
+        self.list_requests += 1
+        root = self.root / Bucket
+        entries: dict[str, dict | None] = {}
+        for path in sorted(root.rglob("*")):
+            key = path.relative_to(root).as_posix()
+            if not path.is_file() or not key.startswith(Prefix):
+                continue
+
+            rest = key[len(Prefix) :]
+            if Delimiter and Delimiter in rest:
+                common_prefix = Prefix + rest.split(Delimiter)[0] + Delimiter
+                entries[common_prefix] = None
+                continue
+
+            stat = path.stat()
+            entries[key] = {
+                "Key": key,
+                "Size": stat.st_size,
+                "LastModified": datetime.datetime.fromtimestamp(
+                    stat.st_mtime, tz=datetime.timezone.utc
+                ),
+                "ETag": self.head_object(Bucket, key).get("ETag", '""'),
+            }
+
+        start = int(ContinuationToken or 0)
+        page = sorted(entries.items())[start : start + self.page_size]
+        response: dict = {
+            "Contents": [item for _, item in page if item is not None],
+            "CommonPrefixes": [
+                {"Prefix": key} for key, item in page if item is None
+            ],
+            "IsTruncated": start + self.page_size < len(entries),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + self.page_size)
+        return response
+
+    def delete_object(self, Bucket: str, Key: str) -> dict:
+        self._path(Bucket, Key).unlink(missing_ok=True)
+        self.heads.pop((Bucket, Key), None)
+        return {}
+
+    def get_object(
+        self,
+        Bucket: str,
+        Key: str,
+        Range: str | None = None,
+    ) -> dict:
+        content = self._path(Bucket, Key).read_bytes()
+        self.ranges.append((Bucket, Key, Range))
+
+        if Range is not None:
+            start, end = Range.replace("bytes=", "").split("-")
+            content = content[int(start) : int(end) + 1]
+
+        return {"Body": BytesIO(content), "ContentLength": len(content)}
+
+
+@pytest.fixture
+def s3_client(tmp_path: Path) -> LocalS3Client:
+    """Local stand-in for an S3 client."""
+    return LocalS3Client(tmp_path / "s3")
@@ -1,10 +1,24 @@
+import datetime
 from io import BytesIO
 from pathlib import Path
+from uuid import uuid4
 
+import numpy as np
 import pytest
 import soundfile as sf
 
-from whombat.api.audio import HEADER_SIZE, load_clip_bytes
+from whombat import schemas
+from whombat.api import audio as api_audio
+from whombat.api.audio import (
+    HEADER_SIZE,
+    load_audio,
+    load_audio_windows,
+    load_clip_bytes,
+    iter_audio_blocks,
+    load_encoded_clip_bytes,
+    stream_audio,
+)
+from whombat.core import audio_encoding
 
 
 def test_load_clip_bytes(random_wav_factory):
@@ -209,3 +223,208 @@ def test_can_stream_a_real_audio_file(data_dir: Path):
     original_data = path.read_bytes()
 
     assert streamed_data == original_data
+
+
+def test_load_audio_windows_matches_load_audio(random_wav_factory, audio_dir):
+    path = random_wav_factory(duration=2, samplerate=8_000)
+    recording = schemas.Recording(
+        id=1,
+        uuid=uuid4(),
+        path=path.relative_to(audio_dir),
+        hash="abc",
+        duration=2,
+        samplerate=8_000,
+        channels=1,
+        time_expansion=1,
+        date=None,
+        time=None,
+        latitude=None,
+        longitude=None,
+        rights=None,
+        created_on=datetime.datetime.now(),
+    )
+    windows = [(0.1, 0.3), (1.5, 1.9), (-0.1, 0.1)]
+
+    waves = load_audio_windows(
+        recording,
+        windows,
+        audio_dir=audio_dir,
+        use_s3=False,
+    )
+
+    assert len(waves) == len(windows)
+    for wave, (start_time, end_time) in zip(waves, windows):
+        expected = load_audio(
+            recording,
+            start_time,
+            end_time,
+            audio_dir=audio_dir,
+            use_s3=False,
+        )
+        assert np.array_equal(wave.data, expected.data)
+        assert wave.time.data[0] == pytest.approx(start_time)
+
+
+def test_encoded_clip_ranges_form_the_whole_file(random_wav_factory):
+    path = random_wav_factory(duration=1, samplerate=16_000)
+
+    content = b""
+    filesize = None
+    while filesize is None or len(content) < filesize:
+        data, start, end, filesize = load_encoded_clip_bytes(
+            path,
+            start=len(content),
+            codec="flac",
+            size=4096,
+            start_time=0.25,
+            end_time=0.75,
+            use_s3=False,
+        )
+        assert start == len(content)
+        assert end == start + len(data)
+        content += data
+
+    wav, samplerate = sf.read(BytesIO(content))
+    expected, _ = sf.read(path, start=4_000, stop=12_000)
+    assert samplerate == 16_000
+    assert np.allclose(wav, expected, atol=1e-4)
+
+
+def test_encoded_clip_is_encoded_once_without_audio_cache(
+    random_wav_factory,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    path = random_wav_factory(duration=2, samplerate=16_000)
+    encodes = 0
+
+    def encode_audio_blocks(*args, **kwargs) -> None:
+        nonlocal encodes
+        encodes += 1
+        audio_encoding.encode_audio_blocks(*args, **kwargs)
+
+    monkeypatch.setattr(api_audio, "get_audio_cache", lambda: None)
+    monkeypatch.setattr(api_audio, "encode_audio_blocks", encode_audio_blocks)
+
+    ranges = 0
+    start = 0
+    filesize = None
+    while filesize is None or start < filesize:
+        _, _, start, filesize = load_encoded_clip_bytes(
+            path,
+            start=start,
+            codec="flac",
+            size=4096,
+            use_s3=False,
+        )
+        ranges += 1
+
+    assert ranges > 1
+    assert encodes == 1
+
+
+@pytest.mark.parametrize("codec", ["wav", "flac"])
+def test_stream_audio_matches_load_audio(
+    codec: str,
+    random_wav_factory,
+    audio_dir,
+):
+    path = random_wav_factory(duration=2, samplerate=8_000, channels=2)
+    recording = schemas.Recording(
+        id=1,
+        uuid=uuid4(),
+        path=path.relative_to(audio_dir),
+        hash="abc",
+        duration=2,
+        samplerate=8_000,
+        channels=2,
+        time_expansion=1,
+        date=None,
+        time=None,
+        latitude=None,
+        longitude=None,
+        rights=None,
+        created_on=datetime.datetime.now(),
+    )
+
+    content = b"".join(
+        stream_audio(
+            recording,
+            start_time=0.5,
+            end_time=1.5,
+            audio_dir=audio_dir,
+            codec=codec,
+            use_s3=False,
+            block_size=1000,
+        )
+    )
+
+    wav, samplerate = sf.read(BytesIO(content))
+    expected = load_audio(
+        recording,
+        0.5,
+        1.5,
+        audio_dir=audio_dir,
+        use_s3=False,
+    )
+    assert samplerate == 8_000
+    assert wav.shape == (8_000, 2)
+    assert np.allclose(wav, expected.data, atol=1e-4)
+
+
+def test_iter_audio_blocks_pads_windows_before_the_start(
+    random_wav_factory,
+    audio_dir,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    wav_path = random_wav_factory(duration=1, samplerate=8_000)
+    samples, _ = sf.read(wav_path, always_2d=True)
+
+    # NOTE: FLAC files are decoded with soundfile instead of memory mapped.
+    path = wav_path.with_suffix(".flac")
+    sf.write(path, samples, 8_000)
+    recording = schemas.Recording(
+        id=1,
+        uuid=uuid4(),
+        path=path.relative_to(audio_dir),
+        hash="abc",
+        duration=1,
+        samplerate=8_000,
+        channels=1,
+        time_expansion=1,
+        date=None,
+        time=None,
+        latitude=None,
+        longitude=None,
+        rights=None,
+        created_on=datetime.datetime.now(),
+    )
+
+    reads = []
+
+    class SoundFile(sf.SoundFile):
+        def read(self, frames=-1, *args, **kwargs):
+            reads.append(frames)
+            return super().read(frames, *args, **kwargs)
+
+    monkeypatch.setattr(api_audio.sf, "SoundFile", SoundFile)
+
+    blocks = list(
+        iter_audio_blocks(
+            recording,
+            start_time=-0.5,
+            end_time=0.5,
+            audio_dir=audio_dir,
+            use_s3=False,
+            block_size=1000,
+        )
+    )
+
+    # Blocks before the start of the recording read nothing, instead of
+    # the rest of the file.
+    assert min(reads) >= 0
+    assert sum(reads) <= 4_000
+
+    data = np.concatenate(blocks)
+    assert data.shape == (8_000, 1)
+    assert np.all(data[:4_000] == 0)
+    assert np.allclose(data[4_000:], samples[:4_000], atol=1e-4)
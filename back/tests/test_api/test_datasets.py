@@ -761,3 +761,91 @@ async def test_create_dataset_registers_all_recordings(
 
     all_recordings, _ = await api.recordings.get_many(session)
     assert len(all_recordings) == 2
+
+
+async def test_sync_dataset_only_reads_new_and_changed_files(
+    session: AsyncSession,
+    random_wav_factory: Callable[..., Path],
+    audio_dir: Path,
+):
+    """Test that syncing a dataset uses the manifest of the last scan."""
+    # Arrange
+    dataset_audio_dir = audio_dir / "sync_dataset"
+    dataset_audio_dir.mkdir()
+    random_wav_factory(path=dataset_audio_dir / "unchanged.wav")
+    changed = random_wav_factory(path=dataset_audio_dir / "changed.wav")
+    removed = random_wav_factory(path=dataset_audio_dir / "removed.wav")
+
+    # NOTE: Creating the dataset registers the files and writes the
+    # manifest the next sync is compared to.
+    dataset = await api.datasets.create(
+        session,
+        name="sync_dataset",
+        dataset_dir=dataset_audio_dir,
+        audio_dir=audio_dir,
+    )
+
+    random_wav_factory(path=changed, duration=2)
+    removed.unlink()
+    random_wav_factory(path=dataset_audio_dir / "new.wav")
+
+    # Act
+    result = await api.datasets.sync(session, dataset, audio_dir=audio_dir)
+
+    # Assert
+    assert result.new_files == 1
+    assert result.changed_files == 1
+    assert result.unchanged_files == 1
+    assert result.removed_files == [Path("removed.wav")]
+    assert result.added_recordings == 1
+    assert result.updated_recordings == 1
+
+    states = await api.datasets.get_state(
+        session,
+        dataset,
+        audio_dir=audio_dir,
+    )
+    assert {file.path: file.state for file in states} == {
+        Path("unchanged.wav"): schemas.FileState.REGISTERED,
+        Path("changed.wav"): schemas.FileState.REGISTERED,
+        Path("new.wav"): schemas.FileState.REGISTERED,
+        Path("removed.wav"): schemas.FileState.MISSING,
+    }
+
+
+async def test_sync_dataset_retries_files_that_failed(
+    session: AsyncSession,
+    random_wav_factory: Callable[..., Path],
+    audio_dir: Path,
+):
+    """Test that files that could not be read are read again next sync."""
+    # Arrange
+    dataset_audio_dir = audio_dir / "retry_dataset"
+    dataset_audio_dir.mkdir()
+    random_wav_factory(path=dataset_audio_dir / "good.wav")
+    broken = dataset_audio_dir / "broken.wav"
+    broken.write_bytes(b"not audio")
+
+    dataset = await api.datasets.create(
+        session,
+        name="retry_dataset",
+        dataset_dir=dataset_audio_dir,
+        audio_dir=audio_dir,
+    )
+    assert dataset.recording_count == 1
+
+    # Act
+    random_wav_factory(path=broken)
+    result = await api.datasets.sync(session, dataset, audio_dir=audio_dir)
+
+    # Assert
+    assert result.new_files == 1
+    assert result.unchanged_files == 1
+    assert result.added_recordings == 1
+    assert result.failed_files == 0
+
+    dataset_recordings, _ = await api.datasets.get_recordings(session, dataset)
+    assert {rec.path.name for rec in dataset_recordings} == {
+        "good.wav",
+        "broken.wav",
+    }
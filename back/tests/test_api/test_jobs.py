@@ -0,0 +1,232 @@
+"""Test suite for the background jobs Python API module."""
+
+import asyncio
+import datetime
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from whombat import api, models, schemas
+from whombat.api import jobs
+from whombat.api.jobs import JobContext, JobResult, JobRunner, job_handler
+from whombat.system.database import get_async_db_engine
+from whombat.system.settings import Settings
+
+
+@job_handler("test_count")
+async def count_job(
+    session: AsyncSession,
+    context: JobContext,
+    total: int,
+) -> JobResult:
+    for index in range(total):
+        context.report(100 * (index + 1) / total)
+        await asyncio.sleep(0)
+    return JobResult(type="count", uuid=context.job.uuid)
+
+
+@job_handler("test_fail")
+async def fail_job(session: AsyncSession, context: JobContext) -> None:
+    raise RuntimeError("boom")
+
+
+_started: dict[str, asyncio.Event] = {}
+
+
+@job_handler("test_wait")
+async def wait_job(
+    session: AsyncSession,
+    context: JobContext,
+    name: str,
+) -> None:
+    context.report(10, "Waiting")
+    _started[name].set()
+    await asyncio.sleep(60)
+
+
+async def test_enqueue_unknown_kind_fails(session: AsyncSession):
+    with pytest.raises(ValueError):
+        await jobs.enqueue(session, "does_not_exist")
+
+
+async def test_runner_runs_queued_job(
+    session: AsyncSession,
+    settings: Settings,
+):
+    runner = JobRunner(workers=1, poll_interval=0.05)
+    await runner.start(settings)
+    job = await jobs.enqueue(session, "test_count", total=3)
+    assert job.status == schemas.JobStatus.QUEUED
+    assert job.parameters == {"total": 3}
+
+    # Let the worker pick up the job
+    for _ in range(100):
+        job = await jobs.get(session, job.uuid)
+        if job.status.finished:
+            break
+        await asyncio.sleep(0.05)
+
+    await runner.stop()
+
+    assert job.status == schemas.JobStatus.SUCCEEDED
+    assert job.progress == 100
+    assert job.result_type == "count"
+    assert job.result_uuid == job.uuid
+    assert job.started_on is not None
+    assert job.finished_on is not None
+
+
+async def test_failed_job_records_error(
+    session: AsyncSession,
+    settings: Settings,
+):
+    runner = JobRunner(engine=get_async_db_engine(settings))
+    job = await jobs.enqueue(session, "test_fail")
+
+    assert await runner.run_pending() == 1
+
+    job = await jobs.get(session, job.uuid)
+    assert job.status == schemas.JobStatus.FAILED
+    assert job.error == "boom"
+    assert job.result_uuid is None
+
+
+async def test_sync_dataset_job(
+    session: AsyncSession,
+    settings: Settings,
+    random_wav_factory: Callable[..., Path],
+    audio_dir: Path,
+):
+    dataset_audio_dir = audio_dir / "job_dataset"
+    dataset_audio_dir.mkdir()
+    random_wav_factory(path=dataset_audio_dir / "first.wav")
+    dataset = await api.datasets.create(
+        session,
+        name="job_dataset",
+        dataset_dir=dataset_audio_dir,
+        audio_dir=audio_dir,
+    )
+    random_wav_factory(path=dataset_audio_dir / "second.wav")
+    runner = JobRunner(engine=get_async_db_engine(settings))
+
+    job = await jobs.enqueue(
+        session,
+        "sync_dataset",
+        dataset_uuid=str(dataset.uuid),
+        audio_dir=str(audio_dir),
+    )
+    assert await runner.run_pending() == 1
+
+    job = await jobs.get(session, job.uuid)
+    assert job.status == schemas.JobStatus.SUCCEEDED
+    assert job.result_type == "dataset"
+    assert job.result_uuid == dataset.uuid
+    assert job.message is not None
+    assert job.message.startswith("Added 1 and updated 0 recordings.")
+
+    dataset_recordings, _ = await api.datasets.get_recordings(session, dataset)
+    assert len(dataset_recordings) == 2
+
+
+async def test_cancel_queued_job(
+    session: AsyncSession,
+    settings: Settings,
+):
+    runner = JobRunner(engine=get_async_db_engine(settings))
+    job = await jobs.enqueue(session, "test_count", total=1)
+
+    job = await jobs.cancel(session, job)
+
+    assert job.status == schemas.JobStatus.CANCELLED
+    assert job.finished_on is not None
+    assert await runner.run_pending() == 0
+
+
+async def test_cancel_running_job(
+    session: AsyncSession,
+    settings: Settings,
+):
+    runner = JobRunner(
+        progress_interval=0.01,
+        engine=get_async_db_engine(settings),
+    )
+    _started["cancel"] = asyncio.Event()
+    job = await jobs.enqueue(session, "test_wait", name="cancel")
+    task = asyncio.create_task(runner.run_pending())
+    await asyncio.wait_for(_started["cancel"].wait(), timeout=5)
+
+    job = await jobs.get(session, job.uuid)
+    assert job.status == schemas.JobStatus.RUNNING
+
+    # The cancellation is only stored in the database, as if it came from
+    # another process, and the runner stops the job when saving progress.
+    job = await jobs.cancel(session, job)
+    assert job.cancel_requested
+    assert await asyncio.wait_for(task, timeout=5) == 1
+
+    job = await jobs.get(session, job.uuid)
+    assert job.status == schemas.JobStatus.CANCELLED
+    assert job.progress == 10
+    assert job.message == "Waiting"
+
+
+async def test_start_fails_interrupted_jobs(
+    session: AsyncSession,
+    settings: Settings,
+):
+    job = await jobs.enqueue(session, "test_count", total=1)
+    claimed = await jobs.claim(session, owner="stopped")
+    assert claimed is not None and claimed.uuid == job.uuid
+    assert claimed.owner == "stopped"
+
+    # The runner that claimed the job stopped sending heartbeats.
+    await session.execute(
+        update(models.Job)
+        .where(models.Job.id == job.id)
+        .values(
+            heartbeat_on=datetime.datetime.now(datetime.timezone.utc)
+            - datetime.timedelta(minutes=5)
+        )
+    )
+    await session.commit()
+
+    runner = JobRunner(heartbeat_timeout=60)
+    await runner.start(settings)
+    await runner.stop()
+
+    job = await jobs.get(session, job.uuid)
+    assert job.status == schemas.JobStatus.FAILED
+    assert job.error == "The job was interrupted."
+
+
+async def test_start_keeps_jobs_of_live_runners(
+    session: AsyncSession,
+    settings: Settings,
+):
+    live = JobRunner(
+        progress_interval=0.01,
+        engine=get_async_db_engine(settings),
+    )
+    _started["live"] = asyncio.Event()
+    job = await jobs.enqueue(session, "test_wait", name="live")
+    task = asyncio.create_task(live.run_pending())
+    await asyncio.wait_for(_started["live"].wait(), timeout=5)
+
+    # Another process starts while the job is running.
+    runner = JobRunner(heartbeat_timeout=60)
+    await runner.start(settings)
+    await runner.stop()
+
+    job = await jobs.get(session, job.uuid)
+    assert job.status == schemas.JobStatus.RUNNING
+    assert job.owner == live.owner
+    assert job.heartbeat_on is not None
+
+    job = await jobs.cancel(session, job)
+    assert await asyncio.wait_for(task, timeout=5) == 1
+
+    job = await jobs.get(session, job.uuid)
+    assert job.status == schemas.JobStatus.CANCELLED
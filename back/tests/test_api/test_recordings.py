@@ -1,6 +1,9 @@
 """Test suite for the notes Python API module."""
 
+import base64
+import dataclasses
 import datetime
+import hashlib
 import shutil
 from collections.abc import Callable
 from pathlib import Path
@@ -8,10 +11,12 @@ from pathlib import Path
 import pytest
 from pydantic import ValidationError
 from soundevent.audio import compute_md5_checksum
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from whombat import api, exceptions, models, schemas
+from whombat.api.recordings import IngestionProgress
+from whombat.utils.s3_files import get_s3_file_info
 
 
 async def test_create_recording(
@@ -904,6 +909,113 @@ async def test_update_recording_path_fails_if_hash_does_not_coincide(
         )
 
 
+async def _ingest_from_s3(
+    session: AsyncSession,
+    recording: schemas.Recording,
+    s3_client,
+    audio_dir: Path,
+    head: dict,
+) -> schemas.Recording:
+    """Give a recording the hash it would get if ingested from S3."""
+    s3_client.put_object(
+        Bucket="bucket",
+        Key="recording.wav",
+        Body=(audio_dir / recording.path).read_bytes(),
+    )
+    s3_client.heads[("bucket", "recording.wav")].update(head)
+    info = get_s3_file_info(s3_client, "bucket", "recording.wav")
+    await session.execute(
+        update(models.Recording)
+        .where(models.Recording.id == recording.id)
+        .values(hash=info.hash, hash_algorithm=info.hash_algorithm)
+    )
+    return recording.model_copy(
+        update=dict(hash=info.hash, hash_algorithm=info.hash_algorithm)
+    )
+
+
+async def test_update_path_of_recording_with_s3_etag(
+    session: AsyncSession,
+    recording: schemas.Recording,
+    s3_client,
+    audio_dir: Path,
+):
+    """Test updating the path of a recording hashed with an S3 ETag."""
+    # Arrange
+    recording = await _ingest_from_s3(
+        session,
+        recording,
+        s3_client,
+        audio_dir,
+        # Multipart uploads have ETags that are not an MD5 of the content.
+        head={"ETag": '"0123456789abcdef-2"'},
+    )
+    assert recording.hash_algorithm == "etag"
+    new_path = audio_dir / "new_path.wav"
+    shutil.move(audio_dir / recording.path, new_path)
+
+    # Act
+    updated = await api.recordings.update(
+        session,
+        recording,
+        data=schemas.RecordingUpdate(path=new_path),
+        audio_dir=audio_dir,
+    )
+
+    # Assert
+    assert updated.path == Path("new_path.wav")
+    assert updated.hash == recording.hash
+    assert updated.hash_algorithm == "etag"
+
+
+async def test_update_path_of_recording_with_s3_checksum(
+    session: AsyncSession,
+    recording: schemas.Recording,
+    s3_client,
+    audio_dir: Path,
+    random_wav_factory: Callable[..., Path],
+):
+    """Test that the path of a recording hashed with an S3 SHA-256
+    checksum is checked against the checksum."""
+    # Arrange
+    content = (audio_dir / recording.path).read_bytes()
+    checksum = hashlib.sha256(content).digest()
+    recording = await _ingest_from_s3(
+        session,
+        recording,
+        s3_client,
+        audio_dir,
+        head={
+            "ETag": '"0123456789abcdef-2"',
+            "ChecksumSHA256": base64.b64encode(checksum).decode(),
+        },
+    )
+    assert recording.hash_algorithm == "sha256"
+    other_path = random_wav_factory()
+    new_path = audio_dir / "new_path.wav"
+    shutil.move(audio_dir / recording.path, new_path)
+
+    # Act
+    with pytest.raises(ValueError):
+        await api.recordings.update(
+            session,
+            recording,
+            data=schemas.RecordingUpdate(path=other_path),
+            audio_dir=audio_dir,
+        )
+
+    updated = await api.recordings.update(
+        session,
+        recording,
+        data=schemas.RecordingUpdate(path=new_path),
+        audio_dir=audio_dir,
+    )
+
+    # Assert
+    assert updated.path == Path("new_path.wav")
+    assert updated.hash == checksum.hex()
+
+
 async def test_create_recordings(
     session: AsyncSession,
     random_wav_factory: Callable[..., Path],
@@ -1025,6 +1137,46 @@ async def test_create_recording_avoids_hash_duplicates(
     assert len(all_recs) == 2
 
 
+async def test_create_recordings_in_batches_resumes_ingestion(
+    session: AsyncSession,
+    random_wav_factory: Callable[..., Path],
+    audio_dir: Path,
+):
+    """Test that files registered by a previous run are not read again."""
+    # Arrange
+    paths = [random_wav_factory() for _ in range(5)]
+    await api.recordings.create_many(
+        session,
+        [dict(path=path) for path in paths[:2]],
+        audio_dir=audio_dir,
+    )
+    progress: list[IngestionProgress] = []
+
+    # Act
+    batches = [
+        batch
+        async for batch in api.recordings.create_many_batched(
+            session,
+            [dict(path=path) for path in paths],
+            audio_dir=audio_dir,
+            batch_size=2,
+            progress=lambda state: progress.append(dataclasses.replace(state)),
+        )
+    ]
+
+    # Assert
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert {recording.path for batch in batches for recording in batch} == {
+        path.relative_to(audio_dir) for path in paths
+    }
+    assert progress[-1] == IngestionProgress(
+        total=5,
+        processed=5,
+        created=3,
+        existing=2,
+    )
+
+
 async def test_create_recordings_with_time_expansion(
     session: AsyncSession,
     random_wav_factory: Callable[..., Path],
@@ -0,0 +1,78 @@
+"""Test suite for the spectrogram API functions."""
+
+import datetime
+from uuid import uuid4
+
+import pytest
+
+from whombat import schemas
+from whombat.api import audio as api_audio
+from whombat.api.spectrograms import (
+    render_spectrogram_image,
+    render_spectrogram_images,
+)
+
+
+@pytest.mark.parametrize("resample", [False, True])
+def test_batch_images_match_single_images(
+    resample: bool,
+    random_wav_factory,
+    audio_dir,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    path = random_wav_factory(duration=2, samplerate=8_000)
+    recording = schemas.Recording(
+        id=1,
+        uuid=uuid4(),
+        path=path.relative_to(audio_dir),
+        hash="abc",
+        duration=2,
+        samplerate=8_000,
+        channels=1,
+        time_expansion=1,
+        date=None,
+        time=None,
+        latitude=None,
+        longitude=None,
+        rights=None,
+        created_on=datetime.datetime.now(),
+    )
+    audio_parameters = schemas.AudioParameters(
+        resample=resample,
+        samplerate=4_000,
+    )
+    spectrogram_parameters = schemas.SpectrogramParameters()
+    windows = [(0.5, 1.0), (-0.2, 0.3), (0.0, 2.0)]
+
+    loaded = []
+    load_audio_windows = api_audio.load_audio_windows
+
+    def track(recording, windows, **kwargs):
+        loaded.extend(windows)
+        return load_audio_windows(recording, windows, **kwargs)
+
+    monkeypatch.setattr(api_audio, "load_audio_windows", track)
+
+    images = render_spectrogram_images(
+        recording,
+        windows,
+        audio_parameters,
+        spectrogram_parameters,
+        audio_dir=audio_dir,
+    )
+
+    # Only windows that can not be read directly are loaded as labelled
+    # arrays.
+    assert loaded == (windows if resample else [(-0.2, 0.3)])
+
+    assert images == [
+        render_spectrogram_image(
+            recording,
+            start_time,
+            end_time,
+            audio_parameters,
+            spectrogram_parameters,
+            audio_dir=audio_dir,
+        )
+        for start_time, end_time in windows
+    ]
@@ -0,0 +1,50 @@
+"""Test suite for audio encoding functions."""
+
+from io import BytesIO
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from whombat.core.audio_encoding import encode_audio, get_encoding_samplerate
+
+
+@pytest.mark.parametrize(
+    "codec, samplerate, expected",
+    [
+        ("wav", 384_000, 384_000),
+        ("flac", 44_100, 44_100),
+        ("flac", 1_000_000, 655_350),
+        ("vorbis", 22_050, 22_050),
+        ("vorbis", 96_000, 48_000),
+        ("opus", 44_100, 48_000),
+        ("opus", 11_025, 12_000),
+        ("opus", 8_000, 8_000),
+    ],
+)
+def test_get_encoding_samplerate(codec: str, samplerate: int, expected: int):
+    assert get_encoding_samplerate(codec, samplerate) == expected
+
+
+def test_flac_is_lossless():
+    data = np.random.randint(-(2**15), 2**15, size=(8_000, 2)) / 2**15
+
+    content = encode_audio(data, 8_000, codec="flac")
+    decoded, samplerate = sf.read(BytesIO(content))
+
+    assert samplerate == 8_000
+    assert np.array_equal(decoded, data)
+
+
+@pytest.mark.parametrize("codec", ["vorbis", "opus"])
+def test_lossy_codecs_resample_and_keep_duration(codec: str):
+    samplerate = 96_000
+    time = np.arange(samplerate) / samplerate
+    data = 0.5 * np.sin(2 * np.pi * 440 * time)[:, None]
+
+    content = encode_audio(data, samplerate, codec=codec)
+    info = sf.info(BytesIO(content))
+
+    assert info.samplerate == 48_000
+    assert info.duration == pytest.approx(1, abs=0.05)
+    assert len(content) < data.size * 2 / 5
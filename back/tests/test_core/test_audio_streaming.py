@@ -0,0 +1,75 @@
+"""Test suite for block-wise audio processing."""
+
+import numpy as np
+import pytest
+from scipy import signal
+
+from whombat.core.audio_streaming import (
+    design_filter,
+    get_filter_margin,
+    get_output_frames,
+    iter_processed_blocks,
+)
+
+
+@pytest.fixture
+def wave() -> np.ndarray:
+    return np.random.random((20_000, 2)) * 2 - 1
+
+
+def _reader(wave: np.ndarray):
+    def read(start: int, frames: int) -> np.ndarray:
+        return wave[start : start + frames]
+
+    return read
+
+
+def test_blocks_without_processing_are_the_clip(wave: np.ndarray):
+    blocks = list(
+        iter_processed_blocks(_reader(wave), 20_000, 8_000, block_size=3000)
+    )
+
+    assert [len(block) for block in blocks] == [3000] * 6 + [2000]
+    assert np.array_equal(np.concatenate(blocks), wave)
+
+
+@pytest.mark.parametrize("target_samplerate", [6_000, 11_025, 16_000])
+def test_resampled_blocks_match_whole_clip(
+    wave: np.ndarray,
+    target_samplerate: int,
+):
+    blocks = iter_processed_blocks(
+        _reader(wave),
+        20_000,
+        8_000,
+        target_samplerate=target_samplerate,
+        block_size=1000,
+    )
+    result = np.concatenate(list(blocks))
+
+    expected = signal.resample_poly(
+        wave,
+        target_samplerate,
+        8_000,
+        axis=0,
+        window=("kaiser", 5.0),
+    )
+    total = get_output_frames(20_000, 8_000, target_samplerate)
+    assert result.shape == (total, 2)
+    assert np.allclose(result, expected[:total])
+
+
+def test_filtered_blocks_match_whole_clip(wave: np.ndarray):
+    sos = design_filter(8_000, low_freq=200, high_freq=3_000)
+    blocks = iter_processed_blocks(
+        _reader(wave),
+        20_000,
+        8_000,
+        sos=sos,
+        filter_margin=get_filter_margin(8_000, 200, 3_000),
+        block_size=1000,
+    )
+    result = np.concatenate(list(blocks))
+
+    expected = signal.sosfiltfilt(sos, wave, axis=0)
+    assert np.allclose(result, expected, atol=1e-8)
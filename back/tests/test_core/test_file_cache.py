@@ -0,0 +1,108 @@
+"""Test suite for the local file cache."""
+
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from whombat.core.file_cache import FileCache
+
+
+def write_bytes(size: int):
+    def fetch(path: Path):
+        path.write_bytes(b"x" * size)
+
+    return fetch
+
+
+def test_cache_fetches_missing_files_once(tmp_path: Path):
+    cache = FileCache(tmp_path / "cache", max_size=1000)
+    calls = []
+
+    def fetch(path: Path):
+        calls.append(path)
+        path.write_bytes(b"audio")
+
+    first = cache.get_or_fetch("abc123", fetch)
+    second = cache.get_or_fetch("abc123", fetch)
+
+    assert first == second
+    assert first.read_bytes() == b"audio"
+    assert len(calls) == 1
+    assert cache.stats.hits == 1
+
+
+def test_cache_evicts_least_recently_used_files(tmp_path: Path):
+    cache = FileCache(tmp_path / "cache", max_size=250)
+
+    first = cache.get_or_fetch("aaa", write_bytes(100))
+    second = cache.get_or_fetch("bbb", write_bytes(100))
+    os.utime(first, (1, 1))
+    os.utime(second, (2, 2))
+
+    # Accessing the first file makes the second one the oldest.
+    assert cache.get("aaa") is not None
+
+    cache.get_or_fetch("ccc", write_bytes(100))
+
+    assert cache.get("aaa") is not None
+    assert cache.get("bbb") is None
+    assert cache.get("ccc") is not None
+    assert cache.size() <= 250
+    assert cache.stats.evictions == 1
+
+
+def test_failed_fetch_leaves_no_partial_file(tmp_path: Path):
+    cache = FileCache(tmp_path / "cache", max_size=1000)
+
+    def fetch(path: Path):
+        path.write_bytes(b"partial")
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch("abc", fetch)
+
+    assert cache.get("abc") is None
+    assert cache.entries() == 0
+    assert not any(p.is_file() for p in (tmp_path / "cache").rglob("*"))
+
+
+def test_concurrent_requests_share_a_single_fetch(tmp_path: Path):
+    cache = FileCache(tmp_path / "cache", max_size=1000)
+    calls = []
+    barrier = threading.Barrier(4)
+
+    def fetch(path: Path):
+        calls.append(path)
+        path.write_bytes(b"audio")
+
+    def worker():
+        barrier.wait()
+        cache.get_or_fetch("abc", fetch)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+
+
+def test_put_file_moves_file_into_cache(tmp_path: Path):
+    cache = FileCache(tmp_path / "cache", max_size=1000)
+    source = tmp_path / "recording.wav"
+    source.write_bytes(b"audio")
+
+    path = cache.put_file("abc", source)
+
+    assert not source.exists()
+    assert cache.get("abc") == path
+
+
+def test_invalid_keys_are_rejected(tmp_path: Path):
+    cache = FileCache(tmp_path / "cache", max_size=1000)
+
+    with pytest.raises(ValueError):
+        cache.get("../secret")
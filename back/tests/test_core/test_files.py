@@ -3,7 +3,10 @@
 from collections.abc import Callable
 from pathlib import Path
 
+import numpy as np
 import pytest
+import soundfile as sf
+from soundevent.audio import compute_md5_checksum, get_media_info
 
 from whombat.core import files
 
@@ -72,3 +75,69 @@ def test_get_audio_files_in_folder(
         Path("wav2.WAV"),
         Path("foo") / "wav3.wav",
     }
+
+
+@pytest.mark.parametrize(
+    "filename, subtype, channels",
+    [
+        ("audio.wav", "PCM_16", 1),
+        ("audio.wav", "PCM_24", 3),
+        ("audio.wav", "FLOAT", 2),
+        ("audio.wav", "PCM_U8", 1),
+        ("audio.flac", "PCM_16", 2),
+    ],
+)
+def test_get_file_info_matches_soundfile_and_md5(
+    tmp_path: Path,
+    filename: str,
+    subtype: str,
+    channels: int,
+):
+    path = tmp_path / filename
+    sf.write(path, np.random.random((5000, channels)), 22_050, subtype=subtype)
+
+    info = files.get_file_info(path)
+
+    assert info.is_audio
+    assert info.hash == compute_md5_checksum(path)
+    assert info.hash_algorithm == "md5"
+    assert info.media_info == get_media_info(path)
+
+
+def test_get_file_info_with_another_algorithm(tmp_path: Path):
+    path = tmp_path / "audio.wav"
+    sf.write(path, np.random.random((5000, 1)), 8_000)
+
+    info = files.get_file_info(path, algorithm="blake2b")
+
+    assert info.hash_algorithm == "blake2b"
+    assert info.hash == files.compute_hash(path, "blake2b")
+    assert info.hash != compute_md5_checksum(path)
+
+
+def test_quick_hash_only_samples_large_files(tmp_path: Path):
+    path = tmp_path / "audio.wav"
+    data = np.random.random((1_000_000, 1))
+    sf.write(path, data, 8_000, subtype="PCM_16")
+
+    info = files.get_file_info(path, algorithm="blake2b", quick=True)
+    assert info.hash_algorithm == "blake2b-quick"
+    assert info.hash != files.compute_hash(path, "blake2b")
+    assert files.parse_hash_name(info.hash_algorithm) == ("blake2b", True)
+
+    # A change in a sampled block changes the hash.
+    data[0] = 0
+    sf.write(path, data, 8_000, subtype="PCM_16")
+    assert files.compute_hash(path, "blake2b", quick=True) != info.hash
+
+
+def test_parse_hash_name_rejects_unknown_algorithms():
+    with pytest.raises(ValueError):
+        files.parse_hash_name("sha1")
+    with pytest.raises(ValueError):
+        files.parse_hash_name("etag-quick")
+
+
+def test_parse_hash_name_accepts_s3_object_hashes():
+    assert files.parse_hash_name("etag") == ("etag", False)
+    assert files.parse_hash_name("sha256") == ("sha256", False)
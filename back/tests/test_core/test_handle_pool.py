@@ -0,0 +1,87 @@
+"""Test suite for the pool of open audio handles."""
+
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from whombat.core.handle_pool import AudioHandlePool
+
+
+def _write_wav(path: Path, frames: int = 4000) -> np.ndarray:
+    data = np.random.random((frames, 1)) * 2 - 1
+    sf.write(path, data, 8000, subtype="FLOAT")
+    return data
+
+
+def test_handles_are_reused_by_a_stream(tmp_path: Path):
+    path = tmp_path / "audio.wav"
+    _write_wav(path)
+    opened = []
+
+    def opener():
+        opened.append(1)
+        return sf.SoundFile(path)
+
+    pool = AudioHandlePool(max_handles=4)
+
+    for offset in range(0, 4000, 1000):
+        with pool.acquire((path, "a"), opener) as handle:
+            pool.read(handle, offset, 1000)
+
+    with pool.acquire((path, "b"), opener) as handle:
+        pool.read(handle, 0, 1000)
+
+    assert len(opened) == 2
+    assert pool.stats.hits == 3
+    assert pool.stats.misses == 2
+
+
+def test_least_recently_used_handles_are_closed(tmp_path: Path):
+    path = tmp_path / "audio.wav"
+    _write_wav(path)
+    opener = functools.partial(sf.SoundFile, path)
+    pool = AudioHandlePool(max_handles=2)
+
+    for stream in ["a", "b", "a", "c"]:
+        with pool.acquire((path, stream), opener):
+            pass
+
+    assert len(pool) == 2
+    assert pool.stats.evictions == 1
+
+    with pool.acquire((path, "a"), opener):
+        pass
+
+    assert pool.stats.hits == 2
+
+
+def test_idle_handles_are_closed(tmp_path: Path):
+    path = tmp_path / "audio.wav"
+    _write_wav(path)
+    pool = AudioHandlePool(idle_timeout=0)
+
+    with pool.acquire(path, functools.partial(sf.SoundFile, path)) as handle:
+        assert pool.evict_idle() == 0
+
+    assert pool.evict_idle() == 1
+    assert handle.file.closed
+
+
+def test_prefetched_chunks_match_direct_reads(tmp_path: Path):
+    path = tmp_path / "audio.wav"
+    data = _write_wav(path)
+    opener = functools.partial(sf.SoundFile, path)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pool = AudioHandlePool(submit=executor.submit)
+
+        chunks = []
+        for offset in range(0, 4000, 1000):
+            with pool.acquire(path, opener) as handle:
+                chunks.append(pool.read(handle, offset, 1000))
+
+    assert pool.prefetch_hits == 3
+    assert np.allclose(np.concatenate(chunks), data, atol=1e-6)
@@ -0,0 +1,55 @@
+"""Test suite for image rendering functions."""
+
+from io import BytesIO
+
+import numpy as np
+import pytest
+from matplotlib import colormaps
+from PIL import Image
+
+from whombat.core import images
+
+
+@pytest.mark.parametrize("cmap", ["gray", "viridis", "magma"])
+def test_lut_colormapping_matches_matplotlib(cmap: str):
+    array = np.random.random((64, 128))
+
+    expected = np.uint8(colormaps.get_cmap(cmap)(np.flipud(array)) * 255)
+    image = images.array_to_image(array, cmap)
+
+    assert image.mode == "RGB"
+    assert np.array_equal(np.asarray(image), expected[..., :3])
+
+
+def test_out_of_range_values_are_clamped():
+    array = np.array([[-1.0, np.nan], [0.5, 2.0]])
+
+    image = np.asarray(images.array_to_image(array, "gray"))
+
+    assert image[1, 0, 0] == 0
+    assert image[0, 1, 0] == 255
+
+
+@pytest.mark.parametrize("fmt", ["png", "webp", "jpeg"])
+def test_encode_image_formats(fmt: str):
+    array = np.random.random((32, 64))
+
+    content = images.encode_image(array, "viridis", fmt=fmt, quality=80)
+
+    with Image.open(BytesIO(content)) as image:
+        assert image.format == fmt.upper()
+        assert image.size == (64, 32)
+
+
+def test_pack_images_roundtrip():
+    contents = [b"first", b"", b"third image"]
+    metadata = [{"name": "a"}, {"name": "b"}, {"name": "c"}]
+
+    index, images_ = images.unpack_images(
+        images.pack_images(contents, metadata, media_type="image/webp")
+    )
+
+    assert images_ == contents
+    assert index["media_type"] == "image/webp"
+    assert [entry["name"] for entry in index["images"]] == ["a", "b", "c"]
+    assert [entry["length"] for entry in index["images"]] == [5, 0, 11]
@@ -0,0 +1,80 @@
+"""Test suite for the manifests of dataset files."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+from whombat.core.files import scan_audio_files
+from whombat.core.manifest import (
+    FileStat,
+    diff_manifest,
+    diff_manifest_stream,
+)
+
+
+def test_diff_finds_added_changed_and_removed_files():
+    manifest = {
+        "same.wav": FileStat("same.wav", size=10, mtime=1),
+        "resized.wav": FileStat("resized.wav", size=10, mtime=1),
+        "touched.wav": FileStat("touched.wav", size=10, mtime=1),
+        "gone.wav": FileStat("gone.wav", size=10, mtime=1),
+    }
+    listing = [
+        FileStat("same.wav", size=10, mtime=1),
+        FileStat("resized.wav", size=20, mtime=1),
+        FileStat("touched.wav", size=10, mtime=2),
+        FileStat("new.wav", size=10, mtime=1),
+    ]
+
+    diff = diff_manifest(manifest, listing)
+
+    assert [stat.path for stat in diff.added] == ["new.wav"]
+    assert [stat.path for stat in diff.changed] == [
+        "resized.wav",
+        "touched.wav",
+    ]
+    assert diff.removed == ["gone.wav"]
+    assert diff.unchanged == 1
+
+
+async def test_streamed_diff_matches_diff_of_full_listing():
+    manifest = {
+        "same.wav": FileStat("same.wav", size=10, mtime=1),
+        "gone.wav": FileStat("gone.wav", size=10, mtime=1),
+    }
+    listing = [
+        FileStat("same.wav", size=10, mtime=1),
+        FileStat("new.wav", size=10, mtime=1),
+    ]
+
+    async def stream():
+        for stat in listing:
+            yield stat
+
+    assert await diff_manifest_stream(manifest, stream()) == diff_manifest(
+        manifest, listing
+    )
+
+
+def test_etags_take_precedence_over_modification_times():
+    previous = FileStat("a.wav", size=10, mtime=1, etag="abc")
+
+    assert previous.matches(FileStat("a.wav", size=10, mtime=2, etag="abc"))
+    assert not previous.matches(
+        FileStat("a.wav", size=10, mtime=1, etag="def")
+    )
+
+
+def test_scan_lists_audio_files_recursively(
+    tmp_path: Path,
+    random_wav_factory: Callable[..., Path],
+):
+    random_wav_factory(path=tmp_path / "a.wav")
+    (tmp_path / "sub").mkdir()
+    path = random_wav_factory(path=tmp_path / "sub" / "b.wav")
+    (tmp_path / "notes.txt").touch()
+
+    listing = {stat.path: stat for stat in scan_audio_files(tmp_path)}
+
+    assert set(listing) == {"a.wav", "sub/b.wav"}
+    assert listing["sub/b.wav"].size == path.stat().st_size
+    assert listing["sub/b.wav"].mtime == path.stat().st_mtime
@@ -0,0 +1,90 @@
+"""Test suite for spectrogram tile pyramids."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from whombat.core.pyramids import build_spectrogram_pyramid
+from whombat.core.spectrograms import pool_time, power_spectrogram
+
+
+@pytest.fixture
+def wav_path(random_wav_factory: Callable[..., Path]) -> Path:
+    return random_wav_factory(duration=10, samplerate=8_000, channels=1)
+
+
+def test_pyramid_levels_halve_the_number_of_columns(
+    tmp_path: Path,
+    wav_path: Path,
+):
+    with sf.SoundFile(wav_path) as source:
+        pyramid = build_spectrogram_pyramid(
+            tmp_path / "pyramid",
+            source,
+            nperseg=256,
+            hop=128,
+            tile_width=64,
+            block_columns=100,
+        )
+
+    info = pyramid.info
+    assert info.columns[0] == 1 + (80_000 - 256) // 128
+    assert info.columns[-1] <= 64
+    assert all(
+        coarse == -(-fine // 2)
+        for fine, coarse in zip(info.columns, info.columns[1:])
+    )
+    assert info.column_duration(1) == 2 * info.column_duration(0)
+
+
+def test_pyramid_matches_spectrogram_of_whole_recording(
+    tmp_path: Path,
+    wav_path: Path,
+):
+    with sf.SoundFile(wav_path) as source:
+        pyramid = build_spectrogram_pyramid(
+            tmp_path / "pyramid",
+            source,
+            nperseg=256,
+            hop=128,
+            tile_width=64,
+            block_columns=100,
+        )
+
+    wav, samplerate = sf.read(wav_path, dtype="float32")
+    expected = 10 * np.log10(
+        np.maximum(power_spectrogram(wav, samplerate, 256, 128), 1e-10)
+    )
+
+    level = np.asarray(pyramid.level(0), dtype=np.float32)
+    assert np.allclose(level, expected, atol=0.1)
+
+    coarse = np.asarray(pyramid.level(1), dtype=np.float32)
+    assert np.allclose(coarse, pool_time(level, 2, "max"))
+
+
+def test_pyramid_tiles(tmp_path: Path, wav_path: Path):
+    with sf.SoundFile(wav_path) as source:
+        pyramid = build_spectrogram_pyramid(
+            tmp_path / "pyramid",
+            source,
+            nperseg=256,
+            hop=128,
+            tile_width=64,
+        )
+
+    info = pyramid.info
+    last = info.tiles(0) - 1
+
+    assert pyramid.tile(0, 0).shape == (129, 64)
+    assert pyramid.tile(0, last).shape[1] == info.columns[0] - last * 64
+    assert pyramid.tile_bounds(0, 1) == pytest.approx((1.024, 2.048))
+
+    with pytest.raises(IndexError):
+        pyramid.tile(0, last + 1)
+
+    with pytest.raises(IndexError):
+        pyramid.tile(info.levels, 0)
@@ -0,0 +1,107 @@
+"""Test suite for the coalescing of identical concurrent calls."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from whombat.core.single_flight import SingleFlight, ThreadSingleFlight
+
+
+async def test_concurrent_calls_with_the_same_key_share_one_execution():
+    flights = SingleFlight("test")
+    release = asyncio.Event()
+    executions = 0
+
+    async def compute() -> int:
+        nonlocal executions
+        executions += 1
+        await release.wait()
+        return 42
+
+    tasks = [
+        asyncio.create_task(flights.run("key", compute)) for _ in range(5)
+    ]
+    other = asyncio.create_task(flights.run("other", compute))
+    await asyncio.sleep(0.01)
+
+    assert flights.in_flight() == {"key": 5, "other": 1}
+
+    release.set()
+    assert await asyncio.gather(*tasks, other) == [42] * 6
+    assert executions == 2
+    assert flights.stats.shared == 4
+    assert flights.stats.max_waiters == 5
+    assert flights.in_flight() == {}
+
+
+async def test_errors_are_shared_and_not_cached():
+    flights = SingleFlight("test")
+    calls = 0
+
+    async def fail() -> None:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flights.run("key", fail),
+        flights.run("key", fail),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert calls == 1
+
+    with pytest.raises(ValueError):
+        await flights.run("key", fail)
+
+    assert calls == 2
+    assert flights.stats.failed == 2
+
+
+async def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flights = SingleFlight("test")
+
+    async def compute() -> int:
+        await asyncio.sleep(0.05)
+        return 1
+
+    first = asyncio.create_task(flights.run("key", compute))
+    second = asyncio.create_task(flights.run("key", compute))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == 1
+
+
+def test_threads_share_one_execution():
+    flights = ThreadSingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+    executions = 0
+
+    def compute() -> int:
+        nonlocal executions
+        executions += 1
+        started.set()
+        release.wait()
+        return 7
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flights.run, "key", compute)
+        started.wait()
+        followers = [
+            pool.submit(flights.run, "key", compute) for _ in range(3)
+        ]
+
+        while flights.in_flight().get("key", 0) < 4:
+            time.sleep(0.001)
+
+        release.set()
+        assert [f.result() for f in [leader, *followers]] == [7] * 4
+
+    assert executions == 1
+    assert flights.stats.shared == 3
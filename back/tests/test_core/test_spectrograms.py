@@ -0,0 +1,125 @@
+"""Test suite for spectrogram manipulation functions."""
+
+import numpy as np
+import pytest
+import xarray as xr
+from soundevent import arrays, audio
+
+from whombat.core.spectrograms import (
+    RAW_HEADER_SIZE,
+    compute_normalized_spectrogram,
+    compute_normalized_spectrogram_blocks,
+    decode_raw_spectrogram,
+    encode_raw_spectrogram,
+    normalize_spectrogram,
+)
+
+
+@pytest.mark.parametrize("dtype", ["uint8", "float16"])
+def test_raw_spectrogram_roundtrip(dtype: str):
+    array = np.random.random((129, 300))
+
+    content = encode_raw_spectrogram(
+        array,
+        dtype=dtype,  # type: ignore
+        start_time=1.5,
+        time_step=0.0125,
+        min_freq=0,
+        freq_step=31.25,
+        min_db=-80,
+        max_db=-10,
+    )
+    decoded = decode_raw_spectrogram(content)
+
+    itemsize = np.dtype(dtype).itemsize
+    assert len(content) == RAW_HEADER_SIZE + array.size * itemsize
+    assert decoded.data.shape == (129, 300)
+    assert decoded.start_time == 1.5
+    assert decoded.time_step == 0.0125
+    assert decoded.freq_step == 31.25
+    assert (decoded.min_db, decoded.max_db) == (-80, -10)
+
+    scale = 255 if dtype == "uint8" else 1
+    assert np.allclose(decoded.data / scale, array, atol=1 / 255)
+
+
+def test_raw_spectrogram_clamps_values():
+    array = np.array([[-1.0, 2.0, np.nan]])
+
+    decoded = decode_raw_spectrogram(encode_raw_spectrogram(array))
+
+    assert decoded.data.tolist() == [[0, 255, 0]]
+
+
+@pytest.mark.parametrize("pcen", [True, False])
+def test_compute_normalized_spectrogram_matches_xarray_pipeline(pcen: bool):
+    samplerate = 22_050
+    samples = np.random.default_rng(0).standard_normal(samplerate)
+    wav = xr.DataArray(
+        samples[:, None],
+        dims=("time", "channel"),
+        coords={
+            "time": arrays.create_time_range(
+                start_time=0,
+                end_time=1,
+                samplerate=samplerate,
+            ),
+            "channel": [0],
+        },
+    )
+    expected = audio.compute_spectrogram(
+        wav,
+        window_size=0.025,
+        hop_size=0.0125,
+        window_type="hann",
+    )
+    if pcen:
+        expected = audio.pcen(expected)
+    expected = arrays.to_db(expected, min_db=-100, max_db=0)
+    expected = normalize_spectrogram(expected, relative=True)
+
+    result = compute_normalized_spectrogram(
+        samples,
+        samplerate,
+        window_size=0.025,
+        overlap=0.5,
+        pcen=pcen,
+        min_db=-100,
+        max_db=0,
+    )
+
+    np.testing.assert_allclose(result.squeeze(), expected.data.squeeze())
+
+
+@pytest.mark.parametrize("pcen", [True, False])
+@pytest.mark.parametrize("overlap", [0, 0.5, 0.75])
+@pytest.mark.parametrize("block_size", [100, 777, 4096])
+def test_spectrogram_blocks_match_whole_signal(
+    pcen: bool,
+    overlap: float,
+    block_size: int,
+):
+    samplerate = 8_000
+    samples = np.random.default_rng(0).standard_normal(20_000)
+    blocks = (
+        samples[start : start + block_size]
+        for start in range(0, len(samples), block_size)
+    )
+
+    result = compute_normalized_spectrogram_blocks(
+        blocks,
+        len(samples),
+        samplerate,
+        window_size=0.032,
+        overlap=overlap,
+        pcen=pcen,
+    )
+
+    expected = compute_normalized_spectrogram(
+        samples,
+        samplerate,
+        window_size=0.032,
+        overlap=overlap,
+        pcen=pcen,
+    )
+    np.testing.assert_allclose(result, expected)
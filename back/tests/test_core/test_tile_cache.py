@@ -0,0 +1,56 @@
+"""Test suite for the two-tier tile cache."""
+
+from pathlib import Path
+
+from whombat.core.file_cache import FileCache
+from whombat.core.tile_cache import TileCache
+
+
+def test_tiles_are_computed_once():
+    cache = TileCache(memory_size=1000)
+    calls = []
+
+    def compute() -> bytes:
+        calls.append(1)
+        return b"tile"
+
+    assert cache.get_or_compute("abc", compute) == b"tile"
+    assert cache.get_or_compute("abc", compute) == b"tile"
+    assert len(calls) == 1
+    assert cache.stats.hits == 1
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TileCache(memory_size=10)
+
+    cache.put("a", b"x" * 4)
+    cache.put("b", b"x" * 4)
+    cache.get("a")
+    cache.put("c", b"x" * 4)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path: Path):
+    disk = FileCache(tmp_path / "tiles", max_size=1000)
+    TileCache(memory_size=1000, disk=disk).put("abc", b"tile")
+
+    cache = TileCache(
+        memory_size=1000,
+        disk=FileCache(tmp_path / "tiles", max_size=1000),
+    )
+
+    assert cache.get("abc") == b"tile"
+    assert "abc" in cache.memory
+
+
+def test_tiles_larger_than_memory_are_only_stored_on_disk(tmp_path: Path):
+    disk = FileCache(tmp_path / "tiles", max_size=1000)
+    cache = TileCache(memory_size=10, disk=disk)
+
+    cache.put("big", b"x" * 100)
+
+    assert "big" not in cache.memory
+    assert cache.get("big") == b"x" * 100
@@ -0,0 +1,72 @@
+"""Test suite for memory mapped WAV reads."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from whombat.core.wav import (
+    parse_wav_header,
+    read_wav_frames,
+    read_wav_layout,
+)
+
+
+@pytest.mark.parametrize(
+    "subtype",
+    ["PCM_U8", "PCM_16", "PCM_24", "PCM_32", "FLOAT", "DOUBLE"],
+)
+@pytest.mark.parametrize("channels", [1, 2, 6])
+def test_reads_match_soundfile(tmp_path: Path, subtype: str, channels: int):
+    path = tmp_path / "audio.wav"
+    sf.write(
+        path,
+        np.random.random((1000, channels)) * 2 - 1,
+        22_050,
+        subtype=subtype,
+    )
+    expected, _ = sf.read(path, always_2d=True)
+
+    layout = read_wav_layout(path)
+    assert layout is not None
+    assert layout.frames == 1000
+    assert layout.channels == channels
+
+    assert np.array_equal(
+        read_wav_frames(path, 100, 200, layout=layout),
+        expected[100:300],
+    )
+    assert np.array_equal(
+        read_wav_frames(path, 100, 200, channel=channels - 1),
+        expected[100:300, channels - 1],
+    )
+
+
+def test_frames_outside_the_file_are_zero(tmp_path: Path):
+    path = tmp_path / "audio.wav"
+    data = np.random.random((100, 1)) * 2 - 1
+    sf.write(path, data, 8_000, subtype="FLOAT")
+
+    result = read_wav_frames(path, -10, 120, channel=0)
+
+    assert np.all(result[:10] == 0)
+    assert np.all(result[110:] == 0)
+    assert np.allclose(result[10:110], data[:, 0])
+
+
+def test_compressed_files_are_not_mapped(tmp_path: Path):
+    path = tmp_path / "audio.flac"
+    sf.write(path, np.zeros((100, 1)), 8_000)
+
+    assert read_wav_layout(path) is None
+
+
+def test_layout_can_be_parsed_from_the_first_bytes(tmp_path: Path):
+    path = tmp_path / "audio.wav"
+    sf.write(path, np.zeros((100_000, 2)), 8_000, subtype="PCM_16")
+    size = path.stat().st_size
+    header = path.read_bytes()[:1024]
+
+    assert parse_wav_header(header, size) == read_wav_layout(path)
+    assert parse_wav_header(header[:20], size) is None
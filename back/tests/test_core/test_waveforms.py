@@ -0,0 +1,73 @@
+"""Test suite for waveform envelope pyramids."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from whombat.core.waveforms import build_waveform_pyramid
+
+
+@pytest.fixture
+def audio(tmp_path: Path) -> tuple[Path, np.ndarray]:
+    path = tmp_path / "audio.wav"
+    data = np.random.random((10_000, 2)) * 2 - 1
+    sf.write(path, data, 8000, subtype="FLOAT")
+    return path, data
+
+
+def test_pyramid_levels_halve_until_one_bin(
+    tmp_path: Path,
+    audio: tuple[Path, np.ndarray],
+):
+    path, _ = audio
+
+    with sf.SoundFile(path) as source:
+        pyramid = build_waveform_pyramid(tmp_path / "wf" / "abc", source)
+
+    assert pyramid.exists
+    assert pyramid.info.columns == [40, 20, 10, 5, 3, 2, 1]
+    assert pyramid.level(0).shape == (40, 2, 3)
+
+
+def test_envelope_matches_the_samples(
+    tmp_path: Path,
+    audio: tuple[Path, np.ndarray],
+):
+    path, data = audio
+
+    with sf.SoundFile(path) as source:
+        pyramid = build_waveform_pyramid(
+            tmp_path / "abc",
+            source,
+            bin_size=100,
+            block_bins=7,
+        )
+
+    envelope = pyramid.envelope(2000, 6000, width=10)
+
+    columns = data[2000:6000].reshape(10, 400, 2)
+    assert envelope.min.shape == (2, 10)
+    assert np.allclose(envelope.min, columns.min(axis=1).T, atol=1e-3)
+    assert np.allclose(envelope.max, columns.max(axis=1).T, atol=1e-3)
+    assert np.allclose(
+        envelope.rms,
+        np.sqrt((columns**2).mean(axis=1)).T,
+        atol=1e-3,
+    )
+
+
+def test_envelope_is_zero_outside_the_recording(
+    tmp_path: Path,
+    audio: tuple[Path, np.ndarray],
+):
+    path, _ = audio
+
+    with sf.SoundFile(path) as source:
+        pyramid = build_waveform_pyramid(tmp_path / "abc", source)
+
+    envelope = pyramid.envelope(-16_384, 32_768, width=3)
+
+    assert np.all(envelope.max[:, [0, 2]] == 0)
+    assert np.all(envelope.max[:, 1] > 0.9)
@@ -7,6 +7,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from whombat import models
+from whombat.system import database
+from whombat.system.settings import Settings
 
 
 def check_all_tables_exist(session: Session):
@@ -22,3 +24,22 @@ def check_all_tables_exist(session: Session):
 async def test_can_create_all_models(session: AsyncSession):
     """Test that all models can be created."""
     await session.run_sync(check_all_tables_exist)
+
+
+async def test_database_engine_is_shared_across_calls(settings: Settings):
+    """Test that the same engine is reused for the same settings."""
+    engine = database.get_async_db_engine(settings)
+    assert database.get_async_db_engine(settings) is engine
+    await database.dispose_async_db_engines()
+
+
+async def test_can_get_pool_status(settings: Settings):
+    """Test that the pool status can be computed."""
+    engine = database.get_async_db_engine(settings)
+
+    async with database.get_async_session(engine) as session:
+        await session.execute(sqlalchemy.text("SELECT 1"))
+
+    status = database.get_pool_status(engine)
+    assert set(status) == {"size", "checked_in", "checked_out", "overflow"}
+    await database.dispose_async_db_engines()
@@ -0,0 +1,31 @@
+"""Test the audio endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from whombat import schemas
+from whombat.api import waveforms
+
+
+async def test_waveform_is_accepted_while_its_pyramid_is_built(
+    client: TestClient,
+    session: AsyncSession,
+    recording: schemas.Recording,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def build_later(*args, **kwargs) -> None:
+        return None
+
+    # NOTE: Do not build the pyramid, so that it is never ready.
+    monkeypatch.setattr(waveforms, "run_in_process", build_later)
+    await session.commit()
+
+    response = client.get(
+        "/api/v1/audio/waveform/",
+        params={"recording_uuid": str(recording.uuid)},
+    )
+
+    assert response.status_code == 202
+    assert response.content == b""
+    assert response.headers["retry-after"] == "1"
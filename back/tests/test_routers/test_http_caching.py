@@ -0,0 +1,59 @@
+"""Test suite for the HTTP caching helpers."""
+
+import pytest
+
+from whombat.routes.http_caching import (
+    if_range_matches,
+    make_etag,
+    none_match,
+    not_modified,
+)
+
+
+def test_etag_depends_on_hash_and_parameters():
+    etag = make_etag("abc", "stream", 1.0, {"a": 1, "b": 2})
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("abc", "stream", 1.0, {"b": 2, "a": 1})
+    assert etag != make_etag("abd", "stream", 1.0, {"a": 1, "b": 2})
+    assert etag != make_etag("abc", "stream", 2.0, {"a": 1, "b": 2})
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, True),
+        ('"other"', True),
+        ('"etag"', False),
+        ('"other", W/"etag"', False),
+        ("*", False),
+    ],
+)
+def test_none_match(header: str | None, expected: bool):
+    assert none_match(header, '"etag"') is expected
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, True),
+        ('"etag"', True),
+        ('W/"etag"', False),
+        ('"other"', False),
+        ("Wed, 21 Oct 2015 07:28:00 GMT", False),
+    ],
+)
+def test_if_range_uses_the_strong_comparison(
+    header: str | None,
+    expected: bool,
+):
+    assert if_range_matches(header, '"etag"') is expected
+
+
+def test_not_modified_response_has_no_body():
+    response = not_modified('"etag"')
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == '"etag"'
+    assert response.headers["cache-control"] == "no-cache"
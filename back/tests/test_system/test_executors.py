@@ -0,0 +1,99 @@
+"""Test suite for the executors for blocking work."""
+
+import asyncio
+import math
+import threading
+
+import pytest
+
+from whombat.system.executors import WorkExecutor
+from whombat.system.settings import Settings, get_settings
+
+
+async def test_thread_executor_runs_functions_off_the_event_loop():
+    executor = WorkExecutor("test", kind="thread", max_workers=2)
+
+    thread = await executor.run(threading.current_thread)
+
+    assert thread is not threading.current_thread()
+    assert executor.stats.submitted == 1
+    assert executor.stats.completed == 1
+    executor.shutdown()
+
+
+async def test_executor_reports_queue_depth():
+    executor = WorkExecutor("test", kind="thread", max_workers=2)
+    release = threading.Event()
+
+    tasks = [
+        asyncio.create_task(executor.run(release.wait)) for _ in range(5)
+    ]
+    await asyncio.sleep(0.01)
+
+    assert executor.active == 2
+    assert executor.queued == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert executor.active == 0
+    assert executor.queued == 0
+    assert executor.stats.max_in_flight == 5
+    executor.shutdown()
+
+
+async def test_executor_counts_failures():
+    executor = WorkExecutor("test", kind="thread", max_workers=1)
+
+    with pytest.raises(ZeroDivisionError):
+        await executor.run(divmod, 1, 0)
+
+    assert executor.stats.failed == 1
+    executor.shutdown()
+
+
+async def test_process_executor_runs_functions():
+    executor = WorkExecutor("test", kind="process", max_workers=1)
+
+    assert await executor.run(math.factorial, 5) == 120
+    executor.shutdown()
+
+
+async def test_map_unordered_bounds_the_number_of_pending_calls():
+    executor = WorkExecutor("test", kind="thread", max_workers=2)
+    consumed = 0
+
+    def items():
+        nonlocal consumed
+        for item in range(20):
+            consumed += 1
+            yield item
+
+    results = []
+    async for result in executor.map_unordered(
+        math.factorial,
+        items(),
+        max_in_flight=3,
+    ):
+        assert consumed - len(results) <= 3
+        results.append(result)
+
+    assert sorted(results) == [math.factorial(n) for n in range(20)]
+    assert executor.stats.max_in_flight <= 3
+    executor.shutdown()
+
+
+async def test_process_executor_gives_workers_its_settings(
+    settings: Settings,
+):
+    executor = WorkExecutor(
+        "test",
+        kind="process",
+        max_workers=1,
+        settings=settings,
+    )
+
+    worker_settings = await executor.run(get_settings)
+
+    assert worker_settings == settings
+    executor.shutdown()
@@ -0,0 +1,107 @@
+"""Test suite for the S3 client."""
+
+import asyncio
+import threading
+import time
+import weakref
+
+import pytest
+
+from whombat.utils import aws_s3_client
+from whombat.utils.aws_s3_client import S3Client
+
+
+@pytest.fixture
+def client(s3_client, monkeypatch: pytest.MonkeyPatch) -> S3Client:
+    monkeypatch.setattr(S3Client, "_s3_client", s3_client)
+    return S3Client()
+
+
+async def test_listing_follows_pages_and_sub_prefixes(client, s3_client):
+    keys = {
+        *(f"data/top_{index}.wav" for index in range(5)),
+        *(f"data/a/{index}.wav" for index in range(7)),
+        *(f"data/a/deep/{index}.wav" for index in range(3)),
+        *(f"data/b/{index}.wav" for index in range(4)),
+    }
+    for key in [*keys, "other/x.wav"]:
+        s3_client.put_object(Bucket="bucket", Key=key, Body=b"x")
+
+    s3_client.page_size = 2
+
+    listed = [
+        item["Key"]
+        async for item in client.iter_objects(
+            "bucket",
+            prefix="data/",
+            max_concurrency=3,
+        )
+    ]
+
+    assert sorted(listed) == sorted(keys)
+    assert s3_client.list_requests > 4
+
+
+async def test_listing_can_stop_early(client, s3_client):
+    for index in range(10):
+        s3_client.put_object(
+            Bucket="bucket",
+            Key=f"data/{index}/file.wav",
+            Body=b"x",
+        )
+
+    s3_client.page_size = 1
+    objects = client.iter_objects("bucket", prefix="data/", max_concurrency=2)
+
+    assert (await anext(objects))["Key"].endswith("file.wav")
+    await objects.aclose()
+
+    assert s3_client.list_requests < 10
+
+
+async def test_async_calls_are_bounded_by_the_semaphore(
+    client,
+    s3_client,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(
+        aws_s3_client,
+        "settings",
+        aws_s3_client.settings.model_copy(update=dict(s3_max_concurrency=2)),
+    )
+    monkeypatch.setattr(S3Client, "_semaphores", weakref.WeakKeyDictionary())
+    s3_client.put_object(Bucket="bucket", Key="a.wav", Body=b"abc")
+
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+    head_object = s3_client.head_object
+
+    def slow_head_object(**kwargs):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return head_object(**kwargs)
+
+    monkeypatch.setattr(s3_client, "head_object", slow_head_object)
+
+    heads = await asyncio.gather(
+        *[client.head_object("bucket", "a.wav") for _ in range(8)]
+    )
+
+    assert all(head["ContentLength"] == 3 for head in heads)
+    assert max_running == 2
+
+
+async def test_objects_can_be_read_written_and_deleted(client, s3_client):
+    await client.put_object("bucket", "a/b.wav", b"content")
+
+    assert await client.read_object("bucket", "a/b.wav") == b"content"
+
+    await client.delete_object("bucket", "a/b.wav")
+
+    assert [item async for item in client.iter_objects("bucket")] == []
@@ -0,0 +1,77 @@
+"""Test suite for reading information about audio files in S3."""
+
+import base64
+import hashlib
+from collections.abc import Callable
+from pathlib import Path
+
+from whombat.core import files
+from whombat.utils.s3_files import get_object_hash, get_s3_file_info
+
+
+def test_object_hash_prefers_md5_metadata_and_plain_etags():
+    md5 = "0" * 32
+    etag = "a" * 32
+
+    head = {"ETag": f'"{etag}"', "Metadata": {"MD5": md5}}
+
+    assert get_object_hash(head) == (md5, "md5")
+    assert get_object_hash({"ETag": f'"{etag}"'}) == (etag, "md5")
+
+
+def test_object_hash_does_not_treat_opaque_etags_as_md5():
+    checksum = hashlib.sha256(b"content").digest()
+
+    assert get_object_hash({"ETag": '"abc-3"'}) == ("abc-3", "etag")
+    assert get_object_hash(
+        {"ETag": f'"{"a" * 32}"', "ServerSideEncryption": "aws:kms"}
+    ) == ("a" * 32, "etag")
+    assert get_object_hash(
+        {
+            "ETag": '"abc-3"',
+            "ChecksumSHA256": base64.b64encode(checksum).decode(),
+        }
+    ) == (checksum.hex(), "sha256")
+    assert get_object_hash({}) is None
+
+
+def test_file_info_only_downloads_the_header(
+    s3_client,
+    random_wav_factory: Callable[..., Path],
+):
+    path = random_wav_factory(duration=10, samplerate=16_000, channels=2)
+    content = path.read_bytes()
+    s3_client.put_object(Bucket="bucket", Key="a/long.wav", Body=content)
+
+    info = get_s3_file_info(s3_client, "bucket", "a/long.wav")
+    expected = files.get_file_info(path)
+
+    assert info.hash == expected.hash
+    assert info.hash_algorithm == "md5"
+    assert info.media_info == expected.media_info
+    assert len(s3_client.ranges) == 1
+    assert s3_client.ranges[0][2] == f"bytes=0-{files.BLOCK_SIZE - 1}"
+
+
+def test_full_hash_mode_hashes_the_content(
+    s3_client,
+    random_wav_factory: Callable[..., Path],
+):
+    path = random_wav_factory(duration=1, samplerate=8_000)
+    s3_client.put_object(
+        Bucket="bucket",
+        Key="short.wav",
+        Body=path.read_bytes(),
+        Metadata={"md5": "0" * 32},
+    )
+
+    info = get_s3_file_info(
+        s3_client,
+        "bucket",
+        "short.wav",
+        algorithm="blake2b",
+        full_hash=True,
+    )
+
+    assert info.hash == files.compute_hash(path, "blake2b")
+    assert info.hash_algorithm == "blake2b"
@@ -0,0 +1,66 @@
+"""Test suite for the ranged S3 reader."""
+
+import io
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from whombat.utils.s3_reader import S3RangeReader
+
+
+def test_reader_reads_and_seeks_like_a_file(s3_client):
+    content = bytes(range(256)) * 16
+    s3_client.put_object(Bucket="bucket", Key="data.bin", Body=content)
+
+    reader = S3RangeReader(s3_client, "bucket", "data.bin", readahead=64)
+
+    assert reader.size == len(content)
+    assert reader.read(10) == content[:10]
+    assert reader.tell() == 10
+
+    reader.seek(-20, io.SEEK_END)
+    assert reader.read() == content[-20:]
+
+    reader.seek(1000)
+    assert reader.read(5) == content[1000:1005]
+    assert reader.read(0) == b""
+
+
+def test_reader_serves_small_reads_from_buffer(s3_client):
+    content = b"x" * 10_000
+    s3_client.put_object(Bucket="bucket", Key="data.bin", Body=content)
+
+    reader = S3RangeReader(s3_client, "bucket", "data.bin", readahead=1024)
+
+    for _ in range(100):
+        reader.read(8)
+
+    assert reader.requests == 1
+    assert reader.bytes_fetched == 1024
+
+
+def test_soundfile_reads_window_without_downloading_whole_file(
+    s3_client,
+    random_wav_factory: Callable[..., Path],
+):
+    path = random_wav_factory(
+        duration=60,
+        samplerate=8_000,
+        channels=1,
+        bit_depth=16,
+    )
+    content = path.read_bytes()
+    s3_client.put_object(Bucket="bucket", Key="long.wav", Body=content)
+
+    reader = S3RangeReader(s3_client, "bucket", "long.wav", readahead=4096)
+
+    with sf.SoundFile(reader) as fp:
+        fp.seek(30 * 8_000)
+        window = fp.read(2 * 8_000)
+
+    expected, _ = sf.read(path, start=30 * 8_000, frames=2 * 8_000)
+
+    assert np.allclose(window, expected)
+    assert reader.bytes_fetched < len(content) / 10